@@ -1,5 +1,6 @@
 # Main Engine for the whole APP
 import os, sqlite3, click
+from contextlib import contextmanager
 from flask import Flask, current_app, g
 from flask.cli import with_appcontext
 
@@ -11,19 +12,35 @@ pyfilename = Path(__file__).resolve() # current pyscript filename (usually with
 DB_PATH = Path(pyfilename).parents[6] / "HODOR" / "CONFIG"
 
 # For Database
+DB_CACHED_STATEMENTS = 256
+DB_WAL = set() # databases already switched to WAL journaling by this process
+
+def connect_db(database):
+    """Open a connection: WAL journaling lets readers (page-polling)
+    proceed while a writer (running directive) holds the queue.
+    WAL is kept in the database-file, so it is only asked for once.
+    """
+    db = sqlite3.connect(
+        database,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        timeout=1000, # should be able to allow more concurrency?
+        cached_statements=DB_CACHED_STATEMENTS
+    )
+    db.row_factory = sqlite3.Row
+    if database not in DB_WAL:
+        db.execute('PRAGMA journal_mode=WAL')
+        DB_WAL.add(database)
+    db.execute('PRAGMA synchronous=NORMAL') # per connection
+    return db
+
 def get_db():
     """Connect to the application's configured database. The connection
     is unique for each request and will be reused if this is called
-    again.
+    again, until it is closed on teardown.
     """
     # print("Accessing Database from:\n %s" %current_app.config['DATABASE'])
     if 'db' not in g:
-        g.db = sqlite3.connect(
-            current_app.config['DATABASE'],
-            detect_types=sqlite3.PARSE_DECLTYPES,
-            timeout=1000 # should be able to allow more concurrency?
-        )
-        g.db.row_factory = sqlite3.Row
+        g.db = connect_db(current_app.config['DATABASE'])
     return g.db
 
 def close_db(e=None):
@@ -34,11 +51,21 @@ def close_db(e=None):
     if db is not None:
         db.close()
 
+@contextmanager
+def db_transaction():
+    """Batch several statements into one transaction (one lock, one commit):
+        with db_transaction() as db: db.executemany(...)
+    """
+    db = get_db()
+    with db: yield db
+
 def init_db():
     """Clear existing data and create new tables."""
     db = get_db()
     with current_app.open_resource('authschema.sql') as f:
         db.executescript(f.read().decode('utf8'))
+    db.execute('PRAGMA journal_mode=WAL')
+    DB_WAL.add(current_app.config['DATABASE'])
 
 @click.command('init-db')
 @with_appcontext
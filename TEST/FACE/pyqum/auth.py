@@ -7,11 +7,14 @@ from os.path import basename as bs
 myname = bs(__file__).split('.')[0] # This py-script's name
 
 import functools
+from os import stat
+from time import time
+from copy import deepcopy
 # from datetime import timedelta
 # from keyboard import press
 
 from flask import (
-    Blueprint, flash, g, redirect, render_template, request, session, url_for, jsonify
+    Blueprint, flash, g, redirect, render_template, request, session, url_for, jsonify, current_app
 )
 from werkzeug.security import check_password_hash, generate_password_hash
 
@@ -20,6 +23,23 @@ from pyqum.instrument.logger import lisample, set_status, get_status, which_queu
 
 bp = Blueprint(myname, __name__, url_prefix='/auth')
 
+USER_CACHE_SECONDS = 2 # each session's profile-snapshot (g.user & co.) is re-queried after this
+USER_CACHE = {} # user_id: (time, database-stamp, snapshot)
+QUEUE_SYSTEMS = ['CHAR0', 'CHAR1', 'QPC0', 'QPC1']
+
+def invalidate_user_cache():
+    '''Samples, machines, queues or users (approval & clearances) have changed: every session's snapshot is outdated'''
+    USER_CACHE.clear()
+
+def database_stamp():
+    '''Changes with every commit onto the database, by any process: (mtime, size) of the database & its WAL'''
+    stamp = []
+    for dbfile in (current_app.config['DATABASE'], current_app.config['DATABASE'] + '-wal'):
+        try: filestat = stat(dbfile)
+        except(OSError): stamp.append(None)
+        else: stamp.append((filestat.st_mtime_ns, filestat.st_size))
+    return tuple(stamp)
+
 
 def login_required(view):
     """View decorator that redirects anonymous users to the login page."""
@@ -50,68 +70,59 @@ def load_logged_in_user():
     if user_id is None:
         g.user = None
     else:
-        # 1. logged-in user's profile:
-        g.user = get_db().execute(
-            'SELECT * FROM user WHERE id = ?', (user_id,)
-        ).fetchone()
-        close_db()
-
-        # 2. Latest sample-loading date: (to prevent measuring old samples)
-        g.latest_date = get_db().execute('SELECT s.registered FROM sample s ORDER BY registered DESC').fetchone()[0].strftime("%Y-%m-%d")
-        close_db()
-        
-        # 3. logged-in user's samples' details:
-        g.samples = get_db().execute(
-            'SELECT s.id, author_id, samplename, fabricated, location, previously, description, registered'
-            ' FROM sample s JOIN user u ON s.author_id = u.id' # join tables to link (id in user) and (author_id in post) to get username
-            ' WHERE u.id = ?'
-            ' ORDER BY registered DESC',
-            (g.user['id'],)
-        ).fetchall()
-        close_db()
-        g.samples = [dict(s) for s in g.samples]
-
-        # 4. logged-in user's co-authored samples' details:
-        g.cosamples = get_db().execute(
-            'SELECT s.id, author_id, samplename, fabricated, location, previously, description, registered'
-            ' FROM sample s JOIN user u ON s.author_id = u.id' # join tables to link (id in user) and (author_id in post) to get username
-            ' WHERE s.co_authors LIKE ?'
-            ' ORDER BY registered DESC',
-            ('%%%s%%' %g.user['username'],)
-        ).fetchall()
-        close_db()
-        g.cosamples = [dict(x) for x in g.cosamples]
-
-        # 5. Instrument list & details for each DR (PyQUM) platform:
-        g.machlist = get_db().execute(
-            '''
-            SELECT m.codename, connected, category, sequence, system, note, u.username
-            FROM machine m
-            INNER JOIN user u ON m.user_id = u.id
-            ORDER BY m.id DESC
-            '''
-        ).fetchall()
-        close_db()
-        g.machlist = [dict(x) for x in g.machlist]
-        g.instlist = [x['codename'].replace('_','-') for x in g.machlist]
-        g.machspecs = dict()
-        for x in g.machlist: g.machspecs[x['codename']] = x['note']
-
-        # 6. Appointed sample in each measurement system:
-        g.CHAR0_sample = get_db().execute("SELECT q.samplename FROM queue q WHERE q.system='CHAR0'").fetchone()[0]
-        close_db()
-        g.CHAR1_sample = get_db().execute("SELECT q.samplename FROM queue q WHERE q.system='CHAR1'").fetchone()[0]
-        close_db()
-        g.QPC0_sample = get_db().execute("SELECT q.samplename FROM queue q WHERE q.system='QPC0'").fetchone()[0]
-        close_db()
-        g.QPC1_sample = get_db().execute("SELECT q.samplename FROM queue q WHERE q.system='QPC1'").fetchone()[0]
-        close_db()
+        # Short-lived snapshot per session (re-queried as soon as the database is changed by any process):
+        cached, stamp = USER_CACHE.get(user_id), database_stamp()
+        if cached is None or time() - cached[0] >= USER_CACHE_SECONDS or cached[1] != stamp:
+            cached = USER_CACHE[user_id] = (time(), stamp, load_user_snapshot(user_id))
+        for k, v in cached[2].items(): setattr(g, k, v if k == 'user' else deepcopy(v)) # each request its own copy (user is a read-only Row)
         # print(Fore.GREEN + "CHAR0_sample: %s" %g.CHAR0_sample)
 
 
         # press('enter') # simulate press-enter-key in cmd to clear the possible clog!
 
 
+def load_user_snapshot(user_id):
+    """Everything load_logged_in_user puts into g, in a few queries on the request's connection"""
+    db = get_db()
+    # 1. logged-in user's profile:
+    user = db.execute('SELECT * FROM user WHERE id = ?', (user_id,)).fetchone()
+
+    # 2. Latest sample-loading date: (to prevent measuring old samples)
+    latest_date = db.execute('SELECT s.registered FROM sample s ORDER BY registered DESC LIMIT 1').fetchone()[0].strftime("%Y-%m-%d")
+
+    # 3 & 4. logged-in user's own & co-authored samples' details:
+    allsamples = db.execute(
+        'SELECT s.id, author_id, samplename, fabricated, location, previously, description, registered, s.author_id = ? AS mine, s.co_authors LIKE ? AS co'
+        ' FROM sample s JOIN user u ON s.author_id = u.id' # join tables to link (id in user) and (author_id in post) to get username
+        ' WHERE s.author_id = ? OR s.co_authors LIKE ?'
+        ' ORDER BY registered DESC',
+        (user['id'], '%%%s%%' %user['username'], user['id'], '%%%s%%' %user['username'])
+    ).fetchall()
+    samplekeys = ['id', 'author_id', 'samplename', 'fabricated', 'location', 'previously', 'description', 'registered']
+    samples = [{k: x[k] for k in samplekeys} for x in allsamples if x['mine']]
+    cosamples = [{k: x[k] for k in samplekeys} for x in allsamples if x['co']]
+
+    # 5. Instrument list & details for each DR (PyQUM) platform:
+    machlist = db.execute(
+        '''
+        SELECT m.codename, connected, category, sequence, system, note, u.username
+        FROM machine m
+        INNER JOIN user u ON m.user_id = u.id
+        ORDER BY m.id DESC
+        '''
+    ).fetchall()
+    machlist = [dict(x) for x in machlist]
+
+    # 6. Appointed sample in each measurement system:
+    appointed = dict(db.execute("SELECT q.system, q.samplename FROM queue q WHERE q.system IN (%s)" %','.join('?'*len(QUEUE_SYSTEMS)), QUEUE_SYSTEMS).fetchall())
+
+    snapshot = dict(user=user, latest_date=latest_date, samples=samples, cosamples=cosamples, machlist=machlist)
+    snapshot['instlist'] = [x['codename'].replace('_','-') for x in machlist]
+    snapshot['machspecs'] = {x['codename']: x['note'] for x in machlist}
+    for system in QUEUE_SYSTEMS: snapshot['%s_sample' %system] = appointed.get(system)
+    return snapshot
+
+
 @bp.route('/register', methods=('GET', 'POST'))
 def register():
     """Register a new user.
@@ -176,6 +187,7 @@ def login():
         if error is None:
             # store the user's credentials in a new SESSION (Cookies) and return to the index
             session.clear()
+            USER_CACHE.pop(user['id'], None) # approval & clearances as of now
             session['user_id'] = user['id']
             session['user_name'] = user['username']
             session['user_status'] = user['status']
@@ -257,6 +269,7 @@ def usersamples_register():
             (g.user['id'], sname, dob, loc, prev, description,)
         )
         db.commit()
+        invalidate_user_cache()
         message = "Sample %s added to the database!" %(sname)
     except:
         message = "Check sample registration"
@@ -311,6 +324,7 @@ def usersamples_update():
                 (loc, dob, description, coauthors, prev, history, sname,)
             )
             db.commit()
+            invalidate_user_cache()
             message = "Sample %s has been successfully updated!" %(sname)
         else:
             message = 'PASSWORD NOT VALID'
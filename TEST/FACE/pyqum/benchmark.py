@@ -8,7 +8,7 @@ import sys, struct
 from importlib import import_module as im
 from flask import Flask, request, render_template, Response, redirect, Blueprint, jsonify, session, send_from_directory, abort, g
 from pyqum.instrument.logger import address, get_status, set_status, set_mat, set_csv, clocker, mac_for_ip, lisqueue, lisjob, measurement, qout, jobsearch, get_json_measurementinfo, set_mat_analysis
-from pyqum.instrument.toolbox import cdatasearch, gotocdata, waveform
+from pyqum.instrument.toolbox import cdatasearch, gotocdata, waveform, packbinary
 
 
 # Json to Javascrpt
@@ -279,6 +279,7 @@ def getJson_plot():
 		'1D_IQ': plot_1D_IQ,
 		'1D_all': plot_1D_all,
 	}
+	if int(request.args.get('binary', 0)): return Response(packbinary(plotFunction[plotType]()), mimetype='application/octet-stream')
 	return json.dumps(plotFunction[plotType](), cls=NumpyEncoder)
 
 
@@ -8,8 +8,8 @@ from numpy import prod
 from flask import session, g
 
 from importlib import import_module as im
-from pyqum.instrument.logger import settings, get_status, qout, jobsinqueue
-from pyqum.instrument.toolbox import cdatasearch, waveform
+from pyqum.instrument.logger import settings, get_status, qout, jobsinqueue, SCHEDULER, scpibatch
+from pyqum.instrument.toolbox import cdatasearch, waveform, STAGES
 from pyqum.instrument.reader import inst_order
 
 __author__ = "Teik-Hui Lee"
@@ -61,7 +61,7 @@ def F_Response(owner, tag="", corder={}, comment='', dayindex='', taskentry=0, r
     [NA_type, NA_label] = instr['NA'].split('_')
     NA = im("pyqum.instrument.machine.%s" %NA_type)
     nabench = NA.Initiate(True, which=NA_label)
-    NA.dataform(nabench, action=['Set', 'REAL'])
+    NA.dataform(nabench, action=['Set', 'REAL32'])
     NA.sweep(nabench, action=['Set', 'ON', freq.count])
     fstart, fstop = freq.data[0]*1e9, freq.data[-1]*1e9
     NA.linfreq(nabench, action=['Set', fstart, fstop]) # Linear Freq-sweep-range
@@ -113,25 +113,26 @@ def F_Response(owner, tag="", corder={}, comment='', dayindex='', taskentry=0, r
             if not i%prod(cstructure[2::]): # virtual for-loop using exact-multiples condition
                 NA.setrace(nabench, Mparam=[Sparam.data[caddress[1]]])
 
-            if not i%prod(cstructure[3::]): # virtual for-loop using exact-multiples condition
-                NA.ifbw(nabench, action=['Set', ifb.data[caddress[2]]])
+            with scpibatch(nabench): # one round-trip for the NA's settings
+                if not i%prod(cstructure[3::]): # virtual for-loop using exact-multiples condition
+                    NA.ifbw(nabench, action=['Set', ifb.data[caddress[2]]])
 
-            NA.power(nabench, action=['Set', powa.data[caddress[3]]]) # same as the whole measure-loop
+                NA.power(nabench, action=['Set', powa.data[caddress[3]]]) # same as the whole measure-loop
 
             # start sweeping:
             stat = NA.sweep(nabench) #getting the estimated sweeping time
             print("Time-taken for this loop would be: %s (%spts)" %(stat[1]['TIME'], stat[1]['POINTS']))
-            print(Fore.GREEN + "Operation Complete: %s" %bool(NA.measure(nabench)))
-            # adjusting display on NA:
-            NA.autoscal(nabench)
-            # NA.selectrace(nabench, action=['Set', 'para 1 calc 1'])
-            data = NA.sdata(nabench)
+            with STAGES.stage('acquisition'):
+                print(Fore.GREEN + "Operation Complete: %s" %bool(NA.measure(nabench)))
+                # adjusting display on NA:
+                NA.autoscal(nabench)
+                # NA.selectrace(nabench, action=['Set', 'para 1 calc 1'])
+                data = NA.sarray(nabench) # numpy-array straight into the data-file
             # print(Fore.YELLOW + "\rProgress: %.3f%% [%s]" %((i+1)/datasize*100, data), end='\r', flush=True)
             # print(Fore.YELLOW + "\rProgress: %.3f%%" %((i+1)/datasize*buffersize_1*100), end='\r', flush=True)
             print(Fore.YELLOW + "Progress: %.3f%%" %((i+1)/datasize*buffersize_1*100))
 
-            jobsinqueue(queue)
-            if JOBID in g.jobidlist:
+            if SCHEDULER.allowed(queue, JOBID):
                 # print(Fore.YELLOW + "Pushing Data into file...")
                 yield data
             else: break
@@ -197,7 +198,7 @@ def CW_Sweep(owner, tag="", corder={}, comment='', dayindex='', taskentry=0, res
     [NA_type, NA_label] = instr['NA'].split('_')
     NA = im("pyqum.instrument.machine.%s" %NA_type)
     nabench = NA.Initiate(True, which=NA_label)
-    NA.dataform(nabench, action=['Set', 'REAL'])
+    NA.dataform(nabench, action=['Set', 'REAL32'])
     if powa_repeat == 1: 
         # collect swept power-data every measure-loop
         NA.sweep(nabench, action=['Set', 'ON', powa.count])
@@ -305,28 +306,29 @@ def CW_Sweep(owner, tag="", corder={}, comment='', dayindex='', taskentry=0, res
             if not i%prod(cstructure[4::]): # virtual for-loop using exact-multiples condition
                 NA.setrace(nabench, Mparam=[Sparam.data[caddress[3]]])
 
-            if not i%prod(cstructure[5::]): # virtual for-loop using exact-multiples condition
-                print("IFB", ifb.data[caddress[4]] )
-                NA.ifbw(nabench, action=['Set', ifb.data[caddress[4]]])
+            with scpibatch(nabench): # one round-trip for the NA's settings
+                if not i%prod(cstructure[5::]): # virtual for-loop using exact-multiples condition
+                    print("IFB", ifb.data[caddress[4]] )
+                    NA.ifbw(nabench, action=['Set', ifb.data[caddress[4]]])
 
-            if not i%prod(cstructure[6::]): # virtual for-loop using exact-multiples condition
-                print("cwfreq", freq.data[caddress[5]]*1e9 )
-                NA.cwfreq(nabench, action=['Set', freq.data[caddress[5]]*1e9])
+                if not i%prod(cstructure[6::]): # virtual for-loop using exact-multiples condition
+                    print("cwfreq", freq.data[caddress[5]]*1e9 )
+                    NA.cwfreq(nabench, action=['Set', freq.data[caddress[5]]*1e9])
 
-            if powa_repeat > 1:
-                NA.power(nabench, action=['Set', '', powa.data[caddress[6]], powa.data[caddress[6]]]) # same as the whole measure-loop
+                if powa_repeat > 1:
+                    NA.power(nabench, action=['Set', '', powa.data[caddress[6]], powa.data[caddress[6]]]) # same as the whole measure-loop
 
             # start sweeping:
             stat = NA.sweep(nabench) #getting the estimated sweeping time
             #print("Time-taken for this loop would be: %s (%spts)" %(stat[1]['TIME'], stat[1]['POINTS']))
-            print("Operation Complete: %s" %bool(NA.measure(nabench)))
-            # adjusting display on NA:
-            NA.autoscal(nabench)
-            # NA.selectrace(nabench, action=['Set', 'para 1 calc 1'])
-            data = NA.sdata(nabench)
+            with STAGES.stage('acquisition'):
+                print("Operation Complete: %s" %bool(NA.measure(nabench)))
+                # adjusting display on NA:
+                NA.autoscal(nabench)
+                # NA.selectrace(nabench, action=['Set', 'para 1 calc 1'])
+                data = NA.sarray(nabench) # numpy-array straight into the data-file
             print(Fore.YELLOW + "\rProgress: %.3f%%" %((i+1)/datasize*buffersize_1*100), end='\r', flush=True)
-            jobsinqueue(queue)
-            if JOBID in g.jobidlist:
+            if SCHEDULER.allowed(queue, JOBID):
                 # print(Fore.YELLOW + "Pushing Data into file...")
                 yield data
             else: break
@@ -0,0 +1,96 @@
+'''Measurement-loop benchmark: re-run queued job(s) against simulated instruments and report the time spent in each stage
+    usage: python -m pyqum.directive.loopbench <username> <jobid> [<jobid> ...]
+    (PYQUM_SIMULATE defaults to ALL here, PYQUM_SIMULATE_SCALE shrinks / stretches the instruments' own timing)
+    Everything runs in a sandbox: a copy of the database, of INSTLOG & an empty USRLOG under a scratch directory,
+    so neither the jobs, the data nor the instrument / mission status of the lab are touched.
+'''
+
+from colorama import init, Fore, Back
+init(autoreset=True) #to convert termcolor to wins color
+
+import sys, ast, sqlite3, tempfile
+from os import environ
+from pathlib import Path
+environ.setdefault('PYQUM_SIMULATE', 'ALL') # before the instruments get to lookup their addresses
+from time import time
+from flask import session, g
+
+from pyqum import create_app, get_db
+from pyqum.auth import load_logged_in_user
+from pyqum.instrument import logger
+from pyqum.instrument.logger import set_status, jobsearch
+from pyqum.instrument.toolbox import STAGES
+from pyqum.directive.characterize import F_Response, CW_Sweep
+from pyqum.directive.manipulate import Single_Qubit
+
+__author__ = "Teik-Hui Lee"
+__copyright__ = "Copyright 2019, The Pyqum Project"
+__credits__ = ["Chii-Dong Chen"]
+__license__ = "GPL"
+__version__ = "beta3"
+__email__ = "teikhui@phys.sinica.edu.tw"
+__status__ = "development"
+
+DIRECTIVES = dict(F_Response=F_Response, CW_Sweep=CW_Sweep, Single_Qubit=Single_Qubit)
+
+def sandbox(root=None):
+    '''copy the database & INSTLOG into <root> (a scratch directory by default) and point the app & logger at them'''
+    root = Path(root or tempfile.mkdtemp(prefix='loopbench-'))
+    (root / "INSTLOG").mkdir(parents=True, exist_ok=True)
+    (root / "USRLOG").mkdir(parents=True, exist_ok=True)
+    app, database = create_app(), root / "pyqum.sqlite"
+    source, target = sqlite3.connect(app.config['DATABASE']), sqlite3.connect(str(database))
+    source.backup(target) # consistent copy even while the lab is using it
+    source.close(), target.close()
+    app.config['DATABASE'] = str(database)
+    for status in Path(logger.INSTR_PATH).glob("*_status.pyqum"): (root / "INSTLOG" / status.name).write_bytes(status.read_bytes())
+    logger.INSTR_PATH, logger.USR_PATH = root / "INSTLOG", root / "USRLOG"
+    print(Fore.YELLOW + "Sandbox: %s" %root)
+    return app
+
+def login(username):
+    '''fill up session & g the way auth.login would'''
+    db = get_db()
+    user = db.execute('SELECT * FROM user WHERE username = ?', (username,)).fetchone()
+    session.clear()
+    session['user_id'], session['user_name'], session['user_status'] = user['id'], user['username'], user['status']
+    session['user_measurement'], session['user_instrument'], session['user_analysis'] = user['measurement'], user['instrument'], user['analysis']
+    load_logged_in_user()
+    return user
+
+def requeue(jobid):
+    '''run job #jobid again as a new job (in the sandbox) on the same sample & queue, return (task, measurement, loop-time)'''
+    job = jobsearch(jobid, mode='requeue')
+    db = get_db()
+    owner, sample, queue = db.execute('''
+        SELECT u.username, s.samplename, j.queue FROM job j JOIN sample s ON s.id = j.sample_id JOIN user u ON s.author_id = u.id WHERE j.id = ?
+        ''', (jobid,)).fetchone()
+    session['people'] = owner
+    set_status("MSSN", {session['user_name']: dict(sample=sample, queue=queue)})
+    load_logged_in_user()
+
+    print(Fore.YELLOW + "Benchmarking %s of JOB#%s on %s (%s)" %(job['task'], jobid, sample, queue))
+    perimeter = ast.literal_eval(job['perimeter'])
+    perimeter.pop('jobid', None) # otherwise settings would take it as the REQUEUE of the very same JOB
+    start = time()
+    M = DIRECTIVES[job['task']](owner, corder=ast.literal_eval(job['parameter']), perimeter=perimeter,
+                                comment="loopbench of JOB#%s" %jobid, tag='loopbench', dayindex=-1)
+    return job['task'], M, time() - start
+
+def run(username, jobids, root=None):
+    '''benchmark each job in turn: {jobid: dict(task, status, seconds, stages=STAGES.report())}'''
+    STAGES.enable()
+    reports = {}
+    with sandbox(root).test_request_context():
+        login(username)
+        for jobid in jobids:
+            STAGES.reset()
+            task, M, seconds = requeue(jobid)
+            reports[jobid] = dict(task=task, status=M.status, seconds=seconds, stages=STAGES.report())
+            print(Back.WHITE + Fore.BLACK + "JOB#%s %s: %s in %.3fs" %(jobid, task, M.status, seconds))
+            print(STAGES.table())
+    return reports
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3: print(__doc__)
+    else: run(sys.argv[1], [int(x) for x in sys.argv[2:]])
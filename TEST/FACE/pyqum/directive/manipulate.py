@@ -9,14 +9,14 @@ mdlname = bs(__file__).split('.')[0] # instrument-module's name e.g. ENA, PSG, Y
 from time import time, sleep
 from copy import copy, deepcopy
 from json import loads, dumps
-from numpy import prod, array, mean, ceil
+from numpy import prod, array, mean, ceil, int16
 from flask import session, g
 
 from importlib import import_module as im
-from pyqum.instrument.logger import settings, get_status, set_status, jobsinqueue, qout, job_update_perimeter
-from pyqum.instrument.toolbox import cdatasearch, waveform, find_in_list
+from pyqum.instrument.logger import settings, get_status, set_status, jobsinqueue, qout, job_update_perimeter, SCHEDULER
+from pyqum.instrument.toolbox import cdatasearch, waveform, find_in_list, STAGES
 from pyqum.instrument.composer import pulser
-from pyqum.instrument.analyzer import pulse_baseband
+from pyqum.instrument.analyzer import pulse_baseband, dsp_pipeline, dsp_homodyne
 from pyqum.instrument.reader import inst_order
 
 
@@ -267,43 +267,45 @@ def Single_Qubit(owner, tag="", corder={}, comment='', dayindex='', taskentry=0,
                     # PENDING: edittable markeroption instead of just "2":
                     if (i_slot_order==0) and ("SDAWG" in DAC_type[i_slot_order]): marker = 7
                     else: marker = 2
-                    DAC[i_slot_order].compose_DAC(DAC_instance[i_slot_order], int(ch), pulseq.music, pulseq.envelope, marker, update_settings=update_settings) # PENDING: Option to turn ON PINSW for SDAWG (default is OFF)
-                DAC[i_slot_order].ready(DAC_instance[i_slot_order])
+                    with STAGES.stage('dac'): DAC[i_slot_order].compose_DAC(DAC_instance[i_slot_order], int(ch), pulseq.music, pulseq.envelope, marker, update_settings=update_settings) # PENDING: Option to turn ON PINSW for SDAWG (default is OFF)
+                with STAGES.stage('dac'): DAC[i_slot_order].ready(DAC_instance[i_slot_order])
                 print('Waveform from Slot-%s is Ready!'%(i_slot_order+1))
                 
             # Basic Readout (Buffer Every-loop):
             # ADC 
-            DATA = ADC.AcquireData(adca, recordtime_ns*1e-9, recordsum)[0]
+            with STAGES.stage('acquisition'): DATA, transferTime_sec, recordsPerBuffer, buffersPerAcquisition = ADC.AcquireData(adca, recordtime_ns*1e-9, recordsum, update_settings=dict(average=readoutype!='one-shot', raw=readoutype=='one-shot'))
             # POST PROCESSING
-            try:
-                # TIME EVOLUTION / FIDELITY TEST:
-                if readoutype == 'one-shot':
-                    DATA = DATA.reshape([recordsum,TOTAL_POINTS*2])
-                    if digital_homodyne != "original": 
-                        for r in range(recordsum):
-                            trace_I, trace_Q = DATA[r,:].reshape((TOTAL_POINTS, 2)).transpose()[0], DATA[r,:].reshape((TOTAL_POINTS, 2)).transpose()[1]
+            with STAGES.stage('dsp'):
+                try:
+                    # TIME EVOLUTION / FIDELITY TEST:
+                    if readoutype == 'one-shot':
+                        DATA = DATA.reshape([recordsum,TOTAL_POINTS*2])
+                        raw = (DATA.dtype == int16) # ALZDG codes are only converted into volts once the records are reduced
+                        if raw and digital_homodyne != "original": DATA, raw = ADC.tovolts(DATA, adca), False
+                        if digital_homodyne != "original": 
+                            # interleaved IQ of each record becomes I-trace followed by Q-trace, chunk by chunk across the cores:
+                            dsp_pipeline([dsp_homodyne(digital_homodyne, RO_Compensate_MHz, ifreqcorrection_kHz, dt=TIME_RESOLUTION_NS)], (DATA[:,0::2], DATA[:,1::2]), out=(DATA[:,:TOTAL_POINTS], DATA[:,TOTAL_POINTS:]))
+                            print(Fore.YELLOW + "Shooting %s times" %recordsum)
+                        DATA = mean(DATA.reshape([recordsum*2,TOTAL_POINTS])[:,skipoints:], axis=1)
+                        if raw: DATA = ADC.tovolts(DATA, adca, raw=True)
+                        print(Fore.BLUE + "DATA of size %s is ready to be saved" %len(DATA))
+                    else: # by default
+                        if recordsPerBuffer*buffersPerAcquisition != recordsum: raise ValueError("%s records acquired instead of %s" %(recordsPerBuffer*buffersPerAcquisition, recordsum))
+                        DATA = DATA.reshape([TOTAL_POINTS*2]) # ADC has already averaged the records while streaming
+                        if digital_homodyne != "original": 
+                            trace_I, trace_Q = DATA.reshape((TOTAL_POINTS, 2)).transpose()[0], DATA.reshape((TOTAL_POINTS, 2)).transpose()[1]
                             trace_I, trace_Q = pulse_baseband(digital_homodyne, trace_I, trace_Q, RO_Compensate_MHz, ifreqcorrection_kHz, dt=TIME_RESOLUTION_NS)
-                            DATA[r,:] = array([trace_I, trace_Q]).reshape(2*TOTAL_POINTS) # back to interleaved IQ-Data
-                            if not r%1000: print(Fore.YELLOW + "Shooting %s times" %(r+1))
-                    DATA = mean(DATA.reshape([recordsum*2,TOTAL_POINTS])[:,skipoints:], axis=1)
-                    print(Fore.BLUE + "DATA of size %s is ready to be saved" %len(DATA))
-                else: # by default
-                    DATA = mean(DATA.reshape([recordsum,TOTAL_POINTS*2]), axis=0)
-                    if digital_homodyne != "original": 
-                        trace_I, trace_Q = DATA.reshape((TOTAL_POINTS, 2)).transpose()[0], DATA.reshape((TOTAL_POINTS, 2)).transpose()[1]
-                        trace_I, trace_Q = pulse_baseband(digital_homodyne, trace_I, trace_Q, RO_Compensate_MHz, ifreqcorrection_kHz, dt=TIME_RESOLUTION_NS)
-                        DATA = array([trace_I, trace_Q]).transpose().reshape(TOTAL_POINTS*2) # back to interleaved IQ-Data
+                            DATA = array([trace_I, trace_Q]).transpose().reshape(TOTAL_POINTS*2) # back to interleaved IQ-Data
             
-            except(ValueError):
-                # raise # PENDING: UPDATE TIMSUM MISMATCH LIST
-                print(Fore.RED + "Check ALZDG OPT_DMA_BUFFER!")
-                break # proceed to close all & queue out
+                except(ValueError):
+                    # raise # PENDING: UPDATE TIMSUM MISMATCH LIST
+                    print(Fore.RED + "Check ALZDG OPT_DMA_BUFFER!")
+                    break # proceed to close all & queue out
             
             # print("Operation Complete")
             print(Fore.YELLOW + "\rProgress-(%s): %.3f%%" %((i+1), (i+1)/datasize*buffersize*100), end='\r', flush=True)			
             
-            jobsinqueue(queue)
-            if JOBID in g.jobidlist:
+            if SCHEDULER.allowed(queue, JOBID):
                 # print(Fore.YELLOW + "Pushing Data into file...")
                 yield list(DATA)
             else: break # proceed to close all & queue out
@@ -538,43 +540,45 @@ def Qubits(owner, tag="", corder={}, comment='', dayindex='', taskentry=0, resum
                 7 for SDAWG: PIN-Switch on MixerBox
                 0 for BOTH: disabled.
                 '''
-                DAC.compose_DAC(daca, int(channel), pulseq.music, pulseq.envelope, 2)
-            DAC.ready(daca)
+                with STAGES.stage('dac'): DAC.compose_DAC(daca, int(channel), pulseq.music, pulseq.envelope, 2)
+            with STAGES.stage('dac'): DAC.ready(daca)
             print('Waveform is Ready!')
                 
             # Basic Readout (Buffer Every-loop):
             # ADC 
-            DATA = ADC.AcquireData(adca, recordtime_ns*1e-9, recordsum)[0]
+            with STAGES.stage('acquisition'): DATA, transferTime_sec, recordsPerBuffer, buffersPerAcquisition = ADC.AcquireData(adca, recordtime_ns*1e-9, recordsum, update_settings=dict(average=readoutype!='one-shot', raw=readoutype=='one-shot'))
             # POST PROCESSING
-            try:
-                # TIME EVOLUTION / FIDELITY TEST:
-                if readoutype == 'one-shot':
-                    DATA = DATA.reshape([recordsum,TOTAL_POINTS*2])
-                    if digital_homodyne != "original": 
-                        for r in range(recordsum):
-                            trace_I, trace_Q = DATA[r,:].reshape((TOTAL_POINTS, 2)).transpose()[0], DATA[r,:].reshape((TOTAL_POINTS, 2)).transpose()[1]
+            with STAGES.stage('dsp'):
+                try:
+                    # TIME EVOLUTION / FIDELITY TEST:
+                    if readoutype == 'one-shot':
+                        DATA = DATA.reshape([recordsum,TOTAL_POINTS*2])
+                        raw = (DATA.dtype == int16) # ALZDG codes are only converted into volts once the records are reduced
+                        if raw and digital_homodyne != "original": DATA, raw = ADC.tovolts(DATA, adca), False
+                        if digital_homodyne != "original": 
+                            # interleaved IQ of each record becomes I-trace followed by Q-trace, chunk by chunk across the cores:
+                            dsp_pipeline([dsp_homodyne(digital_homodyne, RO_Compensate_MHz, ifreqcorrection_kHz)], (DATA[:,0::2], DATA[:,1::2]), out=(DATA[:,:TOTAL_POINTS], DATA[:,TOTAL_POINTS:]))
+                            print(Fore.YELLOW + "Shooting %s times" %recordsum)
+                        DATA = mean(DATA.reshape([recordsum*2,TOTAL_POINTS])[:,skipoints:], axis=1)
+                        if raw: DATA = ADC.tovolts(DATA, adca, raw=True)
+                        print(Fore.BLUE + "DATA of size %s is ready to be saved" %len(DATA))
+                    else: # by default
+                        if recordsPerBuffer*buffersPerAcquisition != recordsum: raise ValueError("%s records acquired instead of %s" %(recordsPerBuffer*buffersPerAcquisition, recordsum))
+                        DATA = DATA.reshape([TOTAL_POINTS*2]) # ADC has already averaged the records while streaming
+                        if digital_homodyne != "original": 
+                            trace_I, trace_Q = DATA.reshape((TOTAL_POINTS, 2)).transpose()[0], DATA.reshape((TOTAL_POINTS, 2)).transpose()[1]
                             trace_I, trace_Q = pulse_baseband(digital_homodyne, trace_I, trace_Q, RO_Compensate_MHz, ifreqcorrection_kHz)
-                            DATA[r,:] = array([trace_I, trace_Q]).reshape(2*TOTAL_POINTS) # back to interleaved IQ-Data
-                            if not r%1000: print(Fore.YELLOW + "Shooting %s times" %(r+1))
-                    DATA = mean(DATA.reshape([recordsum*2,TOTAL_POINTS])[:,skipoints:], axis=1)
-                    print(Fore.BLUE + "DATA of size %s is ready to be saved" %len(DATA))
-                else: # by default
-                    DATA = mean(DATA.reshape([recordsum,TOTAL_POINTS*2]), axis=0)
-                    if digital_homodyne != "original": 
-                        trace_I, trace_Q = DATA.reshape((TOTAL_POINTS, 2)).transpose()[0], DATA.reshape((TOTAL_POINTS, 2)).transpose()[1]
-                        trace_I, trace_Q = pulse_baseband(digital_homodyne, trace_I, trace_Q, RO_Compensate_MHz, ifreqcorrection_kHz)
-                        DATA = array([trace_I, trace_Q]).transpose().reshape(TOTAL_POINTS*2) # back to interleaved IQ-Data
+                            DATA = array([trace_I, trace_Q]).transpose().reshape(TOTAL_POINTS*2) # back to interleaved IQ-Data
             
-            except(ValueError):
-                # raise # PENDING: UPDATE TIMSUM MISMATCH LIST
-                print(Fore.RED + "Check ALZDG OPT_DMA_BUFFER!")
-                break # proceed to close all & queue out
+                except(ValueError):
+                    # raise # PENDING: UPDATE TIMSUM MISMATCH LIST
+                    print(Fore.RED + "Check ALZDG OPT_DMA_BUFFER!")
+                    break # proceed to close all & queue out
             
             # print("Operation Complete")
             print(Fore.YELLOW + "\rProgress: %.3f%%" %((i+1)/datasize*buffersize*100), end='\r', flush=True)			
             
-            jobsinqueue(queue)
-            if JOBID in g.jobidlist:
+            if SCHEDULER.allowed(queue, JOBID):
                 # print(Fore.YELLOW + "Pushing Data into file...")
                 yield list(DATA)
             else: break # proceed to close all & queue out
@@ -9,7 +9,7 @@ from importlib import import_module as im
 from flask import Flask, request, render_template, Response, redirect, Blueprint, jsonify, session, send_from_directory, abort, g
 from pyqum.instrument.logger import address, get_status, set_status, set_mat, set_csv, clocker, mac_for_ip, lisqueue, lisjob, measurement, qout, jobsearch, get_json_measurementinfo, set_mat_analysis
 from pyqum.instrument.toolbox import cdatasearch, gotocdata, waveform
-from numpy import array, unwrap, mean, trunc, sqrt, zeros, ones, shape, arctan2, int64, isnan, abs, empty, ndarray, moveaxis, reshape, expand_dims, logical_and, nan, arange, exp, amax, amin, diag, concatenate, append
+from numpy import array, unwrap, mean, trunc, sqrt, zeros, ones, shape, arctan2, int64, isnan, abs, empty, ndarray, moveaxis, reshape, expand_dims, logical_and, nan, arange, exp, amax, amin, diag, concatenate, append, ma
 
 
 # Json to Javascrpt
@@ -98,16 +98,10 @@ class ExtendMeasurement ():
 		'''
 
 	def _get_data_from_Measurement( self ):
-		writtensize = self.measurementObj.writtensize
-		pqfile = self.measurementObj.pqfile
-		datalocation = self.measurementObj.datalocation
-
-		with open(pqfile, 'rb') as datapie:
-			datapie.seek(datalocation+7)
-			pie = datapie.read(writtensize)
-			selectedata = list(struct.unpack('>' + 'd'*((writtensize)//8), pie))
+		# read-only memory-map of the data-section (see measurement.loadata)
+		self.measurementObj.loadata()
 			
-		return array(selectedata)
+		return self.measurementObj.selectedata
 
 	def _init_rawData( self, yAxisLen=0, xAxisLen=0 ):
 		self.rawData = {
@@ -138,9 +132,10 @@ class ExtendMeasurement ():
 		self.axisInd = axisInd.copy()
 
 
+		# N-dimensional view following C-Structure (datadensity last), unmeasured part of a partial run left as nan:
 		self.measurementObj.loadata()
-		data = self.measurementObj.selectedata
-		data = reshape( data, tuple(cShape) )
+		data = self.measurementObj.asarray( cShape[:-2] + [cShape[-2]*cShape[-1]] )
+		data = ma.filled( data, nan )
 		varsInd.append(1) # Temporary for connect with old data type
 
 		if self.yAxisKey == None:
@@ -5,8 +5,11 @@ from colorama import init, Back, Fore
 init(autoreset=True) #to convert termcolor to wins color
 
 from time import time
-from numpy import ones, convolve, log10, sqrt, arctan2, diff, array, unwrap, gradient, mean
+from os import environ, cpu_count
+from concurrent.futures import ThreadPoolExecutor
+from numpy import ones, convolve, log10, sqrt, arctan2, diff, array, unwrap, gradient, mean, asarray, arange, append, add, pad, unique, concatenate, linspace, cos, sin, pi, cumsum, zeros, may_share_memory
 from scipy.fftpack import rfft, rfftfreq, irfft
+from scipy.signal import butter, sosfilt
 from sklearn.preprocessing import minmax_scale
 import matplotlib.pyplot as plt
 
@@ -61,6 +64,32 @@ def IQAParray(datas, interlace=True):
 
 	return Idata, Qdata, Amp, Pha
 
+# Level-of-Detail for plotting
+def envelope_index(y, resolution):
+	'''
+	y: 1D-trace to be decimated into resolution//2 bins
+	output: sorted indexes of each bin's minimum & maximum (peaks & dips survive, unlike plain striding)
+	'''
+	y = asarray(y, dtype=float)
+	if len(y) <= resolution: return arange(len(y))
+	binsize = -(-len(y) // max(resolution//2, 1))
+	bins = pad(y, (0, -len(y) % binsize), mode='edge').reshape(-1, binsize)
+	offset = arange(0, bins.size, binsize)
+	index = concatenate((bins.argmin(axis=1) + offset, bins.argmax(axis=1) + offset, [0, len(y)-1]))
+	return unique(index.clip(0, len(y)-1))
+def block_mean(data, resolution):
+	'''
+	data: nd-array to be block-averaged along every axis down to at most <resolution> points
+	output: nd-array (the ragged last block is averaged over whatever it holds)
+	'''
+	data = asarray(data, dtype=float)
+	for axis, n in enumerate(data.shape):
+		if n <= resolution: continue
+		starts = arange(0, n, -(-n // resolution))
+		counts = diff(append(starts, n)).reshape([-1 if a==axis else 1 for a in range(data.ndim)])
+		data = add.reduceat(data, starts, axis=axis) / counts
+	return data
+
 # moving average
 def smooth(y, box_pts):
 	box = ones(box_pts)/box_pts
@@ -221,6 +250,95 @@ def pulse_baseband(method, trace_I, trace_Q, rotation_compensate_MHz, ifreqcorre
 	trace_I = processing_data.signal[0]
 	trace_Q = processing_data.signal[1]
 	return (trace_I, trace_Q)
+def pulse_baseband_batch(method, traces_I, traces_Q, rotation_compensate_MHz, ifreqcorrection_kHz, t0=0, dt=1):
+	'''
+	{pulse_baseband} on a whole block of records at once: traces_I, traces_Q of shape (records, samples)
+	dt: digitizer-resolution in ns
+	'''
+	traces_I, traces_Q = asarray(traces_I), asarray(traces_Q)
+	freq = rotation_compensate_MHz/1e3 + ifreqcorrection_kHz/1e6 # in GHz (ns timescale)
+	samples = traces_I.shape[-1]
+	t = linspace(t0, t0 + dt*samples, samples) # same time-axis as qspp's Signal_sampling
+	omega = 2*pi*freq
+	try:
+		if method == "dual_digital_homodyne":
+			# rotate the bias-free IQ of every record by the same matrix (ideal IQ-mixer, as in qspp)
+			I = traces_I - mean(traces_I, axis=-1, keepdims=True)
+			Q = traces_Q - mean(traces_Q, axis=-1, keepdims=True)
+			c, s = cos(omega*t), sin(omega*t)
+			I, Q = c*I + s*Q, c*Q - s*I
+			sos = butter(4, 0.05, 'low', analog=False, output='sos')
+			return (sosfilt(sos, I, axis=-1), sosfilt(sos, Q, axis=-1))
+		elif method in ("i_digital_homodyne", "q_digital_homodyne"):
+			trace = traces_I if method == "i_digital_homodyne" else traces_Q
+			# integrate over one IF-period by the difference of the running sums
+			period_datapoints = abs(int(1/freq/dt))
+			pad_width = [(0,0)] * (trace.ndim-1) + [(period_datapoints,0)]
+			integ_I = pad(cumsum(trace*cos(omega*t)*dt, axis=-1), pad_width)
+			integ_Q = pad(cumsum(trace*sin(omega*t)*dt, axis=-1), pad_width)
+			return ((integ_I[...,period_datapoints:] - integ_I[...,:-period_datapoints])*2*freq,
+					-(integ_Q[...,period_datapoints:] - integ_Q[...,:-period_datapoints])*2*freq)
+	except(ZeroDivisionError): pass
+	print(Fore.RED + "INVALID DH METHOD")
+	return (traces_I, traces_Q)
+
+# Multi-core DSP pipeline:
+DSP_WORKERS = int(environ.get('PYQUM_DSP_WORKERS', 0)) or cpu_count() # numpy's big ufuncs, FFTs & filters release the GIL, so plain threads do scale
+DSP_CHUNK = 1024 # records per chunk
+def dsp_pipeline(stages, data, chunk=DSP_CHUNK, workers=DSP_WORKERS, out=None):
+	'''
+	stages: list of {dsp_*} stages, each turning a tuple of (records, samples)-blocks into another tuple
+	data: tuple of (records, samples)-arrays (e.g. (I, Q)), cut along the records into chunks for the thread-pool
+	out: optional tuple of arrays to write the final blocks into (may overlap data: results still viewing the chunk are copied before anything is written)
+	output: tuple of arrays with the records stacked back in order
+	'''
+	data = tuple(asarray(x) for x in data)
+	records = len(data[0])
+	def process(start):
+		inputs = tuple(x[start:start+chunk] for x in data)
+		block = inputs
+		for stage in stages: block = stage(block)
+		if out is not None:
+			block = tuple(b.copy() if any(may_share_memory(b, x) for x in inputs) else b for b in block)
+			for o, b in zip(out, block): o[start:start+chunk] = b
+			return None # already in place
+		return block
+	with ThreadPoolExecutor(max_workers=max(1, min(workers, -(-records//chunk)))) as pool:
+		blocks = list(pool.map(process, range(0, records, chunk)))
+	if out is not None: return out
+	return tuple(concatenate(b) for b in zip(*blocks))
+def dsp_homodyne(method, rotation_compensate_MHz, ifreqcorrection_kHz, t0=0, dt=1):
+	'''(I, Q) -> (I, Q) by {pulse_baseband_batch}'''
+	return lambda block: pulse_baseband_batch(method, block[0], block[1], rotation_compensate_MHz, ifreqcorrection_kHz, t0=t0, dt=dt)
+def dsp_denoise(dx, noise_level, noise_filter=0.1):
+	'''every trace -> y_clean of {FFT_deNoise}'''
+	def stage(block):
+		cleaned = []
+		for y in block:
+			w = rfft(y, axis=-1)
+			spectrum = w**2
+			w[spectrum < (spectrum.max(axis=-1, keepdims=True)*noise_level*noise_filter)] = 0
+			cleaned.append(irfft(w, axis=-1))
+		return tuple(cleaned)
+	return stage
+def dsp_smooth(box_pts):
+	'''every trace -> moving average as {smooth} (zero beyond the edges), by running sums instead of convolution'''
+	back = (box_pts-1)//2
+	def stage(block):
+		smoothed = []
+		for y in block:
+			y = pad(asarray(y, dtype='float64'), [(0,0)]*(y.ndim-1) + [(box_pts-back, back)])
+			y = cumsum(y, axis=-1)
+			smoothed.append((y[...,box_pts:] - y[...,:-box_pts]) / box_pts)
+		return tuple(smoothed)
+	return stage
+def dsp_iqap(block):
+	'''(I, Q) -> (I, Q, Amp, Pha) as {IQAParray}'''
+	I, Q = block[0], block[1]
+	return (I, Q, 20*log10(sqrt(I**2 + Q**2)), arctan2(Q, I))
+def dsp_rowmean(block):
+	'''every trace -> its mean, the CPU's counterpart of booster's cuda_streamean'''
+	return tuple(mean(y, axis=-1) for y in block)
 
 # Fitting
 
@@ -238,3 +356,46 @@ def test():
 
 # test()
 
+def test_baseband_batch(records=64, samples=600, dt=2, rotation_compensate_MHz=-25, ifreqcorrection_kHz=3):
+	'''{pulse_baseband_batch} against the per-record {pulse_baseband} (qspp) on synthetic readout records, for every supported method'''
+	from numpy.random import standard_normal, random_sample
+	from numpy import allclose
+	t = arange(samples) * dt
+	phase = 2*pi*random_sample((records, 1)) # every record with its own phase, like the ground / excited shots
+	traces_I = cos(2*pi*0.05*t + phase) + 0.1*standard_normal((records, samples))
+	traces_Q = sin(2*pi*0.05*t + phase) + 0.1*standard_normal((records, samples))
+	for method in ("dual_digital_homodyne", "i_digital_homodyne", "q_digital_homodyne"):
+		looped = array([pulse_baseband(method, traces_I[r], traces_Q[r], rotation_compensate_MHz, ifreqcorrection_kHz, dt=dt) for r in range(records)])
+		batched = array(pulse_baseband_batch(method, traces_I, traces_Q, rotation_compensate_MHz, ifreqcorrection_kHz, dt=dt)).swapaxes(0,1)
+		assert allclose(batched, looped, rtol=1e-9, atol=1e-12), "%s: batch differs from per-record by %s" %(method, abs(batched - looped).max())
+		print(Fore.GREEN + "%s: %s records of %s samples agree" %(method, records, samples))
+	return
+
+# test_baseband_batch()
+
+def test_dsp_pipeline(records=100, samples=400, dt=2, chunk=16, workers=4):
+	'''every {dsp_*} stage through {dsp_pipeline} against its per-trace counterpart, on small chunks to exercise the thread-pool'''
+	from numpy.random import standard_normal
+	from numpy import allclose, float32
+	traces_I, traces_Q = standard_normal((records, samples)), standard_normal((records, samples))
+	run = lambda stages, data=(traces_I, traces_Q), **kwargs: dsp_pipeline(stages, data, chunk=chunk, workers=workers, **kwargs)
+	def check(name, piped, traced, tolerance=1e-12):
+		assert allclose(piped, traced, rtol=tolerance, atol=tolerance), "%s: pipeline differs by %s" %(name, abs(array(piped) - array(traced)).max())
+		print(Fore.GREEN + "%s: %s records of %s samples agree" %(name, records, samples))
+
+	for method in ("dual_digital_homodyne", "i_digital_homodyne", "q_digital_homodyne"):
+		check(method, run([dsp_homodyne(method, -25, 3, dt=dt)]), array([pulse_baseband(method, traces_I[r], traces_Q[r], -25, 3, dt=dt) for r in range(records)]).swapaxes(0,1))
+	check("smooth", run([dsp_smooth(7)]), [[smooth(y, 7) for y in traces] for traces in (traces_I, traces_Q)])
+	check("FFT_deNoise", run([dsp_denoise(dt, 0.3)]), [[FFT_deNoise(y, dt, 0.3)[3] for y in traces] for traces in (traces_I, traces_Q)])
+	check("IQAP", run([dsp_iqap]), array(IQAParray(array([traces_I.ravel(), traces_Q.ravel()]).T, interlace=False)).reshape(4, records, samples))
+	check("rowmean", run([dsp_rowmean]), [mean(traces, axis=1) for traces in (traces_I, traces_Q)])
+
+	# as in manipulate's one-shot readout: interleaved IQ of float32 records demodulated in place into I-trace followed by Q-trace
+	DATA = array([traces_I, traces_Q]).transpose(1,2,0).reshape(records, 2*samples).astype(float32)
+	looped = array([concatenate(pulse_baseband("dual_digital_homodyne", DATA[r,0::2], DATA[r,1::2], -25, 3, dt=dt)) for r in range(records)])
+	run([dsp_homodyne("dual_digital_homodyne", -25, 3, dt=dt)], (DATA[:,0::2], DATA[:,1::2]), out=(DATA[:,:samples], DATA[:,samples:]))
+	check("in-place homodyne", DATA, looped, tolerance=1e-5)
+	return
+
+# test_dsp_pipeline()
+
@@ -4,43 +4,47 @@ Aim to accelerate post processing of data
 PENDING: MAKE A CLASS TO ORGANIZE SUBROUTINES
 '''
 
-from numba import cuda, float32
+try: from numba import cuda, float32, njit, prange
+except(ImportError): cuda = njit = None # numba-less deployments still get the numpy fallback
 import numpy as np
 import math
 import time
 
+CUDA = cuda is not None and cuda.is_available() # otherwise cuda_streamean runs on the CPU cores
+
 #----------------------------------------------------------
 # cuda numba function
 # parameter of cuda threads
 TPB1, TPB2 = 1, 128 # 1, 1024
 
 # Average against y
-@cuda.jit
-def dat_mean(arr, cout, nx, ny):
-    # Allocating grids:
-    x, y = cuda.grid(2)
-    sa = cuda.shared.array(shape=(TPB1,TPB2), dtype=float32)
-    tx, ty = cuda.threadIdx.x, cuda.threadIdx.y # Thread block dimension
-
-    if x < nx and y < ny:
-
-        tmp, num = 0., 0
-        block_count = int(ny/TPB2)
-        for i in range(block_count):
-            sa[tx,ty]=arr[x,ty+i*TPB2]
-            cuda.syncthreads()
-
-            parallel_block_sweep = TPB2
-            # if ny%TPB2 and i==block_count-1: parallel_block_sweep = ny%TPB2 # cuda seems to stick strongly to block size
-            for j in range(parallel_block_sweep):
-                # tmp += math.sin(sa[tx,j])
-                tmp += sa[tx,j]
-                num += 1
-                
-            cuda.syncthreads()
-        cout[x]=float(tmp)/int(num)
-
-def cuda_streamean(dat_tmp, num_stream=1):
+if cuda is not None:
+    @cuda.jit
+    def dat_mean(arr, cout, nx, ny):
+        # Allocating grids:
+        x, y = cuda.grid(2)
+        sa = cuda.shared.array(shape=(TPB1,TPB2), dtype=float32)
+        tx, ty = cuda.threadIdx.x, cuda.threadIdx.y # Thread block dimension
+
+        if x < nx and y < ny:
+
+            tmp, num = 0., 0
+            block_count = int(ny/TPB2)
+            for i in range(block_count):
+                sa[tx,ty]=arr[x,ty+i*TPB2]
+                cuda.syncthreads()
+
+                parallel_block_sweep = TPB2
+                # if ny%TPB2 and i==block_count-1: parallel_block_sweep = ny%TPB2 # cuda seems to stick strongly to block size
+                for j in range(parallel_block_sweep):
+                    # tmp += math.sin(sa[tx,j])
+                    tmp += sa[tx,j]
+                    num += 1
+                    
+                cuda.syncthreads()
+            cout[x]=float(tmp)/int(num)
+
+def gpu_streamean(dat_tmp, num_stream=1):
     #----------------------------------------------------------
     nx = np.array(dat_tmp).shape[0] # 40000 # x-axis dimension
     ny = np.array(dat_tmp).shape[1] // TPB2 * TPB2 # 20000 # y-axis dimension (force into multiples of TPB2)
@@ -101,6 +105,27 @@ def cuda_streamean(dat_tmp, num_stream=1):
 
     return out
 
+#----------------------------------------------------------
+# cpu fallback: same signature & same result (float32 mean of each row over the first multiple of TPB2 columns)
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def row_mean(arr):
+        out = np.empty(arr.shape[0], dtype=np.float32)
+        for x in prange(arr.shape[0]):
+            tmp = 0.
+            for y in range(arr.shape[1]): tmp += arr[x,y]
+            out[x] = tmp / arr.shape[1]
+        return out
+
+def cpu_streamean(dat_tmp, num_stream=1):
+    '''num_stream: only kept for the signature of {gpu_streamean}'''
+    dat = np.asarray(dat_tmp)
+    ny = dat.shape[1] // TPB2 * TPB2 # same columns as the cuda kernel
+    if njit is None: return dat[:,:ny].mean(axis=1, dtype=np.float64).astype(np.float32)
+    return row_mean(np.ascontiguousarray(dat[:,:ny]))
+
+cuda_streamean = gpu_streamean if CUDA else cpu_streamean
+
 
 def test():
     nx, ny = 10, 200000
@@ -116,4 +141,23 @@ def test():
 
 # test()
 
+def benchmark(nx=4000, ny=20000, repeat=3):
+    '''compare the stream-mean kernels on synthetic data: python -m pyqum.instrument.booster'''
+    dat_tmp = np.random.rand(nx, ny).astype(np.float32)
+    reference = dat_tmp[:,:ny//TPB2*TPB2].mean(axis=1, dtype=np.float64)
+    kernels = dict(cpu=cpu_streamean)
+    if CUDA: kernels.update(gpu=gpu_streamean)
+    for name, kernel in kernels.items():
+        kernel(dat_tmp[:TPB2]) # warm-up (jit compilation)
+        timings = []
+        for i in range(repeat):
+            tStart = time.time()
+            out = kernel(dat_tmp)
+            timings.append(time.time() - tStart)
+        print("%s_streamean on %sx%s: best of %s -- dt %.4f sec, max deviation %.2e" %(name, nx, ny, repeat, min(timings), np.abs(out - reference).max()))
+    if not CUDA: print("(no CUDA device: cuda_streamean is cpu_streamean here)")
+
+if __name__ == "__main__":
+    benchmark()
+
 
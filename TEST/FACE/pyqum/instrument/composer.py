@@ -7,6 +7,7 @@ from copy import copy
 from math import trunc
 from numpy import linspace, power, exp, array, zeros, sin, cos, pi, where, ceil, clip
 from pyqum.instrument.logger import get_status
+from pyqum.instrument.toolbox import STAGES
 
 class pulser:
     '''
@@ -21,6 +22,7 @@ class pulser:
     music: pulse-sequence output (numpy array)
     NOTE: implement delay as one of the beats for the sake of simplicity, instead of seperated parameter. (Ex: to delay 100ns, write: "flat,100,0")
     '''
+    @STAGES.timed('pulser')
     def __init__(self, dt=0.8, clock_multiples=8, 
                 score='Gaussup/6,100,1; Flat,100,1; Gaussdn/6,100,1; Pause,300,1; Gaussup/6,100,1; Flat,100,1; Gaussdn/6,100,1;'):
         self.dt = dt
@@ -43,6 +45,7 @@ class pulser:
         elif "q" in self.mixer_module.lower(): self.IF_MHz_rotation = float(self.mixer_module.split('q')[1])
         else: self.IF_MHz_rotation = self.iffreq # uncalibrated pure case, generalised to support baseband case where IF=0
 
+    @STAGES.timed('pulser')
     def song(self):
         '''
         compose the song based on the score given:
@@ -4,13 +4,18 @@ from colorama import init, Fore, Back
 init(autoreset=True) #to convert termcolor to wins color
 
 from pathlib import Path
-from os import mkdir, listdir, stat, SEEK_END, walk
+from os import mkdir, listdir, stat, SEEK_END, walk, environ
 from os.path import exists, getsize, getmtime, join, isdir, getctime
 from datetime import datetime
 from time import time, sleep
-from contextlib import suppress
-from numpy import prod, mean, rad2deg, array, ndarray, float64
-import inspect, json, wrapt, struct, geocoder, ast, socket
+from contextlib import suppress, contextmanager
+from threading import Thread, Lock, Condition, local
+from collections import OrderedDict
+from queue import Queue, Empty
+from numpy import prod, mean, rad2deg, array, ndarray, float64, memmap, asarray, zeros, arange, ma, ix_, nan, isnan, allclose
+import inspect, json, wrapt, struct, geocoder, ast, socket, atexit
+try: import fcntl
+except(ImportError): import msvcrt; fcntl = None # Windows
 import netifaces as nif
 from pandas import DataFrame
 from tables import open_file, Filters, Float32Atom, Float64Atom, StringCol, IsDescription
@@ -22,8 +27,9 @@ from scipy.io import savemat, loadmat
 from zipfile import ZipFile
 
 from flask import session, g
-from pyqum import get_db, close_db
-from pyqum.instrument.toolbox import waveform, flatten
+from pyqum import get_db, db_transaction
+from pyqum.instrument.toolbox import waveform, flatten, STAGES
+from pyqum.instrument.simulator import simulate
 
 __author__ = "Teik-Hui Lee"
 __copyright__ = "Copyright 2019, The Pyqum Project"
@@ -43,6 +49,20 @@ SPECS_PATH = MAIN_PATH / "SPECS"
 
 ANALYSIS_PATH = PORTAL_PATH / "ANALYSIS"
 
+# .pyqum file-format:
+ACTS = b'\x02' + bytes("ACTS", 'utf-8') + b'\x03\x04' # header-data separator
+PYQUM_MAGIC = b'\x01' + bytes("PYQUM", 'utf-8') # versioned files (>=2) start with this preamble
+PYQUM_VERSION = 2
+PYQUM_PREAMBLE = struct.Struct('>6sHQQ') # magic, version, header-length, data-offset
+WRITER_FLUSH_BYTES = 1<<20 # flush data-writer's buffer to disk every 1MB
+WRITER_FLUSH_SECONDS = 1 # or every second, whichever comes first
+LOD_CACHE_SIZE = 64 # decimated plot-data kept in RAM (entries)
+PROGRESS_LOG_SECONDS = 10 # running job's progress is indexed into SQL at most this often
+LOCATION_TIMEOUT_SECONDS = 3 # geocoder's network lookup gives up after this (offline fallback)
+SCPI_BATCH_LENGTH = 512 # characters per batched SCPI message (instrument's input-buffer)
+STATUS_FLUSH_SECONDS = 0.5 # instrument-status changes are written behind onto INSTLOG this often (& other processes' looked for)
+QUEUE_RECHECK_SECONDS = 5 # running directive re-reads its queue at least this often (changes made by other processes)
+
 
 # Pending: extract MAC from IP?
 def mac_for_ip(ip):
@@ -70,14 +90,35 @@ def get_local_ip():
         s.close()
     return IP
 
+LOCATION = None # resolved once per process
 def location():
+    '''Where is this PYQUM? Resolved once per process & cached:
+        1. pinned by environment variable PYQUM_LOCATION if given
+        2. otherwise looked up by geocoder (network), falling back to local details when offline (not cached: looked up again next time)
+    '''
+    global LOCATION
+    if LOCATION is None:
+        if environ.get('PYQUM_LOCATION'): LOCATION = [environ['PYQUM_LOCATION']]
+        else:
+            place = lookup_location()
+            if place is None: return offline_location()
+            LOCATION = place
+    return list(LOCATION)
+def offline_location():
+    return [str({'Org': None, 'Location': [None, None], 'Host': socket.gethostname(), 'IP': [get_local_ip(), None], 'Coordinate': [None, None]})]
+def lookup_location():
+    '''None if the location service failed (geocoder reports timeouts / being offline by g.ok instead of raising)'''
     place = []
     # approximate radius of earth in km
     eaRth = 6373.0
     # acceptable distance error in km
     toleratekm = 0.00000001
     toleratedeg = rad2deg(toleratekm / eaRth)
-    g = geocoder.ip('me')
+    try: g = geocoder.ip('me', timeout=LOCATION_TIMEOUT_SECONDS)
+    except: g = None
+    if g is None or not g.ok:
+        print("Location service is offline (%s). Only local details are logged." %getattr(g, 'error', None))
+        return None
     gps = g.latlng #[latitude, longitude]
     try:
         if mean([abs(i-j) for i,j in zip(gps, [25.0478, 121.532])]) < toleratedeg:
@@ -113,36 +154,116 @@ def output_code(output):
         return "OFF"
 
 # log, get & set status for both machines & missions (instr = real OR virtual instruments like tasks)
+def statuspath(instr_name, label=1):
+    return Path(INSTR_PATH) / (instr_name + "_" + str(label) + "_status.pyqum")
 def loginstr(instr_name, label=1):
     '''[Existence, Assigned Path] = loginstr(Instrument's name, Instrument's index/queue)
     '''
-    pyqumfile = instr_name + "_" + str(label) + "_status.pyqum"
-    pqfile = Path(INSTR_PATH) / pyqumfile
+    pqfile = statuspath(instr_name, label)
     existence = exists(pqfile) and stat(pqfile).st_size > 0
     return existence, pqfile
+@contextmanager
+def filelock(pqfile):
+    '''Exclusive lock on <pqfile> shared by all processes (held on a side-file: <pqfile>.lock)'''
+    with open(str(pqfile) + ".lock", 'a') as lockfile:
+        if fcntl: fcntl.flock(lockfile, fcntl.LOCK_EX)
+        else: lockfile.seek(0); msvcrt.locking(lockfile.fileno(), msvcrt.LK_LOCK, 1)
+        try: yield
+        finally:
+            if fcntl: fcntl.flock(lockfile, fcntl.LOCK_UN)
+            else: lockfile.seek(0); msvcrt.locking(lockfile.fileno(), msvcrt.LK_UNLCK, 1)
+
+class statustore:
+    '''Process-wide store of instrument-status:\n
+        1. reads are served from memory, reloaded only when the file is changed by other process (mtime & size),
+           which is looked for at most every <flush_seconds>
+        2. writes update memory at once & are buffered, a background thread writes them behind every <flush_seconds> (and at exit):
+           the file is re-read under {filelock} & only the buffered keys are applied, so that no other process's change is lost
+    '''
+    def __init__(self, flush_seconds=STATUS_FLUSH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self.entries = {} # pqfile: [status, mtime, checked, text]
+        self.pending = {} # pqfile: buffered updates, not yet on disk
+        self.lock = Lock()
+        self.thread = None
+
+    def load(self, pqfile):
+        '''Pre-requisite: lock'''
+        entry = self.entries.get(pqfile)
+        if entry is not None and time() - entry[2] < self.flush_seconds: return entry
+        try: 
+            filestat = stat(pqfile)
+            mtime = (filestat.st_mtime_ns, filestat.st_size)
+        except(FileNotFoundError): mtime = None
+        if entry is None or entry[1] != mtime:
+            if mtime is None or not mtime[1]: status = None # No such Instrument
+            else:
+                with open(pqfile) as jfile: status = json.load(jfile) # in json format
+            if pqfile in self.pending: status = dict(status or {}, **self.pending[pqfile]) # ours are newer than the disk
+            entry = self.entries[pqfile] = [status, mtime, 0, None]
+        entry[2] = time()
+        return entry
+
+    def get(self, pqfile):
+        with self.lock:
+            entry = self.load(pqfile)
+            if entry[0] is None: return None
+            if entry[3] is None: entry[3] = json.dumps(entry[0])
+            return json.loads(entry[3]) # a private copy
+
+    def set(self, pqfile, info):
+        with self.lock:
+            info = json.loads(json.dumps(info)) # as it will be read back from the file
+            try: entry = self.load(pqfile)
+            except: entry = self.entries[pqfile] = [None, None, time(), None]
+            if entry[0] is None: entry[0] = {}
+            entry[0].update(info)
+            entry[3] = None
+            self.pending.setdefault(pqfile, {}).update(info)
+            if self.thread is None:
+                self.thread = Thread(target=self.run, name="statustore", daemon=True)
+                self.thread.start()
+        return
+
+    def run(self):
+        while True:
+            sleep(self.flush_seconds)
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            for pqfile, info in pending.items():
+                try:
+                    with filelock(pqfile):
+                        try:
+                            with open(pqfile) as jfile: status = json.load(jfile)
+                        except: status = None
+                        if status is None: status = {}
+                        status.update(info)
+                        with open(pqfile, 'w') as jfile:
+                            json.dump(status, jfile, indent=4)
+                        filestat = stat(pqfile)
+                    self.entries[pqfile] = [status, (filestat.st_mtime_ns, filestat.st_size), time(), None]
+                except Exception as err: print(Back.RED + "STATUS NOT SAVED INTO %s: %s" %(pqfile, err))
+        return
+
+STATUS = statustore()
+atexit.register(STATUS.flush)
+
 def get_status(instr_name, label=1):
-    '''Get Instrument Status from LOG
+    '''Get Instrument Status from LOG (served by STATUS)
     '''
     try:
-        instr_log = loginstr(instr_name, label)
-        if instr_log[0] == False:
-            instrument = None # No such Instrument
-        else:
-            with open(instr_log[1]) as jfile:
-                instrument = json.load(jfile) # in json format
+        instrument = STATUS.get(statuspath(instr_name, label))
     except: 
         instrument = {}
         print(Fore.RED + "get_status faced some issues")
     return instrument
 def set_status(instr_name, info, label=1):
-    '''Set Instrument Status for LOG
+    '''Set Instrument Status for LOG (written behind by STATUS)
     * <info> must be a DICT'''
-    instrument = get_status(instr_name, label)
-    if instrument is None:
-        instrument = {}
-    instrument.update(info)
-    with open(loginstr(instr_name, label)[1], 'w') as jfile:
-        json.dump(instrument, jfile, indent=4)
+    STATUS.set(statuspath(instr_name, label), info)
 
 # save data in csv for export and be used by clients:
 def set_csv(data_dict, filename):
@@ -200,12 +321,12 @@ class address:
         if self.mode=='DATABASE':
             db = get_db()
             self.rs = db.execute('SELECT m.address FROM machine m WHERE m.codename = ?',('%s_%s'%(instr_name,label),)).fetchone()[0]
-            close_db()
         elif self.mode=='TEST':
             try:
                 if label>1: self.rs = self.book[instr_name]["alternative"][label-2]
                 else: self.rs = self.book[instr_name]["resource"]
             except(KeyError): self.rs = None # checking if instrument in the book
+        self.rs = simulate(instr_name, label, self.rs) # SIM::<instr>::<label> if opted for simulation
         
         print('resource: %s' %self.rs)
         return self.rs
@@ -216,10 +337,9 @@ class address:
         connected: 0 or 1, codename = <instr>-<label/index> 
         '''
         if self.mode=='DATABASE':
-            db = get_db()
-            db.execute( 'UPDATE machine SET user_id = ?, connected = ? WHERE codename = ?', (session['user_id'], connected, codename,) )
-            db.commit()
-            close_db()
+            with db_transaction() as db:
+                db.execute( 'UPDATE machine SET user_id = ?, connected = ? WHERE codename = ?', (session['user_id'], connected, codename,) )
+            SCHEDULER.notify() # waiting jobs may proceed once instruments are freed
         elif self.mode=='TEST':
             print(Fore.RED + "REMINDER: MAKE SURE TO CLOSE CONNECTION UPON EXIT AND AVOID CONFLICT WITH ONLINE INSTRUMENTS")
         return
@@ -230,7 +350,6 @@ class address:
         print(Fore.CYAN + "instr_list: %s" %instr_list)
         for mach in flatten(instr_list):
             connection += int(db.execute('''SELECT connected FROM machine WHERE codename = ?''', (mach,) ).fetchone()['connected'])
-        close_db()
         return connection
 
 class specification:
@@ -254,6 +373,76 @@ def debug(mdlname, state=False):
         print(Back.RED + '%s: Debugging Mode' %debugger.replace('debug', ''))
     return eval(debugger)
 
+# SCPI Batching
+SCPI_BATCHES = local() # active batch per bench for each thread
+class scpibatch:
+    '''Batch the Set issued by @Attribute (translate_scpi) on one bench into a single round-trip:\n
+        with scpibatch(bench):
+            NA.ifbw(bench, action=['Set', 1000])
+            NA.power(bench, action=['Set', -10])
+            ans = NA.averag(bench)[1] # Get: the Sets queued so far go along with its query, answered at once
+        1. commands are rooted (:) and joined by ';' into one write (or one query, ending with the Get that needs the answer)
+        2. writes issued inside @Attribute itself must go through scpiwrite to keep their order
+        3. flushed on exit, by any Get, or whenever the message would exceed <maxlength> characters
+        4. status of the Gets is logged by set_status once per instrument on exit
+    '''
+    def __init__(self, bench, maxlength=SCPI_BATCH_LENGTH):
+        self.bench, self.maxlength = bench, maxlength
+        self.commands, self.length = [], 0
+        self.logs = {}
+
+    @staticmethod
+    def active(bench):
+        return getattr(SCPI_BATCHES, 'batches', {}).get(id(bench))
+
+    def __enter__(self):
+        batches = SCPI_BATCHES.__dict__.setdefault('batches', {})
+        self.outer = batches.get(id(self.bench))
+        if self.outer is None: batches[id(self.bench)] = self
+        return self.outer or self # nested batch on the same bench joins the outer one
+
+    def __exit__(self, *exc):
+        if self.outer is None:
+            del SCPI_BATCHES.batches[id(self.bench)]
+            self.flush()
+            for mdlname in self.logs: set_status(mdlname, self.logs[mdlname])
+        return False
+
+    def queue(self, command):
+        if command[0] not in ':*': command = ':' + command # rooted, since ';' keeps the previous header-path
+        if self.commands and self.length + len(command) + 1 > self.maxlength: self.flush()
+        self.commands.append(command)
+        self.length += len(command) + 1
+        return
+
+    def write(self, command):
+        self.queue(command)
+        return "Batched"
+
+    def query(self, command):
+        '''Send the queued commands with this query in one message (replies come from the queries only)'''
+        self.queue(command)
+        message = ";".join(self.commands)
+        self.commands, self.length = [], 0
+        return self.bench.query(message)
+
+    def log(self, mdlname, name, ans):
+        self.logs.setdefault(mdlname, {})[name] = ans
+        return
+
+    def flush(self):
+        if not self.commands: return
+        message = ";".join(self.commands)
+        self.commands, self.length = [], 0
+        with STAGES.stage('scpi'): self.bench.write(message)
+        return
+
+def scpiwrite(bench, command):
+    '''bench.write that joins the active scpibatch (if any) on <bench>, so that it keeps its place in line'''
+    batch = scpibatch.active(bench)
+    if batch is not None: return batch.write(command)
+    return bench.write(command)
+
 # SCPI Translator
 @wrapt.decorator
 def translate_scpi(Name, instance, a, b):
@@ -280,7 +469,8 @@ def translate_scpi(Name, instance, a, b):
                 command.append(parakeys[i] + "?" + getspecific[i])
 
             command = ':'.join(headers[:-1] + [";".join(command)])
-            paravalues = bench.query(command).split(';')
+            batch = scpibatch.active(bench)
+            with STAGES.stage('scpi'): paravalues = (bench if batch is None else batch).query(command).split(';')
             #just in case of the presence of query parameters, which is rare
             paravalues = [paravalues[i] + '(' + str(action[i+1]) + ')' for i in range(len(parakeys))]
             paravalues = [x.replace('()', '') for x in paravalues]
@@ -312,14 +502,19 @@ def translate_scpi(Name, instance, a, b):
                 command.append(parakeys[i] + " " + paravalues[i])
 
         command = ':'.join(headers[:-1] + [";".join(command)])
-        status = str(bench.write(command)) #PENDING: status code translation
+        batch = scpibatch.active(bench)
+        if batch is not None: status = batch.write(command)
+        else:
+            with STAGES.stage('scpi'): status = str(bench.write(command)) #PENDING: status code translation
         
     # formatting return answer
     ans = dict(zip([a.replace('*','') for a in parakeys], paravalues))
 
     # Logging answer
     if 'Get' in action[0]: # No logging for "Set"
-        set_status(mdlname, {Name.__name__ : ans})
+        batch = scpibatch.active(bench)
+        if batch is not None: batch.log(mdlname, Name.__name__, ans) # logged once on exit
+        else: set_status(mdlname, {Name.__name__ : ans})
 
     # debugging
     if eval(debugger):
@@ -332,7 +527,127 @@ def translate_scpi(Name, instance, a, b):
 
     return status, ans
 
+# Data-Logging
+class datawriter:
+    '''Buffered background writer for measurement data:\n
+        1. pqfile stays open (append) for the whole run
+        2. data is packed into big-endian float64 by numpy on the caller's side
+        3. disk I/O runs on a background thread, flushed every <flush_bytes> or <flush_seconds>
+    '''
+    def __init__(self, pqfile, flush_bytes=WRITER_FLUSH_BYTES, flush_seconds=WRITER_FLUSH_SECONDS):
+        self.pqfile = pqfile
+        self.flush_bytes, self.flush_seconds = flush_bytes, flush_seconds
+        self.error = None
+        self.datapie = open(pqfile, 'ab')
+        self.queue = Queue()
+        self.thread = Thread(target=self.run, name="datawriter(%s)" %Path(pqfile).name, daemon=True)
+        self.thread.start()
+
+    def write(self, data):
+        '''data: list / array / number'''
+        if self.error: raise self.error
+        self.queue.put(asarray(data, dtype=float64).astype('>f8').tobytes())
+        return
+
+    def run(self):
+        buffer, buffersize, lastflush = [], 0, time()
+        while True:
+            try: pie = self.queue.get(timeout=self.flush_seconds)
+            except(Empty): pie = b''
+            if pie is not None:
+                buffer.append(pie)
+                buffersize += len(pie)
+            if buffer and (pie is None or buffersize >= self.flush_bytes or time()-lastflush >= self.flush_seconds):
+                try:
+                    self.datapie.write(b''.join(buffer))
+                    self.datapie.flush()
+                except Exception as err: 
+                    self.error = err
+                    print(Back.RED + "DATA-WRITER ERROR: %s" %err)
+                buffer, buffersize, lastflush = [], 0, time()
+            if pie is None: break
+        return
+
+    def close(self):
+        '''flush whatever is left & close the file'''
+        self.queue.put(None)
+        self.thread.join()
+        self.datapie.close()
+        if self.error: raise self.error
+        return
+
+class lodcache:
+    '''Level-of-Detail cache for decimated plot-data:\n
+        1. keyed by (pqfile, slice, resolution)
+        2. each entry is stamped with the file-size it was built from
+        3. invalidated per file by insertdata, least-recently-used evicted beyond <maxsize>
+    '''
+    def __init__(self, maxsize=LOD_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, pqfile, slicekey, resolution, filesize):
+        key = (str(pqfile), slicekey, resolution)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None: return None
+            if entry[0] != filesize:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, pqfile, slicekey, resolution, filesize, value):
+        key = (str(pqfile), slicekey, resolution)
+        with self.lock:
+            self.entries[key] = (filesize, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize: self.entries.popitem(last=False)
+        return
+
+    def invalidate(self, pqfile):
+        pqfile = str(pqfile)
+        with self.lock:
+            for key in [k for k in self.entries if k[0]==pqfile]: del self.entries[key]
+        return
+
+LOD = lodcache()
+
 # Execution
+class partialdata:
+    '''C-Structure view of a partially completed run (given by measurement.asarray):\n
+        1. only the written prefix of the data is mapped, nothing of the planned size is allocated
+        2. slicing (by ints & slices) gathers just the selected entries, those beyond the written extent come out masked (as 0)
+        3. converting to a full array (filled / numpy.asarray / ma.filled) gives nan (or <fill_value>) for the unwritten entries
+    '''
+    def __init__(self, data, shape):
+        self.data, self.shape = data, tuple(int(x) for x in shape)
+        self.ndim = len(self.shape)
+    def __len__(self):
+        return self.shape[0]
+    def reshape(self, shape):
+        return partialdata(self.data, shape)
+    def __getitem__(self, key):
+        if not isinstance(key, tuple): key = (key,)
+        key = key + (slice(None),) * (self.ndim - len(key))
+        flat, axes = 0, []
+        for i, (n, k) in enumerate(zip(self.shape, key)):
+            stride = int(prod(self.shape[i+1:], dtype='uint64'))
+            if isinstance(k, slice): axes.append(arange(n)[k] * stride)
+            else: flat += int(arange(n)[k]) * stride # raises IndexError just like ndarray
+        for x in ix_(*axes): flat = flat + x
+        flat = asarray(flat)
+        written = flat < len(self.data)
+        values = zeros(flat.shape)
+        values[written] = self.data[flat[written]]
+        return ma.masked_array(values, mask=(ma.nomask if written.all() else ~written))
+    def filled(self, fill_value=nan):
+        return self[()].filled(fill_value)
+    def __array__(self, dtype=None, copy=None):
+        data = self.filled()
+        return data if dtype is None else data.astype(dtype)
+
 class measurement:
     '''Initialize Measurement:\n
         1. Assembly Path based on Mission
@@ -403,7 +718,10 @@ class measurement:
 
                 # assembly the file-header(time, place, c-parameters):
                 usr_bag = bytes('{"%s": {"place": "%s", "data-density": %s, "c-order": %s, "perimeter": %s, "instrument": %s, "comment": "%s", "tag": "%s"}}' %(self.moment, self.place, self.datadensity, self.corder, self.perimeter, self.instr, self.comment, self.tag), 'utf-8')
-                usr_bag += b'\x02' + bytes("ACTS", 'utf-8') + b'\x03\x04' # ACTS
+                # preamble: header-length & data-offset are known up front, no scanning needed when accessing later:
+                headerlength = len(usr_bag)
+                usr_bag = PYQUM_PREAMBLE.pack(PYQUM_MAGIC, PYQUM_VERSION, headerlength, PYQUM_PREAMBLE.size + headerlength + len(ACTS)) + usr_bag
+                usr_bag += ACTS
                 
                 # check if the file exists and not blank:
                 existence = exists(self.pqfile) and stat(self.pqfile).st_size > 0 #The beauty of Python: if first item is false, second item will not be evaluated in AND-statement, thus avoiding errors
@@ -463,13 +781,37 @@ class measurement:
             Pre-requisite: selectday, selectmoment
         '''     
         with open(self.pqfile, 'rb') as datapie:
-            datapie.seek(2)
+            headerstart = self.readpreamble(datapie)[0]
+            datapie.seek(headerstart + 2)
             bite = datapie.read(5)
             startime = bite.decode('utf-8')
         
         print("Measurement started at %s" %(startime))
         return startime
 
+    def readpreamble(self, datapie, chunk=1<<20):
+        '''Locate header & data from an opened pqfile\n
+            return: (header-start, header-length, ACTS-location)\n
+            version >= 2: read from preamble;
+            legacy (no preamble): buffered find of ACTS, chunk by chunk.
+        '''
+        datapie.seek(0)
+        preamble = datapie.read(PYQUM_PREAMBLE.size)
+        if preamble[:len(PYQUM_MAGIC)] == PYQUM_MAGIC:
+            magic, self.version, headerlength, dataoffset = PYQUM_PREAMBLE.unpack(preamble)
+            return PYQUM_PREAMBLE.size, headerlength, dataoffset - len(ACTS)
+        
+        self.version = 1
+        datapie.seek(0)
+        buffer, offset = b'', 0
+        while True:
+            piece = datapie.read(chunk)
+            if not piece: raise ValueError("ACTS NOT FOUND IN %s" %self.pqfile)
+            buffer += piece
+            location = buffer.find(ACTS, max(0, offset-len(ACTS)+1))
+            if location >= 0: return 0, location, location
+            offset = len(buffer)
+
     def accesstructure(self):
         '''Get User-Data's container & location from LOG
             Pre-requisite: pqfile (from selectmoment / selectday)
@@ -477,16 +819,9 @@ class measurement:
         try:
             self.filesize = stat(self.pqfile).st_size
             with open(self.pqfile, 'rb') as datapie:
-                i = 0
-                while i < (self.filesize):
-                    datapie.seek(i)
-                    bite = datapie.read(7)
-                    if bite == b'\x02' + bytes("ACTS", 'utf-8') + b'\x03\x04': # ACTS
-                        self.datalocation = i
-                        break
-                    else: i += 1
-                datapie.seek(0)
-                bite = datapie.read(self.datalocation)
+                headerstart, headerlength, self.datalocation = self.readpreamble(datapie)
+                datapie.seek(headerstart)
+                bite = datapie.read(headerlength)
                 datacontainer = bite.decode('utf-8')
                         
             self.writtensize = self.filesize-self.datalocation-7           
@@ -543,25 +878,88 @@ class measurement:
         tStart = time()
         
         try:
-            with open(self.pqfile, 'rb') as datapie:
-                datapie.seek(self.datalocation+7)
-                pie = datapie.read(self.writtensize)
-                # self.selectedata = array(struct.unpack('>' + 'd'*((self.writtensize)//8), pie))
-                self.selectedata = ndarray(shape=(self.writtensize//8,), dtype=">d", buffer=pie) # speed up with numpy ndarray, with the ability to do indexing in it.
+            # self.selectedata = array(struct.unpack('>' + 'd'*((self.writtensize)//8), pie))
+            # zero-copy: map the data-section (right after ACTS) read-only, only the sliced pages will be read from disk:
+            if self.writtensize//8: self.selectedata = memmap(self.pqfile, dtype=">d", mode='r', offset=self.datalocation+7, shape=(self.writtensize//8,))
+            else: self.selectedata = ndarray(shape=(0,), dtype=">d") # empty file can't be mapped
         except:
             # raise
             print("\ndata not found")
         
         print(Back.GREEN + Fore.WHITE + "DATA loaded in %ss" %(time()-tStart))
 
+    def structure(self):
+        '''C-Structure of the data (in the convention of c_<task>_structure: last level includes data-density)
+            Pre-requisite: accesstructure
+        '''
+        if 'C-Structure' in self.corder:
+            corder = dict(self.corder)
+            keys = list(corder['C-Structure'])
+            if 'READOUTYPE' in self.perimeter.keys():
+                RJSON = loads(self.perimeter['R-JSON'].replace("'",'"'))
+                for k in RJSON.keys(): corder[k] = str(RJSON[k])
+                keys += [k for k in RJSON.keys()]
+                if self.perimeter['READOUTYPE'] == 'one-shot': buffercount = int(self.perimeter['RECORD-SUM'])
+                else:
+                    if 'TIME_RESOLUTION_NS' in self.perimeter.keys(): TIME_RESOLUTION_NS = int(self.perimeter['TIME_RESOLUTION_NS'])
+                    else: TIME_RESOLUTION_NS = 1 # backward-compatible with ALZDG's 1GSPS sampling-rate
+                    buffercount = int(self.perimeter['RECORD_TIME_NS']) // TIME_RESOLUTION_NS
+                counts = [waveform(corder[k]).count * waveform(corder[k]).inner_repeat for k in keys] + [buffercount]
+            else: counts = [waveform(corder[k]).count * waveform(corder[k]).inner_repeat for k in keys]
+        else: counts = [waveform(x).count * waveform(x).inner_repeat for x in self.corder.values()]
+        return counts[:-1] + [counts[-1]*self.iqdensity()]
+
+    def iqdensity(self):
+        '''data-density of the bottom-most level: IQ-pair for C-Structure version'''
+        if 'C-Structure' in self.corder: return 2
+        else: return self.datadensity
+
+    def asarray(self, structure=None):
+        '''N-dimensional view of the data:\n
+            structure: c_<task>_structure (default: derived from corder's C-Structure), whose last level includes data-density.\n
+            return: ndarray of axes [C-Structure..., data-density(IQ)], a zero-copy view on the memmap;
+                    partialdata over the written prefix if the run is partially completed (unmeasured entries masked when sliced).
+            Pre-requisite: accesstructure
+        '''
+        if structure is None: structure = self.structure()
+        datadensity = self.iqdensity()
+        shape = tuple(int(x) for x in structure[:-1]) + (int(structure[-1])//datadensity, datadensity)
+        total = int(prod(shape, dtype='uint64'))
+
+        if getattr(self, 'selectedata', None) is None: self.loadata()
+        data = self.selectedata
+        if len(data) >= total: return data[:total].reshape(shape)
+        
+        return partialdata(data, shape) # partially completed run
+
+    def unloadata(self):
+        '''Release the memory-map on the data-file (before truncating it)'''
+        with suppress(AttributeError): del self.selectedata
+        return
+
+    def openwriter(self, flush_bytes=WRITER_FLUSH_BYTES, flush_seconds=WRITER_FLUSH_SECONDS):
+        '''Keep pqfile open for the whole run, insertdata will then be buffered & written in the background
+            Pre-requisite: pqfile (from selectmoment / selectday)
+        '''
+        self.writer = datawriter(self.pqfile, flush_bytes, flush_seconds)
+        return
+
+    def closewriter(self):
+        '''Flush the remaining data & close pqfile'''
+        writer, self.writer = getattr(self, 'writer', None), None
+        if writer is not None: writer.close()
+        return
+
     def insertdata(self, data):
         '''Logging DATA from instruments on the fly:
             By appending individual data-point to the EOF (defined by SEEK_END)
         '''
-        # get data type:
-        if type(data) is list:
-            data = struct.pack(">" + "d"*len(data), *data)
-        else: data = struct.pack('>' + 'd', data) #f:32bit, d:64bit each floating-number
+        LOD.invalidate(self.pqfile) # decimated plot-data of this file is outdated
+        if getattr(self, 'writer', None) is not None:
+            self.writer.write(data)
+            return
+        # get data type: list or single number (f:32bit, d:64bit each floating-number)
+        data = asarray(data, dtype=float64).astype('>f8').tobytes()
         # inserting data:
         with open(self.pqfile, 'rb+') as datapie:
             datapie.seek(0, SEEK_END) #seek from end
@@ -579,9 +977,11 @@ class measurement:
         ieee_mismatch = self.writtensize%8
         print("IEEE-754(64bit) mismatch: %sbytes"%ieee_mismatch)
         if ieee_mismatch:
+            self.unloadata()
             with open(self.pqfile, 'rb+') as datapie:
                 datapie.seek(-ieee_mismatch, SEEK_END) #seek from end
                 datapie.truncate()
+            LOD.invalidate(self.pqfile)
             return "FILE IS REPAIRED"
         else: return "FILE IS GOOD"
 
@@ -590,8 +990,10 @@ class measurement:
             keepdata: the amount of data that you wanna save in sample#
             1 sample = 8 bytes
         '''
+        self.unloadata()
         with open(self.pqfile, 'rb+') as datapie:
             datapie.truncate(self.datalocation+7+keepdata*8)
+        LOD.invalidate(self.pqfile)
         return "FILE IS RESET"
         
     def searchcomment(self, wday, keyword): # still pending # might prefer SQL to handle this task
@@ -697,13 +1099,16 @@ def settings(datadensity=1):
                 # 2. Queue-IN and Wait for your turn:
                 M.status = qin(queue, JOBID)
                 while True:
-                    jobsinqueue(queue)
+                    seen = SCHEDULER.changes
+                    with STAGES.stage('queue'):
+                        jobsinqueue(queue)
+                        myturn = JOBID in g.jobidlist and g.jobidlist.index(JOBID)==0 and not address().macantouch(list(instr.values()))
                     # 2.1. Get out in the middle of waiting:
                     if JOBID not in g.jobidlist:
                         M.status = "M-JOB CANCELLED OR NOT QUEUED IN PROPERLY"
                         return M
                     # 2.2. It's your turn AND all relevant instruments are free:
-                    elif g.jobidlist.index(JOBID)==0 and not address().macantouch(list(instr.values())):
+                    elif myturn:
                         '''All of the following should be fulfilled before taking turn to run:
                             1. ONLY FIRST-IN-LINE get to break the waiting loop
                             2. ALL instruments required are disconnected
@@ -712,9 +1117,9 @@ def settings(datadensity=1):
                     # 2.3. Keep waiting behind:
                     else:
                         queue_behind = g.jobidlist.index(JOBID) + 1 # "extra +1" just in case of machine still being occupied
-                        waiting_interval = 3.17*queue_behind # adjust waiting time based on how far behind in queue
-                        sleep(waiting_interval)
-                        print(Fore.YELLOW + "JOBID #%s is waiting every %s seconds" %(JOBID,waiting_interval))
+                        waiting_interval = 3.17*queue_behind # adjust waiting time based on how far behind in queue (only for changes from other processes)
+                        print(Fore.YELLOW + "JOBID #%s is waiting for queue-changes (at most %s seconds)" %(JOBID,waiting_interval))
+                        SCHEDULER.wait(seen, waiting_interval)
 
                 # 3. Start RUNNING / WORKING / MEASUREMENT:
                 M.selectday(dayindex, corder, perimeter, instr, datadensity, comment, tag, JOBID)
@@ -722,12 +1127,23 @@ def settings(datadensity=1):
                 # print(Back.GREEN + "Day selected: %s"%self.day)
                 M.selectmoment(taskentry)
                 # print(Back.BLUE + "moment(file) selected: %s"%M.filename)
+                M.accesstructure() # progress baseline (including resumed data)
+                written, lastlog = M.writtensize, time()
+                progress = lambda: written / max(M.datasize*8, 1) * 100
+                M.openwriter()
                 try:
                     for i,x in enumerate(Generator): #yielding data from measurement-module
                         print('\n' + Fore.GREEN + 'Writing %s Data for Loop-%s' %(task,i))
-                        M.insertdata(x)
+                        with STAGES.stage('insertdata'): M.insertdata(x)
+                        written += asarray(x).size * 8
+                        if time() - lastlog >= PROGRESS_LOG_SECONDS:
+                            jobprogress(JOBID, progress())
+                            lastlog = time()
                         # sleep(3) #for debugging purposes
                 except(KeyboardInterrupt): print(Fore.RED + "\nSTOPPED")
+                finally: 
+                    M.closewriter()
+                    jobprogress(JOBID, progress())
                 M.status = "M-JOB COMPLETED SUCCESSFULLY"
 
             else: M.status = "M-JOB REJECTED: PLS CHECK M-CLEARANCE!"
@@ -759,7 +1175,6 @@ def lisjob(sample, queue, maxlist=12):
             ORDER BY j.id DESC
             ''', (queue, sample)
         ).fetchall()
-        close_db()
         Joblist = [dict(x) for x in Joblist]
         Job_count = len(Joblist) # total job(s) done on certain sample
         Joblist = Joblist[:min(maxlist, Job_count)] # limit the number of job listing
@@ -784,7 +1199,6 @@ def lisqueue(queue):
                 ORDER BY c.id ASC
                 ''' %(queue)
                 ).fetchall()
-            close_db()
             g.Queue = [dict(x) for x in g.Queue]
         
         except: raise
@@ -794,21 +1208,54 @@ def jobsinqueue(queue):
     if int(g.user['measurement']) > 0:
         db = get_db()
         g.jobidlist = db.execute("SELECT job_id FROM %s ORDER BY id"%queue).fetchall()
-        close_db()
         g.jobidlist = [dict(x)['job_id'] for x in g.jobidlist] # use to scheduling tasks in queue
         status = "JOBID-LIST in QUEUE has been extracted"
     else: status = "Measurement clearance was not found"
     return status
 
+class queuescheduler:
+    '''Event-driven queue-scheduling:\n
+        1. qin / qout / instrument (dis)connection notify() the jobs waiting in this process at once
+        2. waiting jobs block on a condition, with the old back-off as timeout to catch changes made by other processes
+        3. running directives ask allowed(), which re-reads the queue only after a change or every <recheck_seconds>
+    '''
+    def __init__(self, recheck_seconds=QUEUE_RECHECK_SECONDS):
+        self.recheck_seconds = recheck_seconds
+        self.condition = Condition()
+        self.changes = 0
+        self.checked = {} # queue: (changes, time, jobidlist)
+
+    def notify(self):
+        with self.condition:
+            self.changes += 1
+            self.condition.notify_all()
+        return
+
+    def wait(self, seen, timeout):
+        '''seen: <changes> taken BEFORE the queue was last checked (so that no change is missed)'''
+        with self.condition:
+            return self.condition.wait_for(lambda: self.changes != seen, timeout)
+
+    def allowed(self, queue, JOBID):
+        '''Am I (JOBID) still allowed to run? (g.jobidlist is kept up-to-date as jobsinqueue would)'''
+        with STAGES.stage('queue'):
+            changes, checked = self.changes, self.checked.get(queue)
+            if checked is None or checked[0] != changes or time() - checked[1] >= self.recheck_seconds:
+                jobsinqueue(queue)
+                self.checked[queue] = (changes, time(), list(g.jobidlist))
+            else: g.jobidlist = list(checked[2])
+            return JOBID in g.jobidlist
+
+SCHEDULER = queuescheduler()
+
 # QUEUE
 def qin(queue,jobid):
     '''Queue in with a Job'''
     if int(g.user['measurement']) > 0:
         try:
-            db = get_db()
-            db.execute('INSERT INTO %s (job_id) VALUES (%s)' %(queue,jobid)).lastrowid
-            db.commit()
-            close_db()
+            with db_transaction() as db:
+                db.execute('INSERT INTO %s (job_id) VALUES (?)' %queue, (jobid,)).lastrowid
+            SCHEDULER.notify()
             status = "Queued-in successfully with JOBID #%s" %jobid
         except:
             status = "Error Queueing in with JOBID #%s" %jobid
@@ -817,13 +1264,11 @@ def qin(queue,jobid):
 def qout(queue,jobid,username):
     '''Queue out without a Job'''
     jobrunner = get_db().execute('SELECT username FROM user u INNER JOIN job j ON j.user_id = u.id WHERE j.id = ?',(jobid,)).fetchone()['username']
-    close_db()
     if (int(g.user['measurement']) > 0) and (username==jobrunner):
         try:
-            db = get_db()
-            db.execute('DELETE FROM %s WHERE job_id = %s' %(queue,jobid))
-            db.commit()
-            close_db()
+            with db_transaction() as db:
+                db.execute('DELETE FROM %s WHERE job_id = ?' %queue, (jobid,))
+            SCHEDULER.notify() # wake the next-in-line & stop the running one
             status = "JOBID #%s Queued-out successfully" %jobid
         except:
             # raise
@@ -834,8 +1279,7 @@ def qid(queue,jobid):
     '''Get queue number'''
     try:
         db = get_db()
-        id = db.execute('SELECT id FROM %s WHERE job_id = %s' %(queue,jobid)).fetchone()['id']
-        close_db()
+        id = db.execute('SELECT id FROM %s WHERE job_id = ?' %queue, (jobid,)).fetchone()['id']
     except: id = None
     return id
 def check_sample_alignment(queue):
@@ -845,7 +1289,6 @@ def check_sample_alignment(queue):
     try: 
         db = get_db()
         assigned_sample = db.execute( '''SELECT samplename FROM queue WHERE system = ?''', (queue,) ).fetchone()['samplename'] # assigned sample by admin
-        close_db()
     except(TypeError): 
         assigned_sample = ''
     session['run_clearance'] = bool( assigned_sample==get_status("MSSN")[session['user_name']]['sample'] and int(g.user['measurement'])>0 )
@@ -855,7 +1298,6 @@ def which_queue_system(sample):
     try:
         db = get_db()
         system = db.execute( '''SELECT system FROM queue WHERE samplename = ?''', (sample,) ).fetchone()['system']
-        close_db()
     except(TypeError):
         system = "NULL"
     return system
@@ -865,19 +1307,15 @@ def jobin(task,corder,perimeter,instr,comment,tag):
     '''Register a JOB and get the ID for queue-in later while leaving day and task# blank first'''
     if g.user['measurement']:
         try:
-            db = get_db()
             samplename = get_status("MSSN")[session['user_name']]['sample']
             queue = get_status("MSSN")[session['user_name']]['queue']
-            sample_id = db.execute('SELECT s.id FROM sample s WHERE s.samplename = ?', (samplename,)).fetchone()[0]
-            cursor = db.execute('INSERT INTO job (user_id, sample_id, task, parameter, perimeter, instrument, comment, tag, queue) VALUES (?,?,?,?,?,?,?,?,?)', 
-                                        (g.user['id'],sample_id,task,str(corder),str(perimeter),str(instr),comment,tag,queue))
-            JOBID = cursor.lastrowid
-            db.commit() # to avoid database-lock in the event of pending write-changes
-            perimeter['jobid'] = JOBID
-            # sleep(0.317)
-            db.execute('UPDATE job SET perimeter = ? WHERE id = ?', (str(perimeter),JOBID))
-            db.commit()
-            close_db()
+            with db_transaction() as db: # register & stamp the JOBID in one go
+                sample_id = db.execute('SELECT s.id FROM sample s WHERE s.samplename = ?', (samplename,)).fetchone()[0]
+                cursor = db.execute('INSERT INTO job (user_id, sample_id, task, parameter, perimeter, instrument, comment, tag, queue) VALUES (?,?,?,?,?,?,?,?,?)', 
+                                            (g.user['id'],sample_id,task,str(corder),str(perimeter),str(instr),comment,tag,queue))
+                JOBID = cursor.lastrowid
+                perimeter['jobid'] = JOBID
+                db.execute('UPDATE job SET perimeter = ? WHERE id = ?', (str(perimeter),JOBID))
             print(Fore.GREEN + "Successfully register the data into SQL Database with JOBID: %s" %JOBID)
         except:
             # raise
@@ -890,24 +1328,32 @@ def jobstart(day,task_index,JOBID):
     '''Start a JOB by logging day and task#'''
     if g.user['measurement']:
         try:
-            db = get_db()
-            db.execute('UPDATE job SET dateday = ?, wmoment = ? WHERE id = ?', (day,task_index,JOBID))
-            db.commit()
-            close_db()
+            with db_transaction() as db:
+                db.execute('UPDATE job SET dateday = ?, wmoment = ? WHERE id = ?', (day,task_index,JOBID))
             print(Fore.GREEN + "Successfully update JOB#%s with (Day: %s, TASK#: %s)" %(JOBID,day,task_index))
         except:
             print(Fore.RED + Back.WHITE + "INVALID JOBID")
             raise
     else: pass
     return
+def jobprogress(JOBID, progress):
+    '''Index JOB's data-progress (%) into SQL so that job-listing needs no file access'''
+    try:
+        with db_transaction() as db:
+            db.execute('UPDATE job SET progress = ? WHERE id = ?', (progress,JOBID))
+    except: print(Fore.RED + Back.WHITE + "PROGRESS OF JOB#%s NOT INDEXED" %JOBID)
+    return
+def jobfilestamp(owner, sample, mission, day, task, entry):
+    '''(size, mtime) of a JOB's data-file without opening it (None if it is not there yet)'''
+    try: filestat = stat(Path(USR_PATH) / owner / sample / mission / str(day) / ("%s.pyqum(%s)" %(task, entry)))
+    except(OSError, TypeError): return None
+    return filestat.st_size, filestat.st_mtime_ns
 def jobnote(JOBID, note):
     '''Add NOTE to a JOB after analyzing the data'''
     if g.user['measurement']:
         try:
-            db = get_db()
-            db.execute('UPDATE job SET note = ? WHERE id = ?', (note,JOBID))
-            db.commit()
-            close_db()
+            with db_transaction() as db:
+                db.execute('UPDATE job SET note = ? WHERE id = ?', (note,JOBID))
             print(Fore.GREEN + "User %s has successfully updated JOB#%s with NOTE: %s" %(g.user['username'],JOBID,note))
         except:
             print(Fore.RED + Back.WHITE + "INVALID JOBID")
@@ -940,7 +1386,6 @@ def jobsearch(criteria, mode='jobid'):
     elif mode=='note':
         result = db.execute('SELECT j.note FROM job j WHERE j.id = ?', (criteria,)).fetchone()[0]
     else: result = None 
-    close_db()
     return result
 def jobtag(JOBID, tag, mode=0):
     '''
@@ -949,11 +1394,9 @@ def jobtag(JOBID, tag, mode=0):
     '''
     if g.user['measurement']:
         try:
-            db = get_db()
-            if int(mode): tag = db.execute('SELECT tag FROM job WHERE id = ?', (JOBID,)).fetchone()[0] + tag
-            db.execute('UPDATE job SET tag = ? WHERE id = ?', (tag,JOBID))
-            db.commit()
-            close_db()
+            with db_transaction() as db:
+                if int(mode): tag = db.execute('SELECT tag FROM job WHERE id = ?', (JOBID,)).fetchone()[0] + tag
+                db.execute('UPDATE job SET tag = ? WHERE id = ?', (tag,JOBID))
             action = ['replace', 'extend']
             print(Fore.GREEN + "User %s has successfully %s JOB#%s with tag: %s" %(g.user['username'],action[mode],JOBID,tag))
         except:
@@ -967,10 +1410,8 @@ def job_update_perimeter(JOBID, perimeter):
     '''
     if g.user['measurement']:
         try:
-            db = get_db()
-            db.execute('UPDATE job SET perimeter = ? WHERE id = ?', (str(perimeter),JOBID))
-            db.commit()
-            close_db()
+            with db_transaction() as db:
+                db.execute('UPDATE job SET perimeter = ? WHERE id = ?', (str(perimeter),JOBID))
             print(Fore.GREEN + "User %s has successfully updated JOB#%s's perimeter as: %s" %(g.user['username'],JOBID,perimeter))
         except:
             print(Fore.RED + Back.WHITE + "INVALID JOBID")
@@ -992,6 +1433,46 @@ def test():
     print(lisjob('Sam','characterize'))
 
     return
-    
+
+def test_partialdata(written=5):
+    '''half-written run: the unwritten tail must come out as nan (not 0) through ma.filled'''
+    from tempfile import TemporaryDirectory
+    with TemporaryDirectory() as tmp:
+        pqfile = join(tmp, 'half.pyqum')
+        values = (arange(written) + 1).astype('>d') # big-endian as in pqfile
+        values.tofile(pqfile)
+        M = measurement.__new__(measurement)
+        M.corder = {'C-Structure': ['Flux-Bias', 'Frequency']}
+        M.selectedata = memmap(pqfile, dtype=">d", mode='r', shape=(written,))
+        data = ma.filled(M.asarray([3, 2*2]), nan) # as in quantification
+        assert data.shape == (3, 2, 2)
+        assert allclose(data.reshape(-1)[:written], values)
+        assert isnan(data.reshape(-1)[written:]).all()
+        assert data.reshape(-1)[written:].size == 3*2*2 - written
+        del M.selectedata
+    print("partialdata: unwritten tail filled with nan")
+    return
+
+def test_statustore(sets=10):
+    '''consecutive set_status are coalesced into one file-write, merged with the other process's keys'''
+    from tempfile import TemporaryDirectory
+    with TemporaryDirectory() as tmp:
+        pqfile = join(tmp, 'TEST_1_status.pyqum')
+        store = statustore(flush_seconds=60) # no background flush during the test
+        for i in range(sets): store.set(pqfile, {'key%s'%i: i, 'last': i})
+        assert not exists(pqfile) # nothing written yet
+        assert store.get(pqfile)['last'] == sets-1
+        with open(pqfile, 'w') as jfile: json.dump({'other': 'process'}, jfile) # meanwhile, by other process
+        store.flush()
+        with open(pqfile) as jfile: status = json.load(jfile)
+        assert status['other'] == 'process' and status['last'] == sets-1 and len(status) == sets+2
+        written = stat(pqfile).st_mtime_ns
+        store.flush() # nothing pending: no write
+        assert stat(pqfile).st_mtime_ns == written
+    print("statustore: %s set(s) written once" %sets)
+    return
+
 # test()
+# test_partialdata()
+# test_statustore()
 
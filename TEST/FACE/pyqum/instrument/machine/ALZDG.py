@@ -7,14 +7,17 @@ mdlname = bs(__file__).split('.')[0] # module's name e.g. PSG
 
 # from __future__ import division
 import ctypes
-from numpy import array, zeros, ceil, empty, float32
+from numpy import array, zeros, ceil, empty, float32, float64, int16, uint16, int64, einsum, stack, bitwise_xor
 import os
 import signal
 import sys
 import time
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..', 'Library'))
-import atsapi as ats
+try: import atsapi as ats
+except(ImportError) as err: ats, ATS_MISSING = None, err # only simulated boards can be initiated without the ATS-SDK
+else: ATS_MISSING = None
+from pyqum.instrument.simulator import is_simulated, atsapi as simats
 
 from json import loads
 from pyqum.instrument.logger import address, set_status
@@ -60,9 +63,13 @@ ATS_Family = dict(
 
 def Initiate(which):
     ad = address()
-    rs = loads(ad.lookup(mdlname, label=int(which))) # Instrument's Address
+    rs = ad.lookup(mdlname, label=int(which)) # Instrument's Address
+    if ats is None and not is_simulated(rs): raise ImportError("ATS-SDK is needed for %s-%s: %s" %(mdlname, which, ATS_MISSING))
     try:
-        board = ats.Board(rs['systemId'],rs['boardId'])
+        if is_simulated(rs): board = simats.Board(1, int(which))
+        else:
+            rs = loads(rs)
+            board = ats.Board(rs['systemId'],rs['boardId'])
         set_status(mdlname, dict(state='connected'))
         print(Fore.GREEN + "%s's connection Initialized" % (mdlname))
         ad.update_machine(1, "%s_%s"%(mdlname,which)) # update SQL Database
@@ -76,6 +83,9 @@ def model(board):
     kind = board.getBoardKind()
     name = list(ATS_Family.keys())[list(ATS_Family.values()).index(int(kind))]
     return name
+def boardapi(board):
+    '''ATS-SDK to drive the board with: simulated boards bring their own'''
+    return getattr(board, 'api', ats)
 def sampling_rate(board="ALZDG"):
     '''
     Sampling rate of the Digitizer in "Sampling Per Second"
@@ -88,6 +98,7 @@ def ConfigureBoard(board, update_settings={}):
     '''
     Configure Board
     '''
+    ats = boardapi(board)
     settings=dict(triggerDelay_sec = 0*1e-9, samplesPerSec=sampling_rate()) # default settings
     settings.update(update_settings)
     triggerDelay_sec, samplesPerSec = settings['triggerDelay_sec'], settings['samplesPerSec']
@@ -138,6 +149,31 @@ def ConfigureBoard(board, update_settings={}):
     
     dt_ns = 1 / samplesPerSec / 1e-9 # in nano-second
     return dt_ns
+
+def codeconv(board, raw=False):
+    '''
+    volts = scale * (codes - zero)
+    raw: for the int16 codes returned by {AcquireData} in raw mode instead of the uint16 codes straight off the DMA buffers
+    '''
+    dRange = 0.4 # Dynamic Range of Digitizer (400mV)
+    boardmemory_samples, bitsPerSample = board.getChannelInfo()
+    # A 12-bit sample code is stored in the most significant bits of each 16-bit sample value.
+    codeZero = 2 ** (float(bitsPerSample.value) - 1) - 0.5 # Digital range in binary
+    scale, zero = dRange/codeZero/16., 16.*codeZero # range and zero for each channel, combined with bit shifting
+    if raw: zero -= 2**15 # int16 view = uint16 code - 32768
+    return scale, zero
+
+def tovolts(codes, board, raw=None):
+    '''
+    convert codes into float32 volts, best done after the records have been reduced
+    raw: whether the codes (or their mean) came from the int16 view, by default told from the dtype
+    '''
+    if raw is None: raw = (codes.dtype == int16)
+    scale, zero = codeconv(board, raw)
+    volts = codes.astype(float32)
+    volts -= zero
+    volts *= scale
+    return volts
     
 
 def AcquireData(board, recordtime, recordsum, update_settings={}):
@@ -147,20 +183,20 @@ def AcquireData(board, recordtime, recordsum, update_settings={}):
     recordtime (s): The duration of pulse response of interest (at least 9*128ns)
     recordsum: Total sum of records to be acquired for fidelity test or fast averaging
     OPT_DMA_Buffer_Size (MB): Optimal Buffer size for DMA transfer between CPU and the board PER Channel
+    average: accumulate the raw codes buffer by buffer and return only their mean, of shape [1, samples, channels]
+    squares: (with average) also accumulate the squared codes and return [mean, variance] of shape [2, samples, channels]
+    raw: (without average) return the int16 codes, at half the size of volts, to be converted later by {tovolts} or {codeconv}
     '''
-    settings=dict(OPT_DMA_Buffer_Size=32, dt=1/1000000000.0) # default settings
+    ats = boardapi(board)
+    settings=dict(OPT_DMA_Buffer_Size=32, dt=1/1000000000.0, average=False, squares=False, raw=False) # default settings
     settings.update(update_settings)
     OPT_DMA_Buffer_Size, dt = settings['OPT_DMA_Buffer_Size'], settings['dt']
+    average, squares = bool(settings['average']), bool(settings['average'] and settings['squares'])
 
     # CONSTANTS:
     preTriggerSamples = 0 # No pre-trigger samples in NPT mode
-    dRange = 0.4 # Dynamic Range of Digitizer (400mV)
     boardmemory_samples, bitsPerSample = board.getChannelInfo() # Get board's spec of memory and sample size 
-    # A 12-bit sample code is stored in the most significant bits of each 16-bit sample value.
-    codeRange = 2 ** (float(bitsPerSample.value) - 1) - 0.5 # Digital range in binary
-    rangeconv = dRange/codeRange/16. # range and zero for each channel, combined with bit shifting
-    codeZero = 2 ** (float(bitsPerSample.value) - 1) - 0.5
-    offset = 16.*codeZero # Digital offset in binary
+    rangeconv, offset = codeconv(board) # Digital range & offset in binary
     MEM_SIZE = int(128 * 1024*1024*1024) # RAM MEMORY SIZE (<160GB)
     bytesPerBuffer_MAX = min(OPT_DMA_Buffer_Size *1024*1024, boardmemory_samples.value/2) # 16MB / channel # Note: DMA buffer is limited by ~20% of Total On-Board 8G memory, and yet the best performance lies between 16-32MB!
 
@@ -177,6 +213,7 @@ def AcquireData(board, recordtime, recordsum, update_settings={}):
     postTriggerSamples = recordtime / dt
     postTriggerSamples = int(ceil(postTriggerSamples / 128.)*128) # force it into multiples of 128
     bytesPerSample = (bitsPerSample.value + 7) // 8
+    raw = bool(settings['raw'] and not average and bytesPerSample == 2)
     samplesPerRecord = preTriggerSamples + postTriggerSamples
     bytesPerRecord = bytesPerSample * samplesPerRecord
     # Optimize records/buffer:
@@ -236,7 +273,11 @@ def AcquireData(board, recordtime, recordsum, update_settings={}):
         #
         # Samples are arranged in the buffer as follows: S0A, S0B, ..., S1A, S1B, ... with SXY the sample number X of channel Y.
         # Preparing data basket:
-        data_V = zeros([recordsPerBuffer*buffersPerAcquisition, postTriggerSamples, channelCount], dtype=float32) # use 32-Bit to support Quadro-GPU calculation
+        if average: # running sums stay at the size of one record no matter how many records are taken
+            codesum = zeros([postTriggerSamples, channelCount], dtype=int64)
+            if squares: codesquare = zeros([postTriggerSamples, channelCount], dtype=int64)
+        elif raw: data_V = empty([recordsPerBuffer*buffersPerAcquisition, postTriggerSamples, channelCount], dtype=int16)
+        else: data_V = zeros([recordsPerBuffer*buffersPerAcquisition, postTriggerSamples, channelCount], dtype=float32) # use 32-Bit to support Quadro-GPU calculation
 
         # Collecting buffers:
         while (buffersCompleted < buffersPerAcquisition and not ats.enter_pressed()):
@@ -249,9 +290,15 @@ def AcquireData(board, recordtime, recordsum, update_settings={}):
             # TODO: Process sample data in this buffer. Data is available
             # as a NumPy array at buffer.buffer
             data_binary = buffer.buffer.reshape(recordsPerBuffer, postTriggerSamples, channelCount)
-            data_binary = rangeconv * (data_binary - offset)
-            # print("Buffer of shape %s: %s" %(data_binary.shape, data_binary))
-            data_V[(buffersCompleted - 1)*recordsPerBuffer:(buffersCompleted)*recordsPerBuffer, :, :] = data_binary
+            if average: # integer sums are exact, conversion to volts is left until the end
+                codesum += data_binary.sum(axis=0, dtype=int64)
+                if squares: codesquare += einsum('rsc,rsc->sc', data_binary, data_binary, dtype=int64)
+            elif raw: # flipping the sign-bit turns the unsigned codes into their int16 view in one pass
+                bitwise_xor(data_binary, 0x8000, out=data_V[(buffersCompleted - 1)*recordsPerBuffer:(buffersCompleted)*recordsPerBuffer].view(uint16))
+            else:
+                data_binary = rangeconv * (data_binary - offset)
+                # print("Buffer of shape %s: %s" %(data_binary.shape, data_binary))
+                data_V[(buffersCompleted - 1)*recordsPerBuffer:(buffersCompleted)*recordsPerBuffer, :, :] = data_binary
             # print("Data of shape %s: %s" %(data_V.shape, data_V))
 
             # Add the buffer to the end of the list of available buffers.
@@ -272,6 +319,13 @@ def AcquireData(board, recordtime, recordsum, update_settings={}):
     # print("Captured %d records (%f records per sec)" %(recordsPerBuffer * buffersCompleted, recordsPerSec))
     # print("Transferred %d bytes (%f bytes per sec)" %(bytesTransferred, bytesPerSec))
 
+    if average:
+        recordsCompleted = max(1, recordsPerBuffer * buffersCompleted)
+        codemean = codesum / float64(recordsCompleted)
+        data_V = [rangeconv * (codemean - offset)]
+        if squares: data_V.append(rangeconv**2 * (codesquare / float64(recordsCompleted) - codemean**2))
+        data_V = stack(data_V).astype(float32)
+
     return data_V, transferTime_sec, recordsPerBuffer, buffersPerAcquisition
 
 def close(board, which): # PENDING: Clear Memory thoroughly
@@ -7,10 +7,10 @@ from os.path import basename as bs
 mdlname = bs(__file__).split('.')[0] # instrument-module's name e.g. ENA, PSG, YOKO
 
 import matplotlib.pyplot as plt
-from numpy import arange, floor, ceil, array
+from numpy import arange, floor, ceil, array, ndarray
 
-import pyvisa as visa
-from pyqum.instrument.logger import address, set_status, status_code, debug
+from pyqum.instrument.simulator import resourcemanager
+from pyqum.instrument.logger import address, set_status, status_code, debug, scpiwrite
 from pyqum.instrument.logger import translate_scpi as Attribute
 
 debugger = debug(mdlname)
@@ -19,7 +19,7 @@ debugger = debug(mdlname)
 def Initiate(reset=False, which=1, MaxChannel=1, mode='DATABASE'):
 	ad = address(mode)
 	rs = ad.lookup(mdlname, which) # Instrument's Address
-	rm = visa.ResourceManager()
+	rm = resourcemanager(rs) # simulated for SIM::<instr>::<label>
 	try:
 		bench = rm.open_resource(rs) #establishing connection using GPIB# with the machine
 		if reset:
@@ -61,13 +61,13 @@ def sweep(bench, action=['Get'] + 10 * ['']):
 	'''
 	print(Fore.GREEN + "action: %s" %action)
 	if action[1] in ['ON', 'TRUE', 'True']:
-		bench.write('SENSe:SWEep:TIME:AUTO ON')
+		scpiwrite(bench, 'SENSe:SWEep:TIME:AUTO ON')
 		action.remove(action[1])
 		SCPIcore = 'SENSe:SWEep:POINTS'
 	elif action[1].split(' ')[0] in ['OFF', 'FALSE', 'False', '']: # Get is here
 		try:
 			action[1] = action[1].split(' ')[1]
-			bench.write('SENSe:SWEep:TIME:AUTO OFF')
+			scpiwrite(bench, 'SENSe:SWEep:TIME:AUTO OFF')
 		except IndexError: pass
 		SCPIcore = 'SENSe:SWEep:TIME;POINTS'
 	else: print(Fore.RED + "Parameter NOT VALID!")
@@ -75,7 +75,7 @@ def sweep(bench, action=['Get'] + 10 * ['']):
 @Attribute
 def linfreq(bench, action=['Get'] + 10 * ['']):
 	'''action=['Get/Set', <start(Hz)>, <stop(Hz)>]'''
-	bench.write("SENS:SWE:TYPE LINEAR") #by default: Freq Sweep
+	scpiwrite(bench, "SENS:SWE:TYPE LINEAR") #by default: Freq Sweep
 	SCPIcore = 'SENS:FREQuency:START;STOP'
 	return mdlname, bench, SCPIcore, action
 @Attribute
@@ -98,7 +98,7 @@ def cwfreq(bench, action=['Get'] + 10 * ['']):
 	Sets the Continuous Wave (or Fixed) frequency. 
 	Must also send SENS:SWEEP:TYPE CW to put the analyzer into CW sweep mode.
 	'''
-	bench.write("SENS:SWE:TYPE POWER") #Power Sweep
+	scpiwrite(bench, "SENS:SWE:TYPE POWER") #Power Sweep
 	SCPIcore = 'SENSe:FREQuency:CW'
 	return mdlname, bench, SCPIcore, action
 @Attribute
@@ -106,16 +106,20 @@ def averag(bench, action=['Get'] + 10 * ['']):
 	'''action=['Get/Set', <points>]
 	Sets the number of measurements to combine for an average.
 	'''
-	bench.write("SENSe:AVER ON") # OFF by default
-	bench.write("SENSe:AVER:CLE")
+	scpiwrite(bench, "SENSe:AVER ON") # OFF by default
+	scpiwrite(bench, "SENSe:AVER:CLE")
 	SCPIcore = 'SENSe:AVER:COUNT'
 	return mdlname, bench, SCPIcore, action
+DATAFORM = {} # FORMat:DATA of each bench (session), asked once & forgotten whenever it is set
 @Attribute
 def dataform(bench, action=['Get'] + 10 * ['']):
-	'''action=['Get/Set', <format: REAL32/REAL/ASCii>]
+	'''action=['Get/Set', <format: REAL32 (or REAL,32)/REAL/ASCii>]
 	Sets the data format for data transfers.
-	Usually only the last two are preferred.
+	REAL32 halves the payload of REAL (64-bit) at no loss in precision worth the name.
 	'''
+	if 'Set' in action[0]:
+		if str(action[1]).replace(' ','').upper() == 'REAL,32': action[1] = 'REAL32' # PNA-style alias (as in ENAB)
+		DATAFORM.pop(bench, None)
 	SCPIcore = 'FORMat:DATA'
 	return mdlname, bench, SCPIcore, action
 
@@ -184,23 +188,26 @@ def scanning(bench, scan=1):
 		stat = bench.write(':ABOR;:INIT:CONT OFF;')
 	return stat
 
-def sdata(bench):
-	'''Collect complex-data from ENA
+def sarray(bench):
+	'''Collect complex-data from ENA as numpy-array (interleaved real & imaginary)
 	This command sets/gets the corrected data array, for the active trace of selected channel (Ch).
 	'''
 	sdatacore = ":CALC:SEL:DATA:SDAT?"
-	stat = dataform(bench)
-	if stat[1]['DATA'] == 'REAL32': #PENDING: testing REAL (32-bit)
-		#convert the transferred ieee-encoded binaries into list (faster)
-		datas = bench.query_binary_values(sdatacore, datatype='f', is_big_endian=True)
-	elif stat[1]['DATA'] == 'REAL': #PENDING: testing REAL (64-bit)
-		#convert the transferred ieee-encoded binaries into list (faster)
-		datas = bench.query_binary_values(sdatacore, datatype='d', is_big_endian=True)
-	elif stat[1]['DATA'] == 'ASC':
+	if bench not in DATAFORM: DATAFORM[bench] = dataform(bench)[1]['DATA']
+	if DATAFORM[bench] == 'REAL32':
+		#convert the transferred ieee-encoded binaries straight into numpy-array (fastest)
+		datas = bench.query_binary_values(sdatacore, datatype='f', is_big_endian=True, container=array)
+	elif DATAFORM[bench] == 'REAL':
+		#convert the transferred ieee-encoded binaries straight into numpy-array (faster)
+		datas = bench.query_binary_values(sdatacore, datatype='d', is_big_endian=True, container=array)
+	elif DATAFORM[bench] == 'ASC':
 		#convert the transferred ascii-encoded binaries into list (slower)
-		datas = bench.query_ascii_values(sdatacore)
+		datas = array(bench.query_ascii_values(sdatacore))
 	# print(Back.GREEN + Fore.WHITE + "transferred from %s: ALL-SData: %s" %(mdlname, len(datas)))
 	return datas
+def sdata(bench):
+	'''Collect complex-data from ENA as list (see sarray)'''
+	return sarray(bench).tolist()
 
 def preset(bench):
 	stat = bench.write(':SYSTem:PRESet')
@@ -211,6 +218,7 @@ def close(bench, reset=True, which=1, mode='DATABASE'):
 		bench.write(':OUTPut:STATe OFF')
 		set_status(mdlname, dict(config='reset-off'))
 	else: set_status(mdlname, dict(config='previous'))
+	DATAFORM.pop(bench, None)
 	try:
 		bench.close() #None means Success?
 		status = "Success"
@@ -265,7 +273,7 @@ def test(detail=True):
 			print("Ready: %s" %bool(measure(bench)))
 			autoscal(bench)
 
-			dataform(bench, action=['Set', 'REAL'])
+			dataform(bench, action=['Set', 'REAL32'])
 			data = sdata(bench)
 			print("Data [Type: %s, Length: %s]" %(type(data), len(data)))
 
@@ -284,4 +292,23 @@ def test(detail=True):
 	return
 
 
+def test_sdata(points=101):
+	'''sdata (list) & sarray (numpy-array) on the simulated ENA, in the shape their callers take them'''
+	from pyqum.instrument.simulator import simena
+	from pyqum.instrument.analyzer import IQAParray
+	bench = simena(mdlname)
+	sweep(bench, action=['Set', 'ON', points])
+	for form in ['ASC', 'REAL', 'REAL32']:
+		dataform(bench, action=['Set', form])
+		datas = sdata(bench)
+		assert type(datas) is list and len(datas) == 2*points
+		assert len(datas + sdata(bench)) == 4*points # list-concatenation, not element-wise addition
+		trace = sarray(bench)
+		assert type(trace) is ndarray and trace.shape == (2*points,)
+		yI, yQ, Amp, Pha = IQAParray(trace) # as machine's NA-page & characterize's logging take it
+		assert len(Amp) == points
+	print("sdata & sarray: %s points in %s" %(points, ['ASC', 'REAL', 'REAL32']))
+	return
+
 # test()
+# test_sdata()
@@ -14,7 +14,7 @@ import matplotlib.pyplot as plt
 from numpy import arange, floor, ceil, array
 
 import pyvisa as visa
-from pyqum.instrument.logger import address, set_status, status_code, debug
+from pyqum.instrument.logger import address, set_status, status_code, debug, scpiwrite
 from pyqum.instrument.logger import translate_scpi as Attribute
 
 debugger = debug(mdlname)
@@ -64,13 +64,13 @@ def sweep(bench, action=['Get'] + 10 * ['']):
 	'''
 	print(Fore.GREEN + "action: %s" %action)
 	if action[1] in ['ON', 'TRUE', 'True']:
-		bench.write('SENSe:SWEep:TIME:AUTO ON')
+		scpiwrite(bench, 'SENSe:SWEep:TIME:AUTO ON')
 		action.remove(action[1])
 		SCPIcore = 'SENSe:SWEep:POINTS'
 	elif action[1].split(' ')[0] in ['OFF', 'FALSE', 'False', '']: # Get is here
 		try:
 			action[1] = action[1].split(' ')[1]
-			bench.write('SENSe:SWEep:TIME:AUTO OFF')
+			scpiwrite(bench, 'SENSe:SWEep:TIME:AUTO OFF')
 		except IndexError: pass
 		SCPIcore = 'SENSe:SWEep:TIME;POINTS'
 	else: print(Fore.RED + "Parameter NOT VALID!")
@@ -89,7 +89,7 @@ def sweepmode(bench, action=['Get'] + 10 * ['']):
 @Attribute
 def linfreq(bench, action=['Get'] + 10 * ['']):
 	'''action=['Get/Set', <start(Hz)>, <stop(Hz)>]'''
-	bench.write("SENS:SWE:TYPE LINEAR") #by default: Freq Sweep
+	scpiwrite(bench, "SENS:SWE:TYPE LINEAR") #by default: Freq Sweep
 	SCPIcore = 'SENS:FREQuency:START;STOP'
 	return mdlname, bench, SCPIcore, action
 @Attribute
@@ -112,7 +112,7 @@ def cwfreq(bench, action=['Get'] + 10 * ['']):
 	Sets the Continuous Wave (or Fixed) frequency. 
 	Must also send SENS:SWEEP:TYPE CW to put the analyzer into CW sweep mode.
 	'''
-	bench.write("SENS:SWE:TYPE POWER") #Power Sweep
+	scpiwrite(bench, "SENS:SWE:TYPE POWER") #Power Sweep
 	SCPIcore = 'SENSe:FREQuency:CW'
 	return mdlname, bench, SCPIcore, action
 @Attribute
@@ -120,16 +120,19 @@ def averag(bench, action=['Get'] + 10 * ['']):
 	'''action=['Get/Set', <points>]
 	Sets the number of measurements to combine for an average.
 	'''
-	bench.write("SENSe:AVER ON") # OFF by default
-	bench.write("SENSe:AVER:CLE")
+	scpiwrite(bench, "SENSe:AVER ON") # OFF by default
+	scpiwrite(bench, "SENSe:AVER:CLE")
 	SCPIcore = 'SENSe:AVER:COUNT'
 	return mdlname, bench, SCPIcore, action
+DATAFORM = {} # FORMat:DATA of each bench (session), asked once & forgotten whenever it is set
 @Attribute
 def dataform(bench, action=['Get'] + 10 * ['']):
 	'''action=['Get/Set', <format: REAL,32/REAL,64/ASCii,0>]
 	'''
 	if action[1] == 'REAL': action[1] = 'REAL,64' # Redefine ENAB's REAL (32-Bit) into 64-Bit to align with ENA's REAL (64-Bit).
-	bench.write('FORMat:BORDer NORMal')
+	if action[1] == 'REAL32': action[1] = 'REAL,32' # align with ENA's REAL32
+	if 'Set' in action[0]: DATAFORM.pop(bench, None)
+	scpiwrite(bench, 'FORMat:BORDer NORMal')
 	SCPIcore = 'FORMat:DATA'
 	return mdlname, bench, SCPIcore, action
 @Attribute
@@ -192,25 +195,28 @@ def scanning(bench, scan=1):
 		sweepmode(bench, action=['Set', 'HOLD']) # likened to pressing "Hold" on the panel
 	return stat
 
-def sdata(bench):
-	'''Collect data from ENAB
+def sarray(bench):
+	'''Collect data from ENAB as numpy-array (interleaved real & imaginary)
 	This returns the data from the FIRST TRACE.
 	'''
 	try:
 		sdatacore = ":CALCulate:MEASure:DATA:SDATa?"
-		datatype = dataform(bench)
+		if bench not in DATAFORM: DATAFORM[bench] = dataform(bench)[1]['DATA']
 		# databorder = str(bench.query("FORMat:BORDer?"))
 		# print(Fore.CYAN + "Endian (Byte-order): %s" %databorder)
-		if datatype[1]['DATA'] == 'REAL,32':
-			datas = bench.query_binary_values(sdatacore, datatype='f', is_big_endian=True) # convert the transferred ieee-encoded binaries into list (faster, 32-bit)
-		elif datatype[1]['DATA'] == 'REAL,64':
-			datas = bench.query_binary_values(sdatacore, datatype='d', is_big_endian=True) # convert the transferred ieee-encoded binaries into list (faster, 64-bit)
-		elif datatype[1]['DATA'] == 'ASC,0':
-			datas = bench.query_ascii_values(sdatacore) # convert the transferred ascii-encoded binaries into list (slower)
+		if DATAFORM[bench] == 'REAL,32':
+			datas = bench.query_binary_values(sdatacore, datatype='f', is_big_endian=True, container=array) # convert the transferred ieee-encoded binaries straight into numpy-array (fastest, 32-bit)
+		elif DATAFORM[bench] == 'REAL,64':
+			datas = bench.query_binary_values(sdatacore, datatype='d', is_big_endian=True, container=array) # convert the transferred ieee-encoded binaries straight into numpy-array (faster, 64-bit)
+		elif DATAFORM[bench] == 'ASC,0':
+			datas = array(bench.query_ascii_values(sdatacore)) # convert the transferred ascii-encoded binaries into list (slower)
 	except Exception as err:
-		datas = [0]
+		datas = array([0.])
 		print(err)
 	return datas
+def sdata(bench):
+	'''Collect data from ENAB as list (see sarray)'''
+	return sarray(bench).tolist()
 
 def preset(bench):
 	stat = bench.write(':SYSTem:PRESet')
@@ -221,6 +227,7 @@ def close(bench, reset=True, which=1, mode='DATABASE'):
 		bench.write(':OUTPut:STATe OFF')
 		set_status(mdlname, dict(config='reset-off'))
 	else: set_status(mdlname, dict(config='previous'))
+	DATAFORM.pop(bench, None)
 	try:
 		bench.close() #None means Success?
 		status = "Success"
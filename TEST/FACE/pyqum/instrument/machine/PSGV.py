@@ -5,7 +5,7 @@ init(autoreset=True) #to convert termcolor to wins color
 from os.path import basename as bs
 mdlname = bs(__file__).split('.')[0] # module's name e.g. PSG
 
-import pyvisa as visa
+from pyqum.instrument.simulator import resourcemanager
 from pyqum.instrument.logger import address, set_status, status_code, debug
 from pyqum.instrument.logger import translate_scpi as Attribute
 
@@ -15,7 +15,7 @@ debugger = debug(mdlname)
 def Initiate(which, mode='DATABASE'):
     ad = address(mode)
     rs = ad.lookup(mdlname, which) # Instrument's Address
-    rm = visa.ResourceManager()
+    rm = resourcemanager(rs) # simulated for SIM::<instr>::<label>
     try:
         bench = rm.open_resource(rs) #establishing connection using GPIB# with the machine
         # bench = rm.open_resource('TCPIP0::192.168.1.35::INSTR') #debugging connection
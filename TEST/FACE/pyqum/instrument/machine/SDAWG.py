@@ -14,21 +14,26 @@ import sys
 # sys.path.append(r'C:\\Program Files (x86)\\Keysight\SD1\\Libraries\\Python')
 # from pyqum.API.KeySight import keysightSD1
 sys.path.append('C:\Program Files (x86)\Keysight\SD1\Libraries\Python')
-import keysightSD1
+try: import keysightSD1
+except(ImportError) as err: keysightSD1, SD1_MISSING = None, err # only simulated modules can be initiated without the SD1-library
+else: SD1_MISSING = None
+from pyqum.instrument.simulator import is_simulated, keysightSD1 as simSD1
 
 # INITIALIZATION
 def Initiate(which, mode='DATABASE', current=False):
     ad = address(mode)
     rs = ad.lookup(mdlname, label=int(which)) # Instrument's Address
+    if keysightSD1 is None and not is_simulated(rs): raise ImportError("SD1-library is needed for %s-%s: %s" %(mdlname, which, SD1_MISSING))
     try:
         # CREATE AND OPEN MODULE
-        module = keysightSD1.SD_AOU()
-        moduleID = module.openWithSlot("", int(rs.split('::')[0]), int(rs.split('::')[1])) # PRODUCT, CHASSIS::SLOT
+        if is_simulated(rs): module, chassis, slot = simSD1.SD_AOU(), 0, int(which)
+        else: module, chassis, slot = keysightSD1.SD_AOU(), int(rs.split('::')[0]), int(rs.split('::')[1])
+        moduleID = module.openWithSlot("", chassis, slot) # PRODUCT, CHASSIS::SLOT
         if moduleID < 0: print(Fore.RED + "Module open error:", moduleID)
         else: print(Fore.GREEN + "%s-%s's connection Initialized >> ID: %s, Name: %s, Chassis: %s, Slot: %s" % (mdlname,which, moduleID, module.getProductName(), module.getChassis(), module.getSlot()))
         
         if current: print(Fore.YELLOW + "DC-mode for DAC: ALL 4 channels") # to align with YOKO-DC
-        for i in range(4): module.channelWaveShape(i+1, keysightSD1.SD_Waveshapes.AOU_HIZ) # always HiZ ALL 4-channels
+        for i in range(4): module.channelWaveShape(i+1, sd1(module).SD_Waveshapes.AOU_HIZ) # always HiZ ALL 4-channels
 
         set_status(mdlname, dict(state='connected'), which)
         ad.update_machine(1, "%s_%s"%(mdlname,which))
@@ -39,6 +44,9 @@ def Initiate(which, mode='DATABASE', current=False):
     return module
 
 # FUNCTIONS
+def sd1(module):
+    '''SD1-library (real or simulated) behind this module'''
+    return simSD1 if isinstance(module, simSD1.SD_AOU) else keysightSD1
 def model(module):
     return ["model", {"IDN": "%s (%s)" %(module.getProductName(), module.getSerialNumber())}]
 def clock(module, action=['Get', '']):
@@ -70,8 +78,8 @@ def ready(module, channels=[1,2,3,4]):
     return status
 def play(module):
     '''A Dummy function To be compatible with TKAWG'''
-    # print(Fore.YELLOW + "Waveform loading status: %s" %bool(keysightSD1.SD_Wave.getStatus))
-    if bool(keysightSD1.SD_Wave.getStatus): return module.AWGnWFplaying(1)
+    # print(Fore.YELLOW + "Waveform loading status: %s" %bool(sd1(module).SD_Wave.getStatus))
+    if bool(sd1(module).SD_Wave.getStatus): return module.AWGnWFplaying(1)
 def stop(module, channels=[1,2,3,4]):
     mask = 0
     for ch in channels: mask += 2**(ch-1)        
@@ -131,20 +139,20 @@ def clear_waveform(module, channel="ALL"):
 def sendWaveform(module, waveform_id, data=None):
     """Send waveform marked by waveform_id to AWG channel:
     """
-    wave = keysightSD1.SD_Wave()
+    wave = sd1(module).SD_Wave()
     waveformType = 0
     wave.newFromArrayDouble(waveformType, data)
     stat = module.waveformLoad(wave, waveform_id)
-    if stat < 0: print('Send error:', keysightSD1.SD_Error.getErrorMessage(stat))
+    if stat < 0: print('Send error:', sd1(module).SD_Error.getErrorMessage(stat))
     return waveform_id
 def resendWaveform(module, waveform_id, data=None):
     """ReSend waveform marked by waveform_id to AWG channel: ONLY data of the same length can replace each other
     """
-    wave = keysightSD1.SD_Wave()
+    wave = sd1(module).SD_Wave()
     waveformType = 0
     wave.newFromArrayDouble(waveformType, data)
     stat = module.waveformReLoad(wave, waveform_id)
-    if stat < 0: print('ReSend error:', keysightSD1.SD_Error.getErrorMessage(stat))
+    if stat < 0: print('ReSend error:', sd1(module).SD_Error.getErrorMessage(stat))
     return waveform_id
 def queueWaveform(module, channel, waveform_id, trigMode=0, delay=0, cycles=0, prescaler=0):
     """Queue waveform to AWG channel
@@ -154,7 +162,7 @@ def queueWaveform(module, channel, waveform_id, trigMode=0, delay=0, cycles=0, p
     prescaler: Waveform prescaler value, to reduce the effective sampling rate by prescaler x 5.
     """
     stat = module.AWGqueueWaveform(channel, waveform_id, trigMode, delay, cycles, prescaler)
-    if stat < 0: print('Queue error:', keysightSD1.SD_Error.getErrorMessage(stat))
+    if stat < 0: print('Queue error:', sd1(module).SD_Error.getErrorMessage(stat))
     return stat
 def processWaveform(module, channel, data):
     '''
@@ -179,7 +187,7 @@ def configureMarker(module, channel, active_pxi_trgline=[2], markerMode=3, trgIO
     stat = module.AWGqueueMarkerConfig(nAWG=channel, markerMode=markerMode, trgPXImask=trgPXImask,
                                     trgIOmask=trgIOmask, value=markerValue, syncMode=syncMode,
                                     length=length, delay=delay)
-    if stat < 0: print('Marker error:', keysightSD1.SD_Error.getErrorMessage(stat))
+    if stat < 0: print('Marker error:', sd1(module).SD_Error.getErrorMessage(stat))
     return stat
 
 
@@ -225,10 +233,10 @@ def prepare_DAC(module, channel, datasize, maxlevel=1.5, update_settings={}):
     if int(markeroption)==7: channelist.append(4)
     for channel in channelist:
         # 3. Pre-Settings:
-        waveshape(module, channel, keysightSD1.SD_Waveshapes.AOU_AWG) # Arbitrary Shape for DAC
+        waveshape(module, channel, sd1(module).SD_Waveshapes.AOU_AWG) # Arbitrary Shape for DAC
         sourcelevel(module, channel, ['Set', maxlevel, 0]) # Maximum amplitude in V
         module.AWGqueueConfig(channel, mode) # Operation-mode of the queue 
-        configureExternalTrigger(module, channel, extSource, keysightSD1.SD_TriggerBehaviors.TRIGGER_FALL, sync) # Only FALL works: PXItrigger are active low signals
+        configureExternalTrigger(module, channel, extSource, sd1(module).SD_TriggerBehaviors.TRIGGER_FALL, sync) # Only FALL works: PXItrigger are active low signals
 
         # 4. Pre-Loading / Initiate waveform(s):
         waveform_id = int(channel) + 10 * module.getSlot() +  1000 * module.getChassis() # Unique ID: <Chassis___><Slot__><Channel_>
@@ -236,8 +244,8 @@ def prepare_DAC(module, channel, datasize, maxlevel=1.5, update_settings={}):
 
         # 5. Queue-up waveform(s):
         # NOTE: Follow orders AND Giving orders simultaneously: will produce an up-spike in marker-pulse.
-        if Master: trigMode, markerMode = 0, keysightSD1.SD_MarkerModes.EVERY_CYCLE # Master / Commander / Default.
-        else: trigMode, markerMode = keysightSD1.SD_TriggerModes.EXTTRIG, 0 # Follow orders from Master-Card.
+        if Master: trigMode, markerMode = 0, sd1(module).SD_MarkerModes.EVERY_CYCLE # Master / Commander / Default.
+        else: trigMode, markerMode = sd1(module).SD_TriggerModes.EXTTRIG, 0 # Follow orders from Master-Card.
         queueWaveform(module, channel, waveform_id, trigMode)
         
         # 6. Setting Trigger-IO port:
@@ -289,8 +297,8 @@ def compose_DAC(module, channel, pulsedata, envelope=[], markeroption=0, update_
         if clearQ:
             # NOTE: TO RESOLVE SYNC-ISSUE in FULL-4-CHANNELS OUTPUT, step-2 are just repetitions of step-5 respectively from the "prepare_DAC".
             # 2. Queue-up waveform(s):
-            if Master: trigMode, markerMode = 0, keysightSD1.SD_MarkerModes.EVERY_CYCLE # Master / Commander / Default.
-            else: trigMode, markerMode = keysightSD1.SD_TriggerModes.EXTTRIG, 0 # Follow orders from Master-Card.
+            if Master: trigMode, markerMode = 0, sd1(module).SD_MarkerModes.EVERY_CYCLE # Master / Commander / Default.
+            else: trigMode, markerMode = sd1(module).SD_TriggerModes.EXTTRIG, 0 # Follow orders from Master-Card.
             queueWaveform(module, channel, waveform_id, trigMode)
 
     return module
@@ -310,7 +318,7 @@ def sweep(module, dcvalue, channel=1, sweeprate=0):
     '''DC amplitude in volts (–1.5 V to 1.5 V)
     '''
     try:
-        module.channelWaveShape(int(channel), keysightSD1.SD_Waveshapes.AOU_DC)
+        module.channelWaveShape(int(channel), sd1(module).SD_Waveshapes.AOU_DC)
         status = module.channelAmplitude(int(channel), float(dcvalue))
         print(Fore.GREEN + "Sweeping DCZ Channel-%s at %s"%(channel,dcvalue))
     except(ValueError): print(Fore.CYAN + "DCZ is NOT sweeping Channel-%s"%(channel))
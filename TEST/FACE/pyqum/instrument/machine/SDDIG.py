@@ -75,7 +75,7 @@ def AcquireData(module, recordtime_s, recordsum, update_settings={}):
     NOTE: The input for ‘nPoints’ must always be an even number. If you enter an odd number as input, the SD1 API returns the following message before continuing operation.
     “Warning: DAQ supports only even number of ‘DAQpointsPerCycle’. The input value is reduced by 1.”
     '''
-    settings=dict(FULL_SCALE=2, READ_TIMEOUT=100, IQ_PAIR=[1,2]) # default settings
+    settings=dict(FULL_SCALE=2, READ_TIMEOUT=100, IQ_PAIR=[1,2], average=False) # default settings
     settings.update(update_settings)
     FULL_SCALE, READ_TIMEOUT, IQ_PAIR = float(settings['FULL_SCALE']), settings['READ_TIMEOUT'], settings['IQ_PAIR']
 
@@ -101,6 +101,7 @@ def AcquireData(module, recordtime_s, recordsum, update_settings={}):
     module.DAQstopMultiple(DAQmask)
 
     DATA_V = DATA_V.T.reshape(recordsum, TOTAL_POINTS, 2) # Interleaved IQ-pairs
+    if settings['average']: DATA_V = DATA_V.mean(axis=0, keepdims=True) # only the mean record, as ALZDG does
     transferTime_sec = float(time() - start_acq)
     recordsPerBuffer, buffersPerAcquisition = recordsum, 1
 
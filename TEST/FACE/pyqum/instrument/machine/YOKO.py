@@ -7,10 +7,11 @@ from os.path import basename as bs
 mdlname = bs(__file__).split('.')[0] # model's name e.g. ESG, PSG, AWG, VSA, ADC
 debugger = 'debug' + mdlname
 
-import pyvisa as visa
+from pyqum.instrument.simulator import resourcemanager
 from functools import wraps
 from time import sleep, time
 from contextlib import suppress
+from numpy import ceil, diff
 from pyqum.instrument.logger import address, set_status, status_code
 from pyqum.instrument.toolbox import waveform
 
@@ -26,7 +27,7 @@ debug() # declare the debugger mode here
 def Initiate(reset=False, current=False, which=1):
     ad = address()
     rs = ad.lookup(mdlname, which) # Instrument's Address
-    rm = visa.ResourceManager()
+    rm = resourcemanager(rs) # simulated for SIM::<instr>::<label>
     try:
         bench = rm.open_resource(rs) #establishing connection using GPIB# with the machine
         if reset:
@@ -67,7 +68,15 @@ def sweep(bench, wave, sweeprate=0.0007, channel=''):
     sweeprate in V/s or A/s (A-mode: 0.000713 A/s, V-mode: 1.37 V/s with 10kOhm-resistor)
     Voltage Range (AUTO): R2: 10mV; R3: 100mV; R4: 1V; R5: 10V; R6: 30V
     dummy channel to get along with SDAWG-DC improvisation.
+    SWEEP_MODE: "step" (point-by-point over GPIB, default) or "program" (opt-in hardware ramp, stepping instead only if its first upload fails, i.e. before anything is run)
     '''
+    if SWEEP_MODE == "program":
+        try: return programsweep(bench, wave, sweeprate, channel)
+        except(uploadfailure) as err: print(Fore.RED + "Program-upload failed (%s), stepping instead" %err)
+    return stepsweep(bench, wave, sweeprate, channel)
+
+def stepsweep(bench, wave, sweeprate=0.0007, channel=''):
+    '''Point-by-point sweep: every interpolated point is written over GPIB'''
     pulsewidth=77*1e-3 # waiting/staying/settling/stabilization time in sec
     GPIBspeed = 62 #pts/s
     wave = str(wave)
@@ -92,6 +101,59 @@ def sweep(bench, wave, sweeprate=0.0007, channel=''):
             print("Error setting V")
     return Vdata, SweepTime
 
+# Program-Mode:
+SWEEP_MODE = "step" # "program" only pays off for long ramps & has only been exercised on the simulated source
+PROGRAM_STEPS = 50 # capacity of the program memory
+PROGRAM_INTERVAL_MIN = 0.1 # s, shortest interval / slope resolution
+class uploadfailure(Exception):
+    '''the very first program could not be uploaded: nothing has been run on the source yet'''
+def loadprogram(bench, levels):
+    '''Upload levels as a program (program-edit in one transaction)'''
+    bench.write(';'.join(['PRS'] + ['SA%.8fE' %v for v in levels] + ['PRE']))
+def runprogram(bench, levels, interval, slope):
+    '''Run the uploaded levels once with the given interval & slope (s) and wait until it is done (by polling the status code)'''
+    bench.write('PI%.1f;SW%.1f;M1;RU2' %(interval, slope)) # Single run from the first step
+    duration = interval * len(levels)
+    sleep(max(0, duration - PROGRAM_INTERVAL_MIN))
+    deadline = time() + duration + 10
+    while int(bench.query('OC').split('=')[-1]) & 2: # STS1 bit-1: program under execution
+        if time() > deadline:
+            bench.write('RU0') # hold
+            raise TimeoutError("program still running after %.1fs" %(duration + 10))
+        sleep(PROGRAM_INTERVAL_MIN / 2)
+    return
+
+def programsweep(bench, wave, sweeprate=0.0007, channel=''):
+    '''Hardware sweep: the ramp is executed by the source itself, PROGRAM_STEPS at a time,
+        with the slope between points kept within the same sweeprate & staying time as stepsweep.
+    '''
+    pulsewidth=77*1e-3 # waiting/staying/settling/stabilization time in sec
+    GPIBspeed = 62 #pts/s: stepsweep already jumps by up to sweeprate/GPIBspeed per write, so steps within that need no slope
+    ceiling = lambda x: PROGRAM_INTERVAL_MIN * ceil(round(x / PROGRAM_INTERVAL_MIN, 6))
+    slopefor = lambda step: 0 if step <= sweeprate / GPIBspeed else max(PROGRAM_INTERVAL_MIN, ceiling(step / sweeprate))
+    wave = str(wave)
+    Vdata = waveform(wave).data
+    SweepTime = abs(waveform(wave).data[0] - waveform(wave).data[-1]) / sweeprate + pulsewidth * waveform(wave).count
+    
+    Startime = time()
+    v_prev = float(previous(bench))
+    programs = []
+    # 1. Approach the first point on its own slope:
+    if Vdata[0] != v_prev: programs.append((Vdata[:1], slopefor(abs(Vdata[0] - v_prev))))
+    # 2. The rest, at a common slope fitting the largest step:
+    for i in range(1, len(Vdata), PROGRAM_STEPS):
+        programs.append((Vdata[i:i+PROGRAM_STEPS], slopefor(max(abs(diff(Vdata[i-1:i+PROGRAM_STEPS]))))))
+    for j, (levels, slope) in enumerate(programs):
+        try: loadprogram(bench, levels)
+        except Exception as err:
+            if not j: raise uploadfailure(err) # safe to step instead
+            raise # the source has already been driven part of the way
+        runprogram(bench, levels, ceiling(slope + pulsewidth), slope)
+        if eval(debugger):
+            print(Fore.YELLOW + "Staying %.5fV..." %levels[-1])
+            print(Fore.BLUE + "Time remaining: %.3fs" %(SweepTime - time() + Startime))
+    return Vdata, SweepTime
+
 def close(bench, reset=False, which=1, sweeprate=0.0007):
     if reset:
         previous(bench, True) # log last-applied voltage
@@ -0,0 +1,482 @@
+'''Simulated instruments: offline stand-ins for the VISA, SD1 & ATS back-ends'''
+
+from colorama import init, Fore, Back
+init(autoreset=True) #to convert termcolor to wins color
+
+import re, ctypes
+from os import environ
+from time import sleep, time
+from types import SimpleNamespace
+from weakref import WeakValueDictionary
+from numpy import array, zeros, full, linspace, arange, exp, pi, sqrt, log10, cos, sin, where, clip, uint8, uint16, float64
+from numpy.random import standard_normal, random_sample
+
+__author__ = "Teik-Hui Lee"
+__copyright__ = "Copyright 2019, The Pyqum Project"
+__credits__ = ["Chii-Dong Chen"]
+__license__ = "GPL"
+__version__ = "beta3"
+__email__ = "teikhui@phys.sinica.edu.tw"
+__status__ = "development"
+
+# Which instrument(s) to simulate, e.g. PYQUM_SIMULATE=ENA,YOKO or PYQUM_SIMULATE=ALL (an address starting with SIM works too)
+SIMULATE = [x.strip().upper() for x in environ.get('PYQUM_SIMULATE', '').split(',') if x.strip()]
+# Stretch (>1) or shrink (<1) every simulated delay, 0 to skip waiting altogether
+SIM_TIME_SCALE = float(environ.get('PYQUM_SIMULATE_SCALE', 1))
+
+# Per-instrument timing (latency in s per transaction, bandwidth in bytes/s) & power-on settings (short-form SCPI paths)
+PROFILES = dict(
+    ENA = dict(
+        idn = "Keysight Technologies,E5080A,SIM00001,A.13.95", latency = 0.002, bandwidth = 10e6,
+        defaults = {'OUTP:STAT': 1, 'SENS:SWE:POIN': 201, 'SENS:SWE:TIME:AUTO': 1, 'SENS:SWE:TYPE': 'LIN', 'SENS:FREQ:STAR': 4e9, 'SENS:FREQ:STOP': 6e9,
+                    'SENS:FREQ:CW': 5e9, 'SENS:BAND': 1e3, 'SENS:AVER': 0, 'SENS:AVER:COUN': 1, 'SOUR:POW:LEV': -10, 'SOUR:POW:STAR': -40, 'SOUR:POW:STOP': 0,
+                    'FORM:DATA': 'ASC', 'CALC:PAR:COUN': 1, 'CALC:PAR:DEF': 'S21'},
+        # hanger-type resonator behind a cold attenuated line:
+        resonator = dict(f0 = 5.0e9, Qi = 2e5, Qc = 2e4, chi = 0.8e6, Pc = -30, attenuation = -60, delay = 60e-9, floor = -140), # floor in dBm/Hz
+        ),
+    PSGA = dict(
+        idn = "Agilent Technologies,E8257D,SIM00002,C.06.10", latency = 0.005, bandwidth = 1e6,
+        defaults = {'SOUR:FREQ:CW': 5e9, 'SOUR:POW:AMPL': -20, 'OUTP:STAT': 0, 'MEM:CAT': '0,0', 'MEM:FREE': 0},
+        ),
+    PSGV = dict(
+        idn = "Agilent Technologies,E8267D,SIM00003,C.06.10", latency = 0.005, bandwidth = 1e6,
+        defaults = {'SOUR:FREQ:CW': 5e9, 'SOUR:POW:AMPL': -20, 'OUTP:STAT': 0, 'MEM:CAT': '0,0', 'MEM:FREE': 0},
+        ),
+    YOKO = dict(
+        idn = "YOKOGAWA,7651,SIM00004", latency = 1/62., bandwidth = 1e5, # 62pts/s over GPIB
+        defaults = {},
+        ),
+    TKAWG = dict(
+        idn = "TEKTRONIX,AWG5208,SIM00005,FV:6.0.0242.0", latency = 0.003, bandwidth = 40e6,
+        defaults = {'CLOC:SOUR': 'INT', 'CLOC:SRAT': 2.5e9, 'AWGC:RST': 0, 'OUTP:OFF': 0},
+        ),
+    SDAWG = dict(
+        idn = "M3202A", latency = 0.0005, bandwidth = 200e6, clock = 1e9, sync = 100e6,
+        ),
+    ALZDG = dict(
+        idn = "ATS9371", latency = 0.001, bandwidth = 3e9, kind = 33, bits = 12, memory = 2*1024**3, # samples per channel
+        trigger_period = 100e-6, # shot-repetition in s
+        readout = dict(frequency = 50e6, amplitude = 0.05, phase = (0, 0.6*pi), excited = 0.3, noise = 0.012), # V, rad
+        ),
+)
+
+def is_simulated(rs):
+    '''True if the resource-string points to a simulated instrument'''
+    return str(rs).upper().startswith('SIM')
+
+def simulate(instr_name, label, rs):
+    '''resource-string to open: SIM::<instr>::<label> if this instrument is to be simulated, otherwise rs as is'''
+    if is_simulated(rs) or 'ALL' in SIMULATE or instr_name.upper() in SIMULATE:
+        rs = "SIM::%s::%s" %(instr_name, label)
+    return rs
+
+def holdon(seconds):
+    '''pretend the hardware is busy'''
+    if seconds > 0 and SIM_TIME_SCALE > 0: sleep(seconds * SIM_TIME_SCALE)
+    return
+
+def resourcemanager(rs):
+    '''VISA resource-manager able to open rs: simulated for SIM::<instr>::<label>, pyvisa otherwise'''
+    if is_simulated(rs): return simresourcemanager()
+    import pyvisa as visa
+    return visa.ResourceManager()
+
+class simresourcemanager:
+    '''Drop-in for pyvisa.ResourceManager handing out simulated benches'''
+    def open_resource(self, rs):
+        instr, label = rs.split('::')[1:3]
+        print(Fore.YELLOW + "SIMULATING %s-%s" %(instr, label))
+        return SIMBENCHES.get(instr, simbench)(instr, label)
+    def list_resources(self):
+        return tuple("SIM::%s::1" %instr for instr in SIMBENCHES)
+    def close(self):
+        return
+
+
+# region: SCPI
+def scpikey(keyword):
+    '''SCPI short-form of a (long-form) keyword with its numeric suffix kept, a suffix of 1 being the default, e.g. SENSe1 -> SENS, OUTPUT2 -> OUTP2'''
+    word, suffix = re.match(r'(.*?)(\d*)$', keyword.strip().upper()).groups()
+    if len(word) > 4: word = word[:3] if word[3] in 'AEIOU' else word[:4]
+    if suffix == '1': suffix = ''
+    return word + suffix
+
+UNITS = {'THZ': 1e12, 'GHZ': 1e9, 'MHZ': 1e6, 'KHZ': 1e3, 'HZ': 1, 'DBM': 1, 'DB': 1, 'KV': 1e3, 'MV': 1e-3, 'UV': 1e-6, 'V': 1,
+         'MA': 1e-3, 'UA': 1e-6, 'NA': 1e-9, 'A': 1, 'MS': 1e-3, 'US': 1e-6, 'NS': 1e-9, 'S': 1}
+def scpivalue(argument):
+    '''normalize a parameter the way an instrument would echo it back'''
+    argument = str(argument).strip()
+    number = re.match(r'^([+-]?(?:\d+\.?\d*|\.\d+)(?:E[+-]?\d+)?)\s*([A-Z]*)$', argument.upper())
+    if number and number.group(2) in [''] + list(UNITS):
+        return "%+.11E" %(float(number.group(1)) * UNITS.get(number.group(2), 1))
+    if re.match(r'^[A-Za-z]+\d*$', argument):
+        return dict(ON='1', OFF='0').get(argument.upper(), scpikey(argument))
+    return argument
+
+class simbench:
+    '''Simulated SCPI instrument: remembers whatever is set and answers queries from memory or its power-on defaults'''
+    def __init__(self, instr, label=1):
+        self.instr, self.label = instr, label
+        self.profile = PROFILES.get(instr, dict(idn="PYQUM,%s,SIM,0" %instr, latency=0.002, bandwidth=1e6, defaults={}))
+        self.timeout, self.read_termination, self.write_termination = 2000, '\n', '\n'
+        self.reset()
+        self.replies = []
+    def reset(self):
+        self.state = {path: scpivalue(value) for path, value in self.profile.get('defaults', {}).items()}
+        return
+    def value(self, path):
+        return self.state.get(path, '0')
+    def number(self, path):
+        return float(self.value(path))
+
+    # Parsing:
+    def parse(self, message):
+        '''split compound message into [(path, argument, query)] following the SCPI header-path rules'''
+        commands, base = [], []
+        for unit in str(message).strip().split(';'):
+            unit = unit.strip()
+            if not unit: continue
+            header, _, argument = unit.partition(' ')
+            query = header.endswith('?')
+            header = header.rstrip('?')
+            if header.startswith('*'):
+                commands.append((header.upper(), argument.strip(), query))
+                continue
+            nodes = [scpikey(x) for x in header.split(':') if x]
+            if not header.startswith(':'): nodes = base + nodes
+            base = nodes[:-1]
+            commands.append((':'.join(nodes), argument.strip(), query))
+        return commands
+    def execute(self, message):
+        holdon(self.profile['latency'])
+        replies = []
+        for path, argument, query in self.parse(message):
+            if query: replies.append(str(self.ask(path, argument)))
+            else: self.command(path, argument)
+        return replies
+
+    # Behaviour (override per instrument):
+    def command(self, path, argument):
+        if path == '*RST': self.reset()
+        elif path.startswith('*'): pass
+        else: self.state[path] = scpivalue(argument)
+        return
+    def ask(self, path, argument=''):
+        if path == '*IDN': return self.profile['idn']
+        elif path in ('*OPC', '*STB'): return '1'
+        elif path == '*ESR': return '0'
+        return self.value(path)
+
+    # VISA-API:
+    def write(self, message):
+        self.replies = self.execute(message)
+        return len(message) + len(self.write_termination)
+    def write_raw(self, message):
+        holdon(len(message) / self.profile['bandwidth'])
+        self.execute(message.split(b'#')[0].decode(errors='ignore'))
+        return len(message)
+    def write_binary_values(self, message, values, datatype='f', is_big_endian=False):
+        size = len(values) * ctypes.sizeof(dict(f=ctypes.c_float, d=ctypes.c_double).get(datatype, ctypes.c_float))
+        holdon(size / self.profile['bandwidth'])
+        self.execute(message)
+        return len(message) + size
+    def read(self):
+        replies, self.replies = self.replies, []
+        return ';'.join(replies)
+    def query(self, message):
+        self.write(message)
+        return self.read()
+    def query_ascii_values(self, message, converter='f', separator=','):
+        return [float(x) for x in self.query(message).split(separator) if x]
+    def query_binary_values(self, message, datatype='f', is_big_endian=False, container=list):
+        values = self.query_ascii_values(message)
+        holdon(len(values) * ctypes.sizeof(dict(f=ctypes.c_float, d=ctypes.c_double).get(datatype, ctypes.c_float)) / self.profile['bandwidth'])
+        return container(values)
+    def close(self):
+        print(Fore.YELLOW + "SIMULATED %s-%s closed" %(self.instr, self.label))
+        return
+
+class simena(simbench):
+    '''Network analyzer with a hanger resonator hooked to its ports'''
+    def __init__(self, instr, label=1):
+        super().__init__(instr, label)
+        self.ready = 0
+    def sweeptime(self):
+        if self.value('SENS:SWE:TIME:AUTO') == '0' and 'SENS:SWE:TIME' in self.state: period = self.number('SENS:SWE:TIME')
+        else: period = 1.1 * self.number('SENS:SWE:POIN') / self.number('SENS:BAND') + 0.002
+        if self.value('SENS:AVER') == '1': period *= max(1, self.number('SENS:AVER:COUN'))
+        return period
+    def command(self, path, argument):
+        if path in ('TRIG:SING', 'INIT'): self.ready = time() + self.sweeptime() * SIM_TIME_SCALE
+        elif path == 'ABOR': self.ready = 0
+        elif path == 'SENS:SWE:TIME': self.state['SENS:SWE:TIME:AUTO'] = '0'
+        super().command(path, argument)
+        return
+    def ask(self, path, argument=''):
+        if path == '*STB': # the sweep is done once the operation-bit is raised
+            sleep(max(0, self.ready - time()))
+            return '128'
+        elif path == 'SENS:SWE:TIME': return "%+.11E" %self.sweeptime()
+        elif path == 'CALC:SEL:DATA:SDAT': return ','.join("%+.11E" %x for x in self.sdata())
+        return super().ask(path, argument)
+    def sdata(self):
+        '''interlaced (I, Q) of S21 across the current sweep'''
+        points, r = int(self.number('SENS:SWE:POIN')), self.profile['resonator']
+        if self.value('SENS:SWE:TYPE') == 'POW':
+            frequency, power = full(points, self.number('SENS:FREQ:CW')), linspace(self.number('SOUR:POW:STAR'), self.number('SOUR:POW:STOP'), points)
+        else:
+            frequency, power = linspace(self.number('SENS:FREQ:STAR'), self.number('SENS:FREQ:STOP'), points), full(points, self.number('SOUR:POW:LEV'))
+        fr = r['f0'] + r['chi'] / (1 + 10**((power - r['Pc'])/10)) # dressed at low power, bare at high power
+        Ql = 1 / (1/r['Qi'] + 1/r['Qc'])
+        S21 = 10**(r['attenuation']/20) * exp(-2j*pi*frequency*r['delay']) * (1 - (Ql/r['Qc']) / (1 + 2j*Ql*(frequency/fr - 1)))
+        noise = 10**((r['floor'] + 10*log10(self.number('SENS:BAND')) - power) / 20) / sqrt(max(1, self.number('SENS:AVER:COUN')) if self.value('SENS:AVER') == '1' else 1)
+        S21 = S21 + noise * (standard_normal(points) + 1j*standard_normal(points)) / sqrt(2)
+        datas = zeros(2*points)
+        datas[0::2], datas[1::2] = S21.real, S21.imag
+        return datas
+
+class simyoko(simbench):
+    '''DC source speaking its own (non-SCPI) GPIB dialect: SA<level>E, O<state>E, OD, OC, RC & program-mode (PRS..PRE, PI, SW, RU)'''
+    def reset(self):
+        self.level, self.output, self.state = 0., 0, {}
+        self.program, self.editing, self.interval, self.slope, self.run = [], False, 1., 0., None
+        return
+    def parse(self, message):
+        return [(unit.strip().upper(), '', unit.strip().upper() in ('OD', 'OC')) for unit in str(message).split(';') if unit.strip()]
+    def present(self):
+        '''level right now, following the running program (if any) step by step along its slope'''
+        if self.run is None: return self.level
+        start, origin = self.run
+        level, elapsed = origin, (time() - start) / max(SIM_TIME_SCALE, 1e-9)
+        for i, target in enumerate(self.program):
+            t = elapsed - i * self.interval
+            if t <= 0: break
+            level = target if t >= self.slope else level + (target - level) * t / self.slope
+        if elapsed >= self.interval * len(self.program): self.level, self.run = self.program[-1], None
+        return level
+    def command(self, path, argument):
+        if path == 'PRS': self.program, self.editing = [], True
+        elif path == 'PRE': self.editing = False
+        elif path.startswith('SA'):
+            if self.editing: self.program.append(float(path[2:].rstrip('E')))
+            else: self.level, self.run = float(path[2:].rstrip('E')), None
+        elif path.startswith('PI'): self.interval = float(path[2:].rstrip('E'))
+        elif path.startswith('SW'): self.slope = float(path[2:].rstrip('E'))
+        elif path.startswith('RU'):
+            if path[2:].rstrip('E') == '2' and self.program: self.run = (time(), self.present())
+            else: self.level, self.run = self.present(), None # hold
+        elif path.startswith('O'): self.output = int(path[1:].rstrip('E'))
+        elif path == 'RC': self.reset()
+        else: self.state[path[0]] = path[1:]
+        return
+    def ask(self, path, argument=''):
+        if path == 'OC': # STS1: bit-4 output, bit-1 program under execution, bit-0 program being edited
+            level = self.present()
+            return "STS1=%d" %(16*bool(self.output) + 2*(self.run is not None) + int(self.editing))
+        return "%+.5E" %self.present()
+
+class simtkawg(simbench):
+    '''AWG keeping its own waveform-list'''
+    def reset(self):
+        super().reset()
+        self.wlist = []
+        return
+    def command(self, path, argument):
+        names = re.findall(r'"([^"]*)"', argument)
+        if path == 'WLIS:WAV:NEW' and names: self.wlist = [x for x in self.wlist if x != names[0]] + [names[0]]
+        elif path == 'WLIS:WAV:DEL': self.wlist = [] if 'ALL' in argument.upper() else [x for x in self.wlist if x not in names]
+        elif path == 'AWGC:RUN:IMM': self.state['AWGC:RST'] = '2'
+        elif path == 'AWGC:STOP:IMM': self.state['AWGC:RST'] = '0'
+        else: super().command(path, argument)
+        return
+    def ask(self, path, argument=''):
+        if path == 'WLIS:LIST': return ','.join('"%s"' %x for x in self.wlist)
+        elif path == 'WLIS:LAST': return '"%s"' %(self.wlist[-1] if self.wlist else '')
+        elif path == 'WLIS:SIZE': return str(len(self.wlist))
+        return super().ask(path, argument)
+
+SIMBENCHES = dict(ENA=simena, PSGA=simbench, PSGV=simbench, YOKO=simyoko, TKAWG=simtkawg)
+# endregion
+
+
+# region: Keysight SD1 (SDAWG)
+class simwave:
+    '''keysightSD1.SD_Wave'''
+    def newFromArrayDouble(self, waveformType, waveformDataA, waveformDataB=None):
+        self.data = array(waveformDataA, dtype=float64)
+        return len(self.data)
+    def getStatus(self):
+        return 0
+
+class simaou:
+    '''keysightSD1.SD_AOU: 4-channel AWG in a PXIe-slot'''
+    def __init__(self):
+        self.profile = PROFILES['SDAWG']
+        self.chassis, self.slot, self.clock = None, None, self.profile['clock']
+        self.waveforms, self.queues, self.channels = {}, {}, {}
+        self.running = zeros(4, dtype=int)
+    def openWithSlot(self, productName, chassis, slot):
+        holdon(self.profile['latency'])
+        self.chassis, self.slot = chassis, slot
+        return 1
+    def close(self):
+        return
+    def getProductName(self):
+        return self.profile['idn']
+    def getSerialNumber(self):
+        return "SIM%s%02d" %(self.chassis, self.slot)
+    def getChassis(self):
+        return self.chassis
+    def getSlot(self):
+        return self.slot
+    # clock:
+    def clockSetFrequency(self, frequency, mode=1):
+        self.clock = float(frequency)
+        return self.clock
+    def clockGetFrequency(self):
+        return self.clock
+    def clockGetSyncFrequency(self):
+        return self.profile['sync']
+    # channels:
+    def channel(self, nChannel, **settings):
+        self.channels.setdefault(int(nChannel), {}).update(settings)
+        return 0
+    def channelWaveShape(self, nChannel, waveShape):
+        return self.channel(nChannel, shape=waveShape)
+    def channelAmplitude(self, nChannel, amplitude):
+        return self.channel(nChannel, amplitude=amplitude)
+    def channelOffset(self, nChannel, offset):
+        return self.channel(nChannel, offset=offset)
+    def channelFrequency(self, nChannel, frequency):
+        return self.channel(nChannel, frequency=frequency)
+    def channelPhase(self, nChannel, phase):
+        return self.channel(nChannel, phase=phase)
+    def triggerIOconfig(self, direction):
+        return 0
+    # waveforms:
+    def waveformLoad(self, waveformObject, waveformNumber):
+        data = getattr(waveformObject, 'data', ())
+        holdon(self.profile['latency'] + 2*len(data) / self.profile['bandwidth']) # 16-bit samples over PXIe
+        self.waveforms[waveformNumber] = data
+        return len(data)
+    waveformReLoad = waveformLoad
+    def waveformFlush(self):
+        self.waveforms, self.queues = {}, {}
+        return 0
+    def AWGfromArray(self, nAWG, triggerMode, startDelay, cycles, prescaler, waveformType, waveformDataA, waveformDataB=None, paddingMode=0):
+        self.waveforms[-int(nAWG)] = array(waveformDataA, dtype=float64)
+        return self.AWGqueueWaveform(nAWG, -int(nAWG), triggerMode, startDelay, cycles, prescaler)
+    def AWGqueueWaveform(self, nAWG, waveformNumber, triggerMode, startDelay, cycles, prescaler):
+        if waveformNumber not in self.waveforms: return -8008 # waveform not loaded
+        self.queues.setdefault(int(nAWG), []).append(waveformNumber)
+        return 0
+    def AWGqueueConfig(self, nAWG, mode):
+        return 0
+    def AWGqueueMarkerConfig(self, nAWG, markerMode, trgPXImask, trgIOmask, value, syncMode, length, delay):
+        return 0
+    def AWGtriggerExternalConfig(self, nAWG, externalSource, triggerBehavior, sync=0):
+        return 0
+    # playing:
+    def AWGstartMultiple(self, AWGmask):
+        for i in range(4): self.running[i] |= (AWGmask >> i) & 1
+        return 0
+    def AWGstopMultiple(self, AWGmask):
+        for i in range(4): self.running[i] &= ~(AWGmask >> i) & 1
+        return 0
+    def AWGstop(self, nAWG):
+        return self.AWGstopMultiple(2**(int(nAWG)-1))
+    def AWGflush(self, nAWG):
+        self.queues.pop(int(nAWG), None)
+        return 0
+    def AWGtriggerMultiple(self, AWGmask):
+        return 0
+    def AWGisRunning(self, nAWG):
+        return int(self.running[int(nAWG)-1])
+    def AWGnWFplaying(self, nAWG):
+        queue = self.queues.get(int(nAWG), [])
+        return queue[0] if (queue and self.AWGisRunning(nAWG)) else -1
+
+keysightSD1 = SimpleNamespace(
+    SD_AOU = simaou, SD_Wave = simwave,
+    SD_Error = SimpleNamespace(getErrorMessage = lambda errorNumber: "simulated SD1-error %s" %errorNumber),
+    SD_Waveshapes = SimpleNamespace(AOU_HIZ=-1, AOU_OFF=0, AOU_SINUSOIDAL=1, AOU_TRIANGULAR=2, AOU_SQUARE=4, AOU_DC=5, AOU_AWG=6, AOU_PARTNER=8),
+    SD_TriggerModes = SimpleNamespace(AUTOTRIG=0, VIHVITRIG=1, SWHVITRIG=1, EXTTRIG=2, ANALOGTRIG=3, SWHVITRIG_CYCLE=5, EXTTRIG_CYCLE=6, ANALOGAUTOTRIG=11),
+    SD_MarkerModes = SimpleNamespace(DISABLED=0, START=1, START_AFTER_DELAY=2, EVERY_CYCLE=3),
+    SD_TriggerBehaviors = SimpleNamespace(TRIGGER_NONE=0, TRIGGER_HIGH=1, TRIGGER_LOW=2, TRIGGER_RISE=3, TRIGGER_FALL=4),
+)
+# endregion
+
+
+# region: AlazarTech ATS (ALZDG)
+DMA_BUFFERS = WeakValueDictionary()
+class simdmabuffer:
+    '''atsapi.DMABuffer'''
+    def __init__(self, board_handle, c_sample_type, size_bytes):
+        self.size_bytes = size_bytes
+        self.buffer = zeros(size_bytes // ctypes.sizeof(c_sample_type), dtype=uint16 if ctypes.sizeof(c_sample_type) > 1 else uint8)
+        self.addr = id(self)
+        DMA_BUFFERS[self.addr] = self
+
+class simboard:
+    '''atsapi.Board: dual-channel digitizer capturing a dispersive readout tone, one record per trigger'''
+    def __init__(self, systemId=1, boardId=1):
+        self.profile = PROFILES['ALZDG']
+        self.handle, self.api = (systemId, boardId), atsapi
+        self.samplesPerSec, self.dRange, self.triggerDelay = 1e9, 0.4, 0
+        self.recordsPerBuffer, self.samplesPerRecord, self.channelCount = 0, 0, 2
+    def getBoardKind(self):
+        return self.profile['kind']
+    def getChannelInfo(self):
+        return ctypes.c_uint32(self.profile['memory']), ctypes.c_uint8(self.profile['bits'])
+    def setCaptureClock(self, source, rate, edge, decimation):
+        self.samplesPerSec = float(rate)
+        return
+    def setTriggerDelay(self, samples):
+        self.triggerDelay = samples
+        return
+    def configure(self, *args):
+        return
+    inputControlEx = setTriggerOperation = setExternalTrigger = setTriggerTimeOut = configureAuxIO = setBWLimit = configure
+    def setRecordSize(self, preTriggerSamples, postTriggerSamples):
+        self.samplesPerRecord = preTriggerSamples + postTriggerSamples
+        return
+    def beforeAsyncRead(self, channels, transferOffset, samplesPerRecord, recordsPerBuffer, recordsPerAcquisition, flags):
+        self.samplesPerRecord, self.recordsPerBuffer = samplesPerRecord, recordsPerBuffer
+        self.channelCount = sum(int(c & channels == c) for c in atsapi.channels)
+        return
+    def postAsyncBuffer(self, address, size_bytes):
+        return
+    def startCapture(self):
+        holdon(self.profile['latency'])
+        return
+    def abortAsyncRead(self):
+        return
+    def waitAsyncBufferComplete(self, address, timeout_ms=5000):
+        '''fill the buffer with the next batch of records as soon as their triggers have come by'''
+        buffer = DMA_BUFFERS[address]
+        holdon(self.recordsPerBuffer * self.profile['trigger_period'])
+        buffer.buffer[:] = self.records(self.recordsPerBuffer).reshape(-1)[:buffer.buffer.size]
+        return
+    def records(self, count):
+        '''ADC-codes (count, samplesPerRecord, channelCount) of I & Q, each record randomly projected into ground or excited state'''
+        readout, codeRange = self.profile['readout'], 2 ** (self.profile['bits'] - 1) - 0.5
+        t = (arange(self.samplesPerRecord) + self.triggerDelay) / self.samplesPerSec
+        phase = where(random_sample((count, 1)) < readout['excited'], readout['phase'][1], readout['phase'][0]) + 2*pi*readout['frequency']*t
+        V = zeros((count, self.samplesPerRecord, self.channelCount))
+        V[:, :, 0] = readout['amplitude'] * cos(phase)
+        if self.channelCount > 1: V[:, :, 1] = readout['amplitude'] * sin(phase)
+        V += readout['noise'] * standard_normal(V.shape)
+        codes = 16. * clip(codeRange + V / self.dRange * codeRange, 0, 2*codeRange) # 12-bit code in the most significant bits
+        return codes.astype(uint16)
+
+atsapi = SimpleNamespace(
+    Board = simboard, DMABuffer = simdmabuffer,
+    CHANNEL_A = 1, CHANNEL_B = 2, channels = [1, 2],
+    INTERNAL_CLOCK = 1, EXTERNAL_CLOCK_10MHz_REF = 7, SAMPLE_RATE_1000MSPS = 0x35, CLOCK_EDGE_RISING = 0,
+    DC_COUPLING = 2, INPUT_RANGE_PM_400_MV = 0x5, IMPEDANCE_50_OHM = 2,
+    TRIG_ENGINE_OP_J = 0, TRIG_ENGINE_J = 0, TRIG_ENGINE_K = 1, TRIG_EXTERNAL = 2, TRIG_CHAN_A = 0, TRIG_DISABLE = 3, TRIGGER_SLOPE_POSITIVE = 1,
+    ETR_TTL = 2, AUX_OUT_TRIGGER = 0,
+    ADMA_EXTERNAL_STARTCAPTURE = 0x1, ADMA_NPT = 0x200, ADMA_FIFO_ONLY_STREAMING = 0x800,
+    enter_pressed = lambda: False,
+)
+# endregion
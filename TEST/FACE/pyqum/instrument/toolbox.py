@@ -3,9 +3,13 @@
 from colorama import init, Fore, Back
 init(autoreset=True) #to convert termcolor to wins color
 
-import logging, collections
-from time import sleep
-from numpy import array, append, zeros, prod, floor, inner, linspace, float64, abs, argmin, dot, int64, sum, flip, cumprod, matmul, transpose, ones, exp, log10, log2, log, power
+import logging, collections, re, json, struct
+from os import environ
+from functools import lru_cache, wraps
+from threading import Lock
+from time import sleep, perf_counter
+from numpy import array, append, zeros, prod, floor, inner, linspace, float64, abs, argmin, dot, int64, sum, flip, cumprod, matmul, transpose, ones, exp, log10, log2, log, power, \
+    unravel_index, moveaxis, asarray
 
 def flatten(x):
     '''flatten multi-dimensional list into a single-dimensional list of strings.
@@ -31,42 +35,135 @@ def find_in_list(str_list, element):
 
 def cdatasearch(Order, Structure):
     ''' Give the address of the data essentially!
-        Order: cdata-location (collective index)\n
+        Order: cdata-location (collective index), can also be an array of orders\n
         Structure = cdata-structure (how many bases for each hierarchy/level)
                     e.g. [cN#, c(N-1)#, ... , c3#, c2#, c1#], [10, 10, 7, 24, 35, 2]
         \nNote: 
             Order & Address are index-type(0,1,2...); 
             Structure is count-type(1,2,3...): [slow(high-level) to fast(low-level)]
+            Array of orders returns a stack of addresses (last axis: hierarchy), ready for gotocdata.
     '''
-    Address, Structure = [], array(Structure)
-    Digitmax = len(Structure)
-    Structure = append(Structure, [1])
-    for i in range(Digitmax):
-        dgit = floor(((Order)%prod(Structure[i:],dtype=int64))/prod(Structure[i+1:],dtype=int64))
-        Address.append(int(dgit))  
-    return Address
+    Structure = array(Structure, dtype=int64)
+    Order = array(Order, dtype=int64) % prod(Structure, dtype=int64) # wrap-around like before
+    Address = unravel_index(Order, Structure) # numpy's C-order
+    if Order.ndim == 0: return [int(dgit) for dgit in Address]
+    return moveaxis(array(Address), 0, -1)
+
+def cdatastrides(Structure):
+    '''The weight (stride) of each hierarchy in the flattened data'''
+    Structure = array(Structure, dtype=int64)
+    S = flip(cumprod(flip(Structure)))
+    S[:-1] , S[-1] = S[1:] , 1
+    return S
 
 def gotocdata(Address, Structure):
     '''Give the Order / Entry of the data
         Address: can be a stack of arrays of parameter-settings to form 2D-matrix
+                 or a tuple of index-grids (one per hierarchy, scalars & arrays will be broadcasted, like numpy.ravel_multi_index)
         Structure: an 1D-array of the NUMBER/COUNT of variables for each parameter in the data structure
     '''
-    Address = array(Address,dtype=int64)
-    Structure = array(Structure,dtype=int64)
     try:
-        if Structure.ndim == 1:
-            S = flip(cumprod(flip(Structure)))
-            S[:-1] , S[-1] = S[1:] , 1
-            Order = matmul(Address, S)
-        # if Structure.ndim == 2: # Allow 2D-Address (Still PENDING)
-        #     S = flip(cumprod(flip(Structure),axis=1))
-        #     # print("Address: %s, Structure: %s, S: %s" %(str(Address.shape), str(array(Structure).shape), str(S.shape)))
-        #     S[:, :-1] , S[:, -1] = S[:, 1:] , ones(len(S[:, -1]))
-        #     Order = matmul(Address, transpose(S)).diagonal().astype(int)
-        #     print("Order: %s"%Order)
+        S = cdatastrides(Structure)
+        if type(Address) is tuple:
+            Order = 0
+            for grid, stride in zip(Address, S):
+                Order = Order + array(grid, dtype=int64) * stride
+        else:
+            Order = matmul(array(Address, dtype=int64), S)
     except: print("Please Check if the Structure dimension is 1D")
     return Order
 
+@lru_cache(maxsize=1024)
+def waveform_ast(command):
+    '''Compile waveform-command into a small AST (once per command-string):\n
+        return: (purified command, inner_repeat, count, nodes)
+        nodes: ('list', (str...)) for string list;
+               ('point', value) / ('sweep', start, ((target, num)...), function, complete) for number list.
+    '''
+    # defaulting to lower case
+    command = str(command).lower()
+
+    # special treatment to inner-repeat command: (to extract 'inner_repeat' for cwsweep averaging)
+    inner_repeat = 1
+    if ' r ' in command:
+        command, inner_repeat = command.split(' r ')
+        inner_repeat = int(inner_repeat.replace(" ",""))
+    if '^' in command:
+        command, inner_repeat = command.split('^')
+        inner_repeat = int(inner_repeat.replace(" ",""))
+
+    # correcting back ("auto-purify") the command-string after having retrieved the repeat-count or not:
+    # get rid of multiple spacings & spacing around keywords
+    command = re.sub(r" {2,}", " ", command)
+    command = re.sub(r" ?(\*|to|\(|\)|f|:|/) ?", r"\1", command)
+    command = re.sub(r" ?(\*|to|\(|\)|f|:|/) ?", r"\1", command) # keywords next to each other
+    # print(Fore.CYAN + "Command: %s" %command)
+    
+    tokens = command.split(" ") + [""]
+    
+    # 1. building string list:
+    if ("," in tokens[0]) or ("," in tokens[1]):
+        # remove all sole-commas & attached-commas from string list command:
+        strings = tuple(i for x in tokens if x != ',' for i in x.split(',') if i != '')
+        return command, inner_repeat, len(strings), (('list', strings),)
+
+    # 2. building number list:
+    nodes, count = [], 0
+    for cmd in [x for x in tokens if x != ""]:
+        count += 1
+        if "*" in cmd and "to" in cmd:
+            C = [j for i in cmd.split("*") for j in i.split('to')]
+            segments, function, complete = [], "", False
+            try:
+                start = float(C[0])
+                steps = range(int(len(C[:-1])/2))
+                for i, target, asterisk in zip(steps,C[1::2],C[2::2]):
+                    num = int(asterisk.split("f:")[0])
+                    count += num
+                    segments.append((float(target), num))
+                    if i==steps[-1]: 
+                        complete = True
+                        if "f:" in asterisk: function = asterisk.split("f:")[1]
+            except: # rooting out the wrong command:
+                print("Invalid command")
+                if not segments: continue
+            nodes.append(('sweep', start, tuple(segments), function, complete))
+        else: nodes.append(('point', float(cmd)))
+    return command, inner_repeat, count, tuple(nodes)
+
+@lru_cache(maxsize=256)
+def waveform_data(command):
+    '''Evaluate the compiled waveform-command into its data-points (tuple)'''
+    data = []
+    for node in waveform_ast(command)[3]:
+        if node[0] == 'list': return node[1]
+        elif node[0] == 'point': data.append(node[1])
+        else:
+            start, segments, func, complete = node[1:]
+            for target, num in segments:
+                # 2a. Simple linear space / function:
+                data += list(linspace(start, target, num, endpoint=False, dtype=float64))
+                start = target
+            if not complete: continue
+            data += [target] # data assembly complete
+            # 2b. Customized space / function for the WHOLE waveform: base, power, log scales
+            if func:
+                # print(Fore.CYAN + "Function: %s" %func)
+                if 'base' in func:
+                    if "e" == func.split('/')[1]: data = list(exp(data))
+                    else: data = list(power(float(func.split('/')[1]), data))
+                elif 'power' in func:
+                    data = list(power(data, float(func.split('/')[1])))
+                elif 'log10' in func:
+                    data = list(log10(data))
+                elif 'log2' in func:
+                    data = list(log2(data))
+                elif 'log' in func:
+                    data = list(log(data))
+                else: print(Fore.RED + "Function NOT defined YET. Please consult developers")
+                print(Fore.YELLOW + "scaled %s points" %len(data))
+    return tuple(data)
+
 class waveform:
     '''Guidelines for Command writing:\n
         1. All characters will be converted to lower case.\n
@@ -78,103 +175,20 @@ class waveform:
             b. Power: 0-1: same with Log, >1: same with Base, but slower.
             c: Log: data points from sparse to dense.
         NOTE: '^' is equivalent to ' r ' without any spacing restrictions.
+        NOTE: command is compiled once (cached), .data is only evaluated when being accessed.
     '''
     def __init__(self, command):
-        # defaulting to lower case
-        command = str(command)
-        self.command = command.lower()
+        self.source = str(command)
+        with STAGES.stage('waveform'): self.command, self.inner_repeat, self.count, self.nodes = waveform_ast(self.source)
 
-        # special treatment to inner-repeat command: (to extract 'inner_repeat' for cwsweep averaging)
-        self.inner_repeat = 1
-        if ' r ' in self.command:
-            self.command, self.inner_repeat = self.command.split(' r ')
-            while " " in self.inner_repeat: self.inner_repeat = self.inner_repeat.replace(" ","")
-            self.inner_repeat = int(self.inner_repeat)
-        if '^' in self.command:
-            self.command, self.inner_repeat = self.command.split('^')
-            while " " in self.inner_repeat: self.inner_repeat = self.inner_repeat.replace(" ","")
-            self.inner_repeat = int(self.inner_repeat)
-
-        # correcting back ("auto-purify") the command-string after having retrieved the repeat-count or not:
-        # get rid of multiple spacings
-        while " "*2 in self.command:
-            self.command = self.command.replace(" "*2," ")
-        # get rid of spacing around keywords
-        while " *" in self.command or "* " in self.command:
-            self.command = self.command.replace(" *","*")
-            self.command = self.command.replace("* ","*")
-        while " to" in self.command or "to " in self.command:
-            self.command = self.command.replace(" to","to")
-            self.command = self.command.replace("to ","to")
-        while " (" in self.command or "( " in self.command:
-            self.command = self.command.replace(" (","(")
-            self.command = self.command.replace("( ","(")
-        while " )" in self.command or ") " in self.command:
-            self.command = self.command.replace(" )",")")
-            self.command = self.command.replace(") ",")")
-        while " f" in self.command or "f " in self.command:
-            self.command = self.command.replace(" f","f")
-            self.command = self.command.replace("f ","f")
-        while " :" in self.command or ": " in self.command:
-            self.command = self.command.replace(" :",":")
-            self.command = self.command.replace(": ",":")
-        while " /" in self.command or "/ " in self.command:
-            self.command = self.command.replace(" /","/")
-            self.command = self.command.replace("/ ","/")
-        # print(Fore.CYAN + "Command: %s" %self.command)
-        
-        command = self.command.split(" ") + [""]
-        
-        # 1. building string list:
-        if ("," in command[0]) or ("," in command[1]):
-            # remove all sole-commas from string list command:
-            command = [x for x in command if x != ',']
-            # remove all attached-commas from string list command:
-            command = [i for x in command for i in x.split(',') if i != '']
-            self.data = command
-            self.count = len(command)
-        # 2. building number list:
-        else:
-            command = [x for x in command if x != ""]
-            self.data, self.count = [], 0
-            for cmd in command:
-                self.count += 1
-                if "*" in cmd and "to" in cmd:
-                    C = [j for i in cmd.split("*") for j in i.split('to')]
-                    try:
-                        start = float(C[0])
-                        steps = range(int(len(C[:-1])/2))
-                        for i, target, asterisk in zip(steps,C[1::2],C[2::2]):
-                            num = asterisk.split("f:")[0]
-                            self.count += int(num)
-                            # 2a. Simple linear space / function:
-                            self.data += list(linspace(start, float(target), int(num), endpoint=False, dtype=float64))
-                            if i==steps[-1]: 
-                                self.data += [float(target)] # data assembly complete
-                                # 2b. Customized space / function for the WHOLE waveform: base, power, log scales
-                                if "f:" in asterisk:
-                                    func = asterisk.split("f:")[1]
-                                    # print(Fore.CYAN + "Function: %s" %func)
-                                    if 'base' in func:
-                                        if "e" == func.split('/')[1]: self.data = list(exp(self.data))
-                                        else: self.data = list(power(float(func.split('/')[1]), self.data))
-                                    elif 'power' in func:
-                                        self.data = list(power(self.data, float(func.split('/')[1])))
-                                    elif 'log10' in func:
-                                        self.data = list(log10(self.data))
-                                    elif 'log2' in func:
-                                        self.data = list(log2(self.data))
-                                    elif 'log' in func:
-                                        self.data = list(log(self.data))
-                                    else: print(Fore.RED + "Function NOT defined YET. Please consult developers")
-                                    print(Fore.YELLOW + "scaled %s points" %len(self.data))
-                            else: 
-                                start = float(target)
-                    except: # rooting out the wrong command:
-                        # raise
-                        print("Invalid command")
-                        pass
-                else: self.data.append(float(cmd))     
+    @property
+    def data(self):
+        if not hasattr(self, '_data'):
+            with STAGES.stage('waveform'): self._data = list(waveform_data(self.source))
+        return self._data
+    @data.setter
+    def data(self, data):
+        self._data = data
 
 
 def match(List, Value):
@@ -191,6 +205,95 @@ def normalize_dipeak(arr):
     elif abs(max(arr)) < abs(min(arr)): arr = (arr - max(arr)) / (max(arr) - min(arr)) # -1 < x < 0
     return arr
 
+def packbinary(payload):
+    '''Pack plot-payload (dict) into compact binary, an opt-in alternative to JSON:\n
+        [uint32-LE header-length][JSON header][padding to 4 bytes][float32-LE arrays...]
+        header: {"dtype": "<f4", "meta": {non-numeric items, nested as in payload}, "arrays": [[key-path, byte-offset, shape], ...]}
+    '''
+    meta, arrays, chunks = {}, [], []
+    offset = 0
+    def collect(items, path, branch):
+        nonlocal offset
+        for key, value in items.items():
+            if isinstance(value, dict):
+                branch[key] = {}
+                collect(value, path + [key], branch[key])
+                continue
+            try: data = asarray(value)
+            except(ValueError): data = None # ragged
+            if data is None or data.ndim == 0 or data.dtype.kind not in 'biuf':
+                branch[key] = value.tolist() if hasattr(value, 'tolist') else value
+                continue
+            data = data.astype('<f4')
+            arrays.append([path + [key], offset, list(data.shape)])
+            chunks.append(data.tobytes())
+            offset += data.nbytes
+    collect(payload, [], meta)
+    header = json.dumps(dict(dtype='<f4', meta=meta, arrays=arrays)).encode('utf-8')
+    header += b' ' * (-len(header) % 4) # keep float32 aligned
+    return struct.pack('<I', len(header)) + header + b''.join(chunks)
+
+class stagetimer:
+    '''Accumulate wall-time spent in each stage of the measurement-loop (waveform, pulser, scpi, dac, acquisition, dsp, insertdata, queue...):\n
+        with STAGES.stage('dsp'): ...\n
+        Disabled by default (costs one attribute-check per stage), switched on by environment variable PYQUM_BENCHMARK or enable().
+        NOTE: stages may nest (e.g. scpi inside dac), so the totals are NOT meant to add up.
+    '''
+    class lap:
+        __slots__ = ('timer', 'name', 'start')
+        def __init__(self, timer, name):
+            self.timer, self.name = timer, name
+        def __enter__(self):
+            self.start = perf_counter()
+            return self
+        def __exit__(self, *exc):
+            self.timer.add(self.name, perf_counter() - self.start)
+            return False
+    class idle:
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            return False
+    IDLE = idle()
+
+    def __init__(self, enabled=False):
+        self.enabled, self.lock = bool(enabled), Lock()
+        self.reset()
+    def enable(self, enabled=True):
+        self.enabled = bool(enabled)
+        return self
+    def reset(self):
+        with self.lock: self.records = collections.OrderedDict() # name: [count, total, max]
+        return
+    def stage(self, name):
+        if not self.enabled: return self.IDLE
+        return self.lap(self, name)
+    def timed(self, name):
+        '''decorator-version of stage'''
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*a, **b):
+                with self.stage(name): return func(*a, **b)
+            return wrapper
+        return decorator
+    def add(self, name, seconds):
+        with self.lock:
+            record = self.records.setdefault(name, [0, 0., 0.])
+            record[0] += 1
+            record[1] += seconds
+            record[2] = max(record[2], seconds)
+        return
+    def report(self):
+        '''{name: dict(count, total, mean, max)} in seconds'''
+        with self.lock:
+            return collections.OrderedDict((name, dict(count=c, total=t, mean=t/c, max=m)) for name, (c, t, m) in self.records.items())
+    def table(self):
+        lines = ["%-14s %8s %12s %12s %12s" %("stage", "count", "total(s)", "mean(ms)", "max(ms)")]
+        for name, r in self.report().items():
+            lines.append("%-14s %8d %12.4f %12.4f %12.4f" %(name, r['count'], r['total'], r['mean']*1e3, r['max']*1e3))
+        return "\n".join(lines)
+STAGES = stagetimer(environ.get('PYQUM_BENCHMARK'))
+
 # pause logging for some route:
 def pauselog():
 	log = logging.getLogger('werkzeug')
@@ -18,10 +18,11 @@ from si_prefix import si_format, si_parse
 from numpy import cos, sin, pi, polyfit, poly1d, array, roots, isreal, sqrt, mean, power, linspace, float64
 
 # Load instruments
-from pyqum import get_db, close_db
+from pyqum import get_db, db_transaction
+from pyqum.auth import invalidate_user_cache
 from pyqum.instrument.machine import YOKO, KEIT, ALZDG
 from pyqum.instrument.dilution import bluefors
-from pyqum.instrument.toolbox import match, waveform, pauselog
+from pyqum.instrument.toolbox import match, waveform, pauselog, packbinary
 from pyqum.instrument.analyzer import IQAParray, pulse_baseband, UnwraPhase
 from pyqum.instrument.composer import pulser
 from pyqum.instrument.reader import inst_designate, inst_order, device_port
@@ -124,7 +125,6 @@ def sgconnect():
         try: 
             db = get_db()
             instr_user = db.execute('SELECT u.username FROM user u JOIN machine m ON m.user_id = u.id WHERE m.codename = ?', ('%s_%s'%(sgtype,sglabel),)).fetchone()[0]
-            close_db()
             message = "%s is being connected to %s" %(sgname,instr_user)
         except(TypeError):
             instr_user = None
@@ -218,7 +218,6 @@ def dacconnect():
         try: 
             db = get_db()
             instr_user = db.execute('SELECT u.username FROM user u JOIN machine m ON m.user_id = u.id WHERE m.codename = ?', ('%s_%s'%(dactype,daclabel),)).fetchone()[0]
-            close_db()
             message = "%s is being connected to %s" %(dacname,instr_user)
         except(TypeError):
             instr_user = None
@@ -394,7 +393,6 @@ def adcconnect():
         try: 
             db = get_db()
             instr_user = db.execute('SELECT u.username FROM user u JOIN machine m ON m.user_id = u.id WHERE m.codename = ?', ('%s_%s'%(adctype,adclabel),)).fetchone()[0]
-            close_db()
             message = "%s is being connected to %s" %(adcname,instr_user)
         except(TypeError):
             instr_user = None
@@ -427,7 +425,7 @@ def adcacquiredata():
     recordsum = int(request.args.get('recordsum'))
     recordbuff = int(request.args.get('recordbuff')) # default: 32MB
 
-    update_items = dict(OPT_DMA_Buffer_Size=recordbuff, FULL_SCALE=float(request.args.get('fullscale')), IQ_PAIR=[int(x) for x in request.args.get('iqpair').split(',')])
+    update_items = dict(OPT_DMA_Buffer_Size=recordbuff, FULL_SCALE=float(request.args.get('fullscale')), IQ_PAIR=[int(x) for x in request.args.get('iqpair').split(',')], average=bool(int(request.args.get('average', 0))))
     [DATA, transferTime_sec, recordsPerBuff, buffersPerAcq] = ADC[adctype].AcquireData(adcboard[adctag], recordtime, recordsum, update_items)
     update_items.update(recordtime=request.args.get('recordtime'),recordsum=recordsum)
     set_status(request.args.get('adcname').split('-')[0], update_items, request.args.get('adcname').split('-')[1])
@@ -455,6 +453,7 @@ def adcplaydata():
         trace_I = mean(I_data[adctag][:,:], 0)
         trace_Q = mean(Q_data[adctag][:,:], 0)
     else:
+        tracenum = min(tracenum, len(I_data[adctag])-1) # only the mean is kept when averaged on acquisition
         trace_I = I_data[adctag][tracenum,:]
         trace_Q = Q_data[adctag][tracenum,:]
 
@@ -469,6 +468,8 @@ def adcplaydata():
 
     adc_1Ddata[adctag] = dict(t=t, I=list(trace_I.astype(float64)), Q=list(trace_Q.astype(float64)))
 
+    if int(request.args.get('binary', 0)): # typed-arrays for live-monitoring
+        return Response(packbinary(dict(log=str(log), I=trace_I, Q=trace_Q, A=trace_A, t=t)), mimetype='application/octet-stream')
     return jsonify(log=str(log), I=list(trace_I.astype(float64)), Q=list(trace_Q.astype(float64)), A=list(trace_A.astype(float64)), t=t) # JSON only supports float64 conversion (to str-list eventually)
 # export to mat
 @bp.route('/adc/export/1dmat', methods=['GET'])
@@ -538,7 +539,6 @@ def naconnect():
         try:
             db = get_db()
             instr_user = db.execute('SELECT u.username FROM user u JOIN machine m ON m.user_id = u.id WHERE m.codename = ?', ('%s_%s'%(natype,nalabel),)).fetchone()[0]
-            close_db()
             message = "%s is being connected to %s" %(naname,instr_user)
         except(TypeError):
             instr_user = None
@@ -610,8 +610,8 @@ def nasetsweep():
     stat = NA[natype].measure(nabench[natag])
     NA[natype].autoscal(nabench[natag])
     # Collecting Data:
-    NA[natype].dataform(nabench[natag], action=['Set', 'REAL'])
-    yI, yQ, yAmp, yPha = IQAParray(array(NA[natype].sdata(nabench[natag])))
+    NA[natype].dataform(nabench[natag], action=['Set', 'REAL32'])
+    yI, yQ, yAmp, yPha = IQAParray(NA[natype].sarray(nabench[natag]))
     NA[natype].rfports(nabench[natag], action=['Set', 'OFF'])
     print(Fore.CYAN + "Collected %s Data" %len(yAmp))
     xdata = list(freqrange[natag].data)
@@ -680,7 +680,6 @@ def saconnect():
         try:
             db = get_db()
             instr_user = db.execute('SELECT u.username FROM user u JOIN machine m ON m.user_id = u.id WHERE m.codename = ?', ('%s_%s'%(satype,salabel),)).fetchone()[0]
-            close_db()
             message = "%s is being connected to %s" %(saname,instr_user)
         except(TypeError):
             instr_user = None
@@ -749,7 +748,6 @@ def bdr():
         # 3. Wiring settings:
         machine_list = [x['codename'] for x in g.machlist]
         systemlist = [x['system'] for x in get_db().execute('SELECT system FROM queue').fetchall()]
-        close_db()
         try: queue = get_status("MSSN")[session['user_name']]['queue']
         except: queue = 'CHAR0' # default
         global category
@@ -828,7 +826,6 @@ def bdrhistoryziplog():
 def bdrsamplesqueues():
     db = get_db()
     bdrqlist = db.execute("SELECT system, samplename FROM queue ORDER BY id ASC").fetchall()
-    close_db()
     bdrqlist = [dict(x) for x in bdrqlist]
     return jsonify(bdrqlist=bdrqlist)
 @bp.route('/bdr/samples/allocate', methods=['GET'])
@@ -837,11 +834,10 @@ def bdrsamplesallocate():
     set_sample = request.args.get('set_sample')
     if int(g.user['management'])>=3:
         try:
-            db = get_db()
-            if set_sample == "null": db.execute("UPDATE queue SET samplename = null WHERE system = ?", (set_system,))
-            else: db.execute("UPDATE queue SET samplename = ? WHERE system = ?", (set_sample,set_system,))
-            db.commit()
-            close_db()
+            with db_transaction() as db:
+                if set_sample == "null": db.execute("UPDATE queue SET samplename = null WHERE system = ?", (set_system,))
+                else: db.execute("UPDATE queue SET samplename = ? WHERE system = ?", (set_sample,set_system,))
+            invalidate_user_cache()
             status = "User %s has set sample %s into system %s" %(g.user['username'],set_sample,set_system)
         except: status = "COULD NOT COMMIT TO DATABASE"
         print(Fore.YELLOW + status)
@@ -10,18 +10,19 @@ from numpy.lib.npyio import loads
 from sqlite3 import IntegrityError
 from flask import Flask, request, render_template, Response, redirect, Blueprint, jsonify, stream_with_context, g, session, abort
 from werkzeug.security import check_password_hash
-from numpy import array, unwrap, mean, trunc, sqrt, zeros, ones, shape, arctan2, int64, concatenate, transpose, arange, ndindex
+from numpy import array, unwrap, mean, trunc, sqrt, zeros, ones, shape, arctan2, int64, concatenate, transpose, arange, ndindex, column_stack, ma
 from time import sleep, strptime, mktime 
 from datetime import timedelta, datetime
 from random import random
 import numba as nb
 from importlib import import_module as im
+from functools import wraps
 
-from pyqum import get_db, close_db
+from pyqum import get_db, db_transaction
 from pyqum.instrument.logger import get_status, set_status, set_mat, set_csv, clocker, mac_for_ip, lisqueue, lisjob, \
-                                        measurement, qout, jobsearch, set_json_measurementinfo, jobtag, jobnote, jobsinqueue, check_sample_alignment
-from pyqum.instrument.toolbox import cdatasearch, gotocdata, waveform
-from pyqum.instrument.analyzer import IQAP, UnwraPhase, pulseresp_sampler, IQAParray
+                                        measurement, qout, jobsearch, set_json_measurementinfo, jobtag, jobnote, jobsinqueue, check_sample_alignment, LOD, jobfilestamp
+from pyqum.instrument.toolbox import cdatasearch, gotocdata, waveform, packbinary
+from pyqum.instrument.analyzer import IQAP, UnwraPhase, pulseresp_sampler, IQAParray, envelope_index, block_mean
 from pyqum.instrument.reader import inst_order
 from pyqum.directive.characterize import F_Response, CW_Sweep, SQE_Pulse
 from pyqum.directive.manipulate import Single_Qubit
@@ -38,7 +39,6 @@ from scipy import constants as cnst
 
 # subprocess to cmd
 from multiprocessing import Pool
-from subprocess import Popen, PIPE, STDOUT
 import os, signal
 
 # endregion
@@ -70,6 +70,53 @@ def worker(y_count,x_count,char_name="sqepulse"):
                      array(rA).reshape(y_count,x_count).tolist(), array(rP).reshape(y_count,x_count).tolist()
     return {'rI': rI, 'rQ': rQ, 'rA': rA, 'rP': rP}
 # endregion
+
+# region: Level-of-Detail for plot-data:
+def decimate_1d(payload, resolution, xkey, envelopekey):
+    '''pick min/max envelope of <envelopekey> for every trace sharing the <xkey>-axis'''
+    n = len(payload.get(xkey) or [])
+    if n <= resolution or envelopekey not in payload: return payload
+    index = envelope_index(payload[envelopekey], resolution).tolist()
+    return {k: ([v[i] for i in index] if isinstance(v, list) and len(v)==n else v) for k, v in payload.items()}
+def decimate_2d(payload, resolution):
+    '''block-mean x, y & every ZZ-map down to <resolution> per axis'''
+    if len(payload.get('x') or []) <= resolution and len(payload.get('y') or []) <= resolution: return payload
+    decimated = dict(payload)
+    for k, v in payload.items():
+        if k in ('x', 'y'):
+            try: decimated[k] = block_mean(v, resolution).tolist()
+            except(TypeError, ValueError): decimated[k] = v[::-(-len(v)//resolution)] # non-numeric axis: take each block's first
+        elif k.startswith('ZZ'): decimated[k] = block_mean(v, resolution).tolist()
+    return decimated
+def plotpayload(mname, exportname, dimension=1, xkey='x', envelopekey='yA'):
+    '''Serve plot-data returned by the route as a dict:
+        resolution (request-arg, absent/0: full-resolution): decimated & cached in LOD keyed by (pqfile, slice, resolution), along with its full-resolution export
+        binary (request-arg, absent/0: JSON): packed into float32 typed-arrays by packbinary
+    '''
+    def decorator(route):
+        @wraps(route)
+        def wrapper():
+            resolution = int(request.args.get('resolution', 0))
+            if resolution > 0:
+                M = globals()[mname][session['user_name']]
+                slicekey = tuple(sorted((k, v) for k, v in request.args.items() if k not in ('resolution', 'binary')))
+                try: filesize = os.path.getsize(M.pqfile) # taken before the route reads the data, so the payload covers at least this much
+                except(OSError, AttributeError): filesize = None
+                cached = None if filesize is None else LOD.get(M.pqfile, slicekey, resolution, filesize)
+                if cached is None:
+                    payload = route()
+                    if dimension == 1: payload = decimate_1d(payload, resolution, xkey, envelopekey)
+                    else: payload = decimate_2d(payload, resolution)
+                    cached = (payload, globals()[exportname].get(session['user_name']))
+                    if filesize is not None: LOD.put(M.pqfile, slicekey, resolution, filesize, cached)
+                else: globals()[exportname][session['user_name']] = cached[1] # keep export in-sync with what is shown
+                payload = cached[0]
+            else: payload = route()
+            if int(request.args.get('binary', 0)): return Response(packbinary(payload), mimetype='application/octet-stream')
+            return jsonify(**payload)
+        return wrapper
+    return decorator
+# endregion
     
 # region: Main
 @bp.route('/')
@@ -90,7 +137,6 @@ def show(status="Mission started"):
 @bp.route('/all', methods=['GET'])
 def all(): 
     systemlist = [x['system'] for x in get_db().execute('SELECT system FROM queue').fetchall()]
-    close_db()
     if g.user:
         if int(g.user['measurement']): # 0: Preview, 1: Analysis, 2: Running, 3: SOP
             try: 
@@ -104,13 +150,13 @@ def all():
     else:
         return("<h3>WHO ARE YOU?</h3><h3>Please Kindly Login!</h3><h3>Courtesy from <a href='http://qum.phys.sinica.edu.tw:%s/auth/login'>HoDoR</a></h3>" %get_status("WEB")["port"])
     return render_template("blog/msson/all.html", systemlist=systemlist, queue=queue)
+JOB_FILESTAMPS = {} # JOBID: (size, mtime) of its data-file when its progress was last calculated by all_job
 @bp.route('/all/job', methods=['GET']) # PENDING: horizontal tabs for different Quantum Universal Machines in the future
 def all_job():
     queue = request.args.get('queue')
     jobsinqueue(queue)
     try: 
         missioname = get_db().execute( "SELECT mission FROM queue WHERE system = ?", (queue,) ).fetchone()['mission']
-        close_db()
     except: 
         missioname = None
     # print("mission: %s" %missioname)
@@ -119,25 +165,28 @@ def all_job():
     maxlist = 888
     joblist, Job_count = lisjob(samplename, queue, maxlist) # job is listed based on sample & queue only
 
-    # LOG Calculated Progress interactively into SQL-Database for fast retrieval
-    update_count = 0
+    # Progress is indexed into SQL-Database by settings (jobprogress) while measuring, 
+    # ONLY legacy jobs (never indexed) & unfinished jobs whose data-file has changed since (e.g. run killed in between) are calculated here:
+    progress_updates = []
     for j in joblist:
         # print("Progress: %s" %j['progress'])
         # print("j.tag: %s" %j['tag'])
         if (j['tag'] == "") and (j['id'] not in g.jobidlist) and (j['progress'] is None or j['progress'] < 100): # not allowing queued-job to be accessed to avoid database locks
+            stamp = jobfilestamp(owner, samplename, missioname, j['dateday'], j['task'], j['wmoment'])
+            if j['progress'] is not None and JOB_FILESTAMPS.get(j['id'], False) == stamp: continue # unchanged since last calculated
+            JOB_FILESTAMPS[j['id']] = stamp
             try:
                 meas = measurement(mission=missioname, task=j['task'], owner=owner, sample=samplename) # but data is stored according to the owner of the sample
                 meas.selectday(meas.daylist.index(j['dateday']))
                 meas.selectmoment(j['wmoment'])
                 meas.accesstructure()
+                if meas.data_progress != j['progress']: progress_updates.append((meas.data_progress,j['id']))
                 j['progress'] = meas.data_progress
-                db = get_db()
-                db.execute('UPDATE job SET progress = ? WHERE id = ?', (j['progress'],j['id']))
-                db.commit()
-                close_db()
-                update_count += 1
             except(ValueError): j['progress'] = 0 # for job w/o its bag yet
             except(TypeError): return("<h3>RE-LOGIN DETECTED</h3><h3>Please press <USERNAME> on TOP-RIGHT to proceed.</h3><h3 style='color:blue;'>Courtesy from HoDoR</h3>")
+    if progress_updates:
+        with db_transaction() as db: db.executemany('UPDATE job SET progress = ? WHERE id = ?', progress_updates)
+    update_count = len(progress_updates)
 
     # Security:
     try: print(Fore.GREEN + "User %s is accessing the jobs" %g.user['username'])
@@ -393,7 +442,6 @@ def char_fresp_resetdata():
     truncateafter = int(request.args.get('truncateafter'))
     db = get_db()
     people = db.execute( 'SELECT password FROM user WHERE username = ?', (session['people'],) ).fetchone()
-    close_db()
     if check_password_hash(people['password'], ownerpassword): message = M_fresp[session['user_name']].resetdata(truncateafter)
     else: message = 'PASSWORD NOT VALID'
 
@@ -401,6 +449,7 @@ def char_fresp_resetdata():
 
 # Chart is supposedly shared by all measurements (under construction for nulti-purpose)
 @bp.route('/char/' + frespcryption + '/1ddata', methods=['GET'])
+@plotpayload('M_fresp', 'fresp_1Ddata', xkey='x1', envelopekey='y1')
 def char_fresp_1ddata():
     print(Fore.GREEN + "User %s is plotting 1D-Data" %session['user_name'])
     M_fresp[session['user_name']].loadata()
@@ -417,8 +466,8 @@ def char_fresp_1ddata():
         title = "<b>Flux-Bias(V)</b>"
         selected_sweep = M_fresp[session['user_name']].corder['Flux-Bias']
         selected_progress = waveform(selected_sweep).data[0:session['c_fresp_address'][0]+1]
-        selected_I = [selectedata[gotocdata([x, int(isparam), int(iifb), int(ipowa), 2*int(ifreq)], session['c_fresp_structure'])] for x in range(session['c_fresp_address'][0]+1)]
-        selected_Q = [selectedata[gotocdata([x, int(isparam), int(iifb), int(ipowa), 2*int(ifreq)+1], session['c_fresp_structure'])] for x in range(session['c_fresp_address'][0]+1)]
+        selected_I = list(selectedata[gotocdata((arange(session['c_fresp_address'][0]+1), int(isparam), int(iifb), int(ipowa), 2*int(ifreq)), session['c_fresp_structure'])])
+        selected_Q = list(selectedata[gotocdata((arange(session['c_fresp_address'][0]+1), int(isparam), int(iifb), int(ipowa), 2*int(ifreq)+1), session['c_fresp_structure'])])
     elif isparam == "x":
         pass
     elif iifb == "x":
@@ -427,14 +476,14 @@ def char_fresp_1ddata():
         title = "<b>Power(dBm)</b>"
         selected_sweep = M_fresp[session['user_name']].corder['Power']
         selected_progress = waveform(selected_sweep).data[0:session['c_fresp_address'][3]+1]
-        selected_I = [selectedata[gotocdata([int(ifluxbias), int(isparam), int(iifb), x, 2*int(ifreq)], session['c_fresp_structure'])] for x in range(session['c_fresp_address'][3]+1)]
-        selected_Q = [selectedata[gotocdata([int(ifluxbias), int(isparam), int(iifb), x, 2*int(ifreq)+1], session['c_fresp_structure'])] for x in range(session['c_fresp_address'][3]+1)]
+        selected_I = list(selectedata[gotocdata((int(ifluxbias), int(isparam), int(iifb), arange(session['c_fresp_address'][3]+1), 2*int(ifreq)), session['c_fresp_structure'])])
+        selected_Q = list(selectedata[gotocdata((int(ifluxbias), int(isparam), int(iifb), arange(session['c_fresp_address'][3]+1), 2*int(ifreq)+1), session['c_fresp_structure'])])
     elif ifreq == "x":
         title = "<b>frequency(GHz)</b>"
         selected_sweep = M_fresp[session['user_name']].corder['Frequency']
         selected_progress = waveform(selected_sweep).data # Full sweep
-        selected_I = [selectedata[gotocdata([int(ifluxbias), int(isparam), int(iifb), int(ipowa), 2*x], session['c_fresp_structure'])] for x in range(waveform(selected_sweep).count)]
-        selected_Q = [selectedata[gotocdata([int(ifluxbias), int(isparam), int(iifb), int(ipowa), 2*x+1], session['c_fresp_structure'])] for x in range(waveform(selected_sweep).count)]
+        selected_I = list(selectedata[gotocdata((int(ifluxbias), int(isparam), int(iifb), int(ipowa), 2*arange(waveform(selected_sweep).count)), session['c_fresp_structure'])])
+        selected_Q = list(selectedata[gotocdata((int(ifluxbias), int(isparam), int(iifb), int(ipowa), 2*arange(waveform(selected_sweep).count)+1), session['c_fresp_structure'])])
     
     # Preparing data:
     MagPha = [IQAP(x[0],x[1]) for x in zip(selected_I, selected_Q)]
@@ -444,9 +493,10 @@ def char_fresp_1ddata():
     x1, y1, y2 = selected_progress, Amp, list(UnwraPhase(selected_progress, Pha)) #list(unwrap(Pha)) 
     fresp_1Ddata[session['user_name']] = {title: x1, 'Amplitude': y1, 'UPhase': y2, 'I': selected_I, 'Q': selected_Q, "exported by": session['user_name']}
     
-    return jsonify(x1=x1, y1=y1, y2=y2, title=title)
+    return dict(x1=x1, y1=y1, y2=y2, title=title)
 @nb.jit(nopython=True)
 @bp.route('/char/' + frespcryption + '/2ddata', methods=['GET'])
+@plotpayload('M_fresp', 'fresp_2Ddata', dimension=2)
 def char_fresp_2ddata():
     print(Fore.GREEN + "User %s is plotting 2D-Data" %session['user_name'])
     M_fresp[session['user_name']].loadata()
@@ -465,12 +515,10 @@ def char_fresp_2ddata():
         x_count, y_count = session['c_fresp_address'][0]+1, waveform(M_fresp[session['user_name']].corder['Frequency']).count
 
         stage, prev = clocker(0)
-        fresp_addresses_0 = concatenate(((ones([1,1])*arange(x_count)).T, ones([x_count,1])*array([int(isparam),int(iifb),int(ipowa)])), axis=1) # 2D stack of addresses
-        IQstack, INPLANE, QUAD, Amp, Pha = zeros([x_count,2]), zeros([y_count,x_count]), zeros([y_count,x_count]), zeros([y_count,x_count]), zeros([y_count,x_count])
-        for j in range(y_count):
-            IQstack[:,0] = selectedata[gotocdata(concatenate((fresp_addresses_0, 2*j*ones([x_count,1])), axis=1), session['c_fresp_structure'])]
-            IQstack[:,1] = selectedata[gotocdata(concatenate((fresp_addresses_0, (2*j+1)*ones([x_count,1])), axis=1), session['c_fresp_structure'])]
-            INPLANE[j,:], QUAD[j,:], Amp[j,:], Pha[j,:] = IQAParray(IQstack, interlace=False)
+        xgrid, ygrid = arange(x_count).reshape(1,x_count), arange(y_count).reshape(y_count,1) # 2D grid of addresses
+        INPLANE = selectedata[gotocdata((xgrid, int(isparam), int(iifb), int(ipowa), 2*ygrid), session['c_fresp_structure'])]
+        QUAD = selectedata[gotocdata((xgrid, int(isparam), int(iifb), int(ipowa), 2*ygrid+1), session['c_fresp_structure'])]
+        INPLANE, QUAD, Amp, Pha = [z.reshape(y_count,x_count) for z in IQAParray(column_stack((INPLANE.ravel(), QUAD.ravel())), interlace=False)]
         stage, prev = clocker(stage, prev, agenda="2D-Plot for flux-frequency") # Marking time
 
     elif ipowa == "x" and ifreq == "y":
@@ -480,12 +528,10 @@ def char_fresp_2ddata():
         x_count, y_count = session['c_fresp_address'][3]+1, waveform(M_fresp[session['user_name']].corder['Frequency']).count
 
         stage, prev = clocker(0)
-        fresp_addresses_0 = concatenate((ones([x_count,1])*array([int(ifluxbias),int(isparam),int(iifb)]), (ones([1,1])*arange(x_count)).T), axis=1) # 2D stack of addresses
-        IQstack, INPLANE, QUAD, Amp, Pha = zeros([x_count,2]), zeros([y_count,x_count]), zeros([y_count,x_count]), zeros([y_count,x_count]), zeros([y_count,x_count])
-        for j in range(y_count):
-            IQstack[:,0] = selectedata[gotocdata(concatenate((fresp_addresses_0, 2*j*ones([x_count,1])), axis=1), session['c_fresp_structure'])]
-            IQstack[:,1] = selectedata[gotocdata(concatenate((fresp_addresses_0, (2*j+1)*ones([x_count,1])), axis=1), session['c_fresp_structure'])]
-            INPLANE[j,:], QUAD[j,:], Amp[j,:], Pha[j,:] = IQAParray(IQstack, interlace=False)
+        xgrid, ygrid = arange(x_count).reshape(1,x_count), arange(y_count).reshape(y_count,1) # 2D grid of addresses
+        INPLANE = selectedata[gotocdata((int(ifluxbias), int(isparam), int(iifb), xgrid, 2*ygrid), session['c_fresp_structure'])]
+        QUAD = selectedata[gotocdata((int(ifluxbias), int(isparam), int(iifb), xgrid, 2*ygrid+1), session['c_fresp_structure'])]
+        INPLANE, QUAD, Amp, Pha = [z.reshape(y_count,x_count) for z in IQAParray(column_stack((INPLANE.ravel(), QUAD.ravel())), interlace=False)]
         stage, prev = clocker(stage, prev, agenda="2D-Plot for power-frequency") # Marking time
 
     elif ifluxbias == "x" and ipowa == "y":
@@ -496,7 +542,7 @@ def char_fresp_2ddata():
     ZZI, ZZQ, ZZA, ZZP = INPLANE.tolist(), QUAD.tolist(), Amp.tolist(), Pha.tolist()
     fresp_2Ddata[session['user_name']] = dict(x=x, y=y, ZZI=ZZI, ZZQ=ZZQ, ZZA=ZZA, ZZP=ZZP, xtitle=xtitle, ytitle=ytitle)
 
-    return jsonify(message=message, x=x, y=y, ZZA=ZZA, ZZP=ZZP, xtitle=xtitle, ytitle=ytitle)
+    return dict(message=message, x=x, y=y, ZZA=ZZA, ZZP=ZZP, xtitle=xtitle, ytitle=ytitle)
 # endregion
 
 # region: CHAR -> 2. CW-Sweeping =============================================================================================================================================
@@ -686,7 +732,6 @@ def char_cwsweep_resetdata():
 
     db = get_db()
     people = db.execute('SELECT password FROM user WHERE username = ?', (session['people'],)).fetchone()
-    close_db()
 
     if check_password_hash(people['password'], ownerpassword): message = M_cwsweep[session['user_name']].resetdata(truncateafter)
     else: message = 'PASSWORD NOT VALID'
@@ -695,10 +740,11 @@ def char_cwsweep_resetdata():
 
 # Chart is supposedly shared by all measurements (under construction for multi-purpose)
 @bp.route('/char/cwsweep/1ddata', methods=['GET'])
+@plotpayload('M_cwsweep', 'cwsweep_1Ddata', xkey='x1', envelopekey='y1')
 def char_cwsweep_1ddata():
     print(Fore.GREEN + "User %s is plotting 1D-Data" %session['user_name'])
     M_cwsweep[session['user_name']].loadata()
-    selectedata = M_cwsweep[session['user_name']].selectedata
+    cdata = M_cwsweep[session['user_name']].asarray(session['c_cwsweep_structure']) # [repeat, flux, xyfreq, xypowa, sparam, ifb, freq, powa, IQ]
     
     # load parameter indexes from json call:
     irepeat = request.args.get('irepeat')
@@ -714,14 +760,15 @@ def char_cwsweep_1ddata():
     # pre-transform ipowa:
     xpowa = waveform(M_cwsweep[session['user_name']].corder['Power'])
     ipowa_repeat = xpowa.inner_repeat
+    if "x" not in ipowa: rpowa = slice(int(ipowa)*ipowa_repeat, (int(ipowa)+1)*ipowa_repeat) # repeating power
 
     # selecting data:
     if noise:
         # THE OPTION TO EXPLORE REPEATED_POWER_DATA: "NOISE" DATA:
         xtitle = "<b>Repeated#</b>"
         xsweep = range(ipowa_repeat)
-        selected_I = [selectedata[gotocdata([int(irepeat), int(ifluxbias), int(ixyfreq), int(ixypowa), int(isparam), int(iifb), int(ifreq), 2*(int(ipowa)*ipowa_repeat+x)], session['c_cwsweep_structure'])] for x in xsweep]
-        selected_Q = [selectedata[gotocdata([int(irepeat), int(ifluxbias), int(ixyfreq), int(ixypowa), int(isparam), int(iifb), int(ifreq), 2*(int(ipowa)*ipowa_repeat+x)+1], session['c_cwsweep_structure'])] for x in xsweep]
+        IQdata = ma.filled(cdata[int(irepeat), int(ifluxbias), int(ixyfreq), int(ixypowa), int(isparam), int(iifb), int(ifreq), rpowa], 0)
+        selected_I, selected_Q = list(IQdata[:,0]), list(IQdata[:,1])
     elif "x" in ifluxbias:
         xtitle = "<b>Flux-Bias(V/A)</b>"
         selected_sweep = M_cwsweep[session['user_name']].corder['Flux-Bias']
@@ -731,14 +778,10 @@ def char_cwsweep_1ddata():
             xsweep = range(session['c_cwsweep_structure'][1]) # can access full-range if selection is well within progress resume-point
         else: xsweep = range(session['c_cwsweep_address'][1]+1) # can only access until progress resume-point
 
-        selected_Ir, selected_Qr = [], []
-        for i_prepeat in range(ipowa_repeat): # PENDING: VECTORIZE the for-loop!
-            r_powa = int(ipowa) * ipowa_repeat + i_prepeat # from the beginning position of repeating power
-            selected_Ir += [selectedata[gotocdata([int(irepeat), x, int(ixyfreq), int(ixypowa), int(isparam), int(iifb), int(ifreq), 2*r_powa], session['c_cwsweep_structure'])] for x in xsweep]
-            selected_Qr += [selectedata[gotocdata([int(irepeat), x, int(ixyfreq), int(ixypowa), int(isparam), int(iifb), int(ifreq), 2*r_powa+1], session['c_cwsweep_structure'])] for x in xsweep]
+        IQdata = ma.filled(cdata[int(irepeat), :len(xsweep), int(ixyfreq), int(ixypowa), int(isparam), int(iifb), int(ifreq), rpowa], 0) # [x, repeat, IQ]
         # AVERAGE up those power repeats:
-        selected_I = list(mean(array(selected_Ir).reshape(ipowa_repeat, len(xsweep)), axis=0))
-        selected_Q = list(mean(array(selected_Qr).reshape(ipowa_repeat, len(xsweep)), axis=0))
+        selected_I = list(mean(IQdata[:,:,0], axis=1))
+        selected_Q = list(mean(IQdata[:,:,1], axis=1))
     elif "x" in ixyfreq:
         xtitle = "<b>XY-Frequency(GHz)</b>"
         selected_sweep = M_cwsweep[session['user_name']].corder['XY-Frequency']
@@ -747,14 +790,10 @@ def char_cwsweep_1ddata():
             xsweep = range(session['c_cwsweep_structure'][2]) # can access full-range if selection is well within progress resume-point
         else: xsweep = range(session['c_cwsweep_address'][2]+1) # can only access until progress resume-point
         
-        selected_Ir, selected_Qr = [], []
-        for i_prepeat in range(ipowa_repeat):
-            r_powa = int(ipowa) * ipowa_repeat + i_prepeat # from the beginning position of repeating power
-            selected_Ir += [selectedata[gotocdata([int(irepeat), int(ifluxbias), x, int(ixypowa), int(isparam), int(iifb), int(ifreq), 2*r_powa], session['c_cwsweep_structure'])] for x in xsweep]
-            selected_Qr += [selectedata[gotocdata([int(irepeat), int(ifluxbias), x, int(ixypowa), int(isparam), int(iifb), int(ifreq), 2*r_powa+1], session['c_cwsweep_structure'])] for x in xsweep]
+        IQdata = ma.filled(cdata[int(irepeat), int(ifluxbias), :len(xsweep), int(ixypowa), int(isparam), int(iifb), int(ifreq), rpowa], 0) # [x, repeat, IQ]
         # AVERAGE up those power repeats:
-        selected_I = list(mean(array(selected_Ir).reshape(ipowa_repeat, len(xsweep)), axis=0))
-        selected_Q = list(mean(array(selected_Qr).reshape(ipowa_repeat, len(xsweep)), axis=0))
+        selected_I = list(mean(IQdata[:,:,0], axis=1))
+        selected_Q = list(mean(IQdata[:,:,1], axis=1))
     elif "x" in ixypowa:
         xtitle = "<b>XY-Power(dBm)</b>"
         selected_sweep = M_cwsweep[session['user_name']].corder['XY-Power']
@@ -763,14 +802,10 @@ def char_cwsweep_1ddata():
             xsweep = range(session['c_cwsweep_structure'][3]) # can access full-range if selection is well within progress resume-point
         else: xsweep = range(session['c_cwsweep_address'][3]+1) # can only access until progress resume-point
         
-        selected_Ir, selected_Qr = [], []
-        for i_prepeat in range(ipowa_repeat):
-            r_powa = int(ipowa) * ipowa_repeat + i_prepeat # from the beginning position of repeating power
-            selected_Ir += [selectedata[gotocdata([int(irepeat), int(ifluxbias), int(ixyfreq), x, int(isparam), int(iifb), int(ifreq), 2*r_powa], session['c_cwsweep_structure'])] for x in xsweep]
-            selected_Qr += [selectedata[gotocdata([int(irepeat), int(ifluxbias), int(ixyfreq), x, int(isparam), int(iifb), int(ifreq), 2*r_powa+1], session['c_cwsweep_structure'])] for x in xsweep]
+        IQdata = ma.filled(cdata[int(irepeat), int(ifluxbias), int(ixyfreq), :len(xsweep), int(isparam), int(iifb), int(ifreq), rpowa], 0) # [x, repeat, IQ]
         # AVERAGE up those power repeats:
-        selected_I = list(mean(array(selected_Ir).reshape(ipowa_repeat, len(xsweep)), axis=0))
-        selected_Q = list(mean(array(selected_Qr).reshape(ipowa_repeat, len(xsweep)), axis=0))
+        selected_I = list(mean(IQdata[:,:,0], axis=1))
+        selected_Q = list(mean(IQdata[:,:,1], axis=1))
     
     elif "x" in isparam:
         pass
@@ -785,14 +820,10 @@ def char_cwsweep_1ddata():
             xsweep = range(session['c_cwsweep_structure'][6]) # can access full-range if selection is well within progress resume-point
         else: xsweep = range(session['c_cwsweep_address'][6]+1) # can only access until progress resume-point
         
-        selected_Ir, selected_Qr = [], []
-        for i_prepeat in range(ipowa_repeat):
-            r_powa = int(ipowa) * ipowa_repeat + i_prepeat # from the beginning position of repeating power
-            selected_Ir += [selectedata[gotocdata([int(irepeat), int(ifluxbias), int(ixyfreq), int(ixypowa), int(isparam), int(iifb), x, 2*r_powa], session['c_cwsweep_structure'])] for x in xsweep]
-            selected_Qr += [selectedata[gotocdata([int(irepeat), int(ifluxbias), int(ixyfreq), int(ixypowa), int(isparam), int(iifb), x, 2*r_powa+1], session['c_cwsweep_structure'])] for x in xsweep]
+        IQdata = ma.filled(cdata[int(irepeat), int(ifluxbias), int(ixyfreq), int(ixypowa), int(isparam), int(iifb), :len(xsweep), rpowa], 0) # [x, repeat, IQ]
         # AVERAGE up those power repeats:
-        selected_I = list(mean(array(selected_Ir).reshape(ipowa_repeat, len(xsweep)), axis=0))
-        selected_Q = list(mean(array(selected_Qr).reshape(ipowa_repeat, len(xsweep)), axis=0))
+        selected_I = list(mean(IQdata[:,:,0], axis=1))
+        selected_Q = list(mean(IQdata[:,:,1], axis=1))
     elif "x" in ipowa:
         xtitle = "<b>Power(dBm)</b>"
         xpowa_repeat = ipowa_repeat
@@ -801,11 +832,11 @@ def char_cwsweep_1ddata():
             xsweep = range(session['c_cwsweep_structure'][7] // 2) # can access full-range if selection is well within progress resume-point
         else: xsweep = range((session['c_cwsweep_address'][7]+1) // 2) # can only access until progress resume-point
         
-        selected_Ir = [selectedata[gotocdata([int(irepeat), int(ifluxbias), int(ixyfreq), int(ixypowa), int(isparam), int(iifb), int(ifreq), 2*x], session['c_cwsweep_structure'])] for x in xsweep]
-        selected_Qr = [selectedata[gotocdata([int(irepeat), int(ifluxbias), int(ixyfreq), int(ixypowa), int(isparam), int(iifb), int(ifreq), 2*x+1], session['c_cwsweep_structure'])] for x in xsweep]
+        IQdata = ma.filled(cdata[int(irepeat), int(ifluxbias), int(ixyfreq), int(ixypowa), int(isparam), int(iifb), int(ifreq), :len(xsweep)], 0)
+        selected_Ir, selected_Qr = IQdata[:,0], IQdata[:,1]
         # AVERAGE up those repeated IQ-pairs:
-        selected_I = list(mean(array(selected_Ir).reshape(len(xsweep)//xpowa_repeat, xpowa_repeat), axis=1)) #-->
-        selected_Q = list(mean(array(selected_Qr).reshape(len(xsweep)//xpowa_repeat, xpowa_repeat), axis=1)) #-->
+        selected_I = list(mean(selected_Ir.reshape(len(xsweep)//xpowa_repeat, xpowa_repeat), axis=1)) #-->
+        selected_Q = list(mean(selected_Qr.reshape(len(xsweep)//xpowa_repeat, xpowa_repeat), axis=1)) #-->
 
     # preparing data:
     # assembly amplitude & phase:
@@ -826,10 +857,27 @@ def char_cwsweep_1ddata():
     x1, y1, yup, yp = selected_progress, Amp, list(UnwraPhase(selected_progress, Pha)), Pha #list(unwrap(Pha)) 
     cwsweep_1Ddata[session['user_name']] = {xtitle: x1, 'Amplitude': y1, 'UPhase': yup, 'I': selected_I, 'Q': selected_Q, "exported by": session['user_name']}
     
-    return jsonify(x1=x1, y1=y1, yup=yup, yp=yp, x1title=xtitle, selected_I=selected_I, selected_Q=selected_Q)
+    return dict(x1=x1, y1=y1, yup=yup, yp=yp, x1title=xtitle, selected_I=selected_I, selected_Q=selected_Q)
 
 # Pending renovation below:
+def cwsweep_2dslice(cdata, caddress, x_name, y_name, x_count, y_count, powa_repeat):
+    '''Vectorized 2D-extraction straight off the C-Structure view of CW-Sweep:\n
+        cdata: [repeat, fluxbias, xyfreq, xypowa, sparam, ifb, freq, powa*powa_repeat, IQ]
+        caddress: {parameter-name: index} for the fixed (non x/y) parameters
+        return: I, Q, Amp, Pha of shape (y_count, x_count), averaged along power-repeat
+    '''
+    cnames = ["repeat", "fluxbias", "xyfreq", "xypowa", "sparam", "ifb", "freq", "powa"]
+    cdata = cdata.reshape(cdata.shape[:-2] + (cdata.shape[-2]//powa_repeat, powa_repeat, 2)) # separate power-repeat from power
+    cslice = tuple(slice(x_count) if c == x_name else slice(y_count) if c == y_name else int(caddress[c]) for c in cnames)
+    IQdata = ma.filled(cdata[cslice].mean(axis=-2), 0) # AVERAGE up those power repeats
+    if cnames.index(x_name) < cnames.index(y_name): IQdata = IQdata.swapaxes(0,1) # into (y, x, IQ)
+    I, Q = IQdata[:,:,0], IQdata[:,:,1]
+    Amp, Pha = IQAParray(column_stack((I.ravel(), Q.ravel())), interlace=False)[2:]
+    Amp[(I.ravel()==0) & (Q.ravel()==0)] = -1000 # same as IQAP
+    return I, Q, Amp.reshape(I.shape), Pha.reshape(I.shape)
+
 @bp.route('/char/cwsweep/2ddata', methods=['GET'])
+@plotpayload('M_cwsweep', 'cwsweep_2Ddata', dimension=2)
 def char_cwsweep_2ddata():
     irepeat = request.args.get('irepeat')     # 0
     ifluxbias = request.args.get('ifluxbias') # 1
@@ -841,15 +889,7 @@ def char_cwsweep_2ddata():
     ipowa = request.args.get('ipowa')         # 7
 
     # pre-transform ipowa:
-    powa_order = M_cwsweep[session['user_name']].corder['Power']
-
-    # preparing MPW dictionary
-    dict_for_MPW = {
-            "pqfile": str(M_cwsweep[session['user_name']].pqfile), "datalocation": M_cwsweep[session['user_name']].datalocation, "writtensize": M_cwsweep[session['user_name']].writtensize,
-            "c_cwsweep_structure": session['c_cwsweep_structure'], "irepeat": irepeat, "ifluxbias": ifluxbias, "ixyfreq": ixyfreq, "ixypowa": ixypowa, 
-            "isparam": isparam, "iifb": iifb, "ifreq": ifreq, "ipowa": ipowa, "powa_order": powa_order
-        }
-    set_status("MPW", dict_for_MPW)
+    powa_repeat = waveform(M_cwsweep[session['user_name']].corder['Power']).inner_repeat
 
     # Check progress:
     if not M_cwsweep[session['user_name']].data_progress%100:
@@ -952,27 +992,21 @@ def char_cwsweep_2ddata():
     else: message = "Please reverse X-ALL and Y-ALL order, OR just using compare-1D instead"
     print(Fore.YELLOW + "PLOTTING: %s" %message)
 
-    # fast iteration method (parallel computing):
+    # vectorized slicing on the memory-mapped data (in-process):
     stage, prev = clocker(0)
-    CMD = ["python", "-c", "from pyqum.directive import MP_cwsweep as mp; print(mp.worker(%s,%s,'%s','%s'))"%(y_count,x_count,y_name,x_name)]
-    with Popen(CMD, stdout=PIPE, shell=True) as proc:
-        doutput = proc.stdout.read().decode("utf-8")
-        # print(Fore.BLACK + Back.YELLOW + "MP_cwsweep: %s" %doutput)
-        output = json.loads(doutput.replace("\'", "\""))
-        # try: os.kill(os.getppid(), signal.SIGTERM) # terminate parent process
-        # except: pass
-    Amp = output['rA']
-    Pha = output['rP'] # Raw Phase that is wrapped around -pi and pi
-    stage, prev = clocker(stage, prev) # Marking time
-
-    print(Fore.GREEN + "(x,y) is of length (%s,%s) and of type (%s,%s)\nAmp is of shape %s" %(len(x),len(y),type(x),type(y),str(array(Amp).shape)))
-    print(Fore.CYAN + "CPU CORES: %s, x: %s, y: %s" %(output['coresum'],output['x'],output['y']))
-    ZZA, ZZP = Amp, Pha
+    M_cwsweep[session['user_name']].loadata()
+    cdata = M_cwsweep[session['user_name']].asarray(session['c_cwsweep_structure'])
+    caddress = dict(repeat=irepeat, fluxbias=ifluxbias, xyfreq=ixyfreq, xypowa=ixypowa, sparam=isparam, ifb=iifb, freq=ifreq, powa=ipowa)
+    INPLANE, QUAD, Amp, Pha = cwsweep_2dslice(cdata, caddress, x_name, y_name, x_count, y_count, powa_repeat) # Raw Phase that is wrapped around -pi and pi
+    stage, prev = clocker(stage, prev, agenda="2D-Plot for %s-%s" %(x_name, y_name)) # Marking time
+
+    print(Fore.GREEN + "(x,y) is of length (%s,%s) and of type (%s,%s)\nAmp is of shape %s" %(len(x),len(y),type(x),type(y),str(Amp.shape)))
+    ZZI, ZZQ, ZZA, ZZP = INPLANE.tolist(), QUAD.tolist(), Amp.tolist(), Pha.tolist()
     
-    cwsweep_2Ddata[session['user_name']] = dict(x=x, y=y, ZZA=ZZA, ZZP=ZZP, xtitle=xtitle, ytitle=ytitle)
+    cwsweep_2Ddata[session['user_name']] = dict(x=x, y=y, ZZI=ZZI, ZZQ=ZZQ, ZZA=ZZA, ZZP=ZZP, xtitle=xtitle, ytitle=ytitle)
 
     # x = list(range(len(x))) # for repetitive data
-    return jsonify(message=message, x=x, y=y, ZZA=ZZA, ZZP=ZZP, xtitle=xtitle, ytitle=ytitle)
+    return dict(message=message, x=x, y=y, ZZA=ZZA, ZZP=ZZP, xtitle=xtitle, ytitle=ytitle)
 # endregion
 
 # region: CHAR -> 3. SQE-Pulsing =============================================================================================================================================
@@ -1141,7 +1175,6 @@ def char_sqepulse_resetdata():
 
     db = get_db()
     people = db.execute('SELECT password FROM user WHERE username = ?', (session['people'],)).fetchone()
-    close_db()
 
     if check_password_hash(people['password'], ownerpassword): message = M_sqepulse[session['user_name']].resetdata(truncateafter)
     else: message = 'PASSWORD NOT VALID'
@@ -1150,6 +1183,7 @@ def char_sqepulse_resetdata():
 
 # Chart is supposedly shared by all measurements (under construction for multi-purpose)
 @bp.route('/char/sqepulse/1ddata', methods=['GET'])
+@plotpayload('M_sqepulse', 'sqepulse_1Ddata')
 def char_sqepulse_1ddata():
     print(Fore.GREEN + "User %s is plotting SQEPULSE 1D-Data" %session['user_name'])
     M_sqepulse[session['user_name']].loadata()
@@ -1184,26 +1218,25 @@ def char_sqepulse_1ddata():
                 isweep = range(sweepables) # flexible access until progress resume-point
             print(Back.WHITE + Fore.BLACK + "Sweeping %s points" %len(isweep))
 
-            Idata = zeros(len(isweep))
-            Qdata = zeros(len(isweep))
-            Adata = zeros(len(isweep))
-            Pdata = zeros(len(isweep))
-            for i in isweep:
-                selected_caddress[CParameters['SQE_Pulse'].index(k)] = i # register x-th position
-                if [c for c in cselect.values()][-1] == "s": # sampling mode currently limited to time-range (last 'basic' parameter) only
+            if [c for c in cselect.values()][-1] == "s": # sampling mode currently limited to time-range (last 'basic' parameter) only
+                Idata = zeros(len(isweep))
+                Qdata = zeros(len(isweep))
+                Adata = zeros(len(isweep))
+                Pdata = zeros(len(isweep))
+                for i in isweep:
+                    selected_caddress[CParameters['SQE_Pulse'].index(k)] = i # register x-th position
                     srange = request.args.get('srange').split(",") # sample range
                     smode = request.args.get('smode') # sampling mode
                     Idata[i], Qdata[i], Adata[i], Pdata[i] = \
                         pulseresp_sampler(srange, selected_caddress, selectedata, session['c_sqepulse_structure'], M_sqepulse[session['user_name']].datadensity, mode=smode)
-                else:
-                    # Ground level Pulse shape response:
-                    selected_caddress = [int(s) for s in selected_caddress]
-                    Basic = selected_caddress[-1]
-                    # Extracting I & Q:
-                    Idata[i] = selectedata[gotocdata(selected_caddress[:-1]+[2*Basic], session['c_sqepulse_structure'])]
-                    Qdata[i] = selectedata[gotocdata(selected_caddress[:-1]+[2*Basic+1], session['c_sqepulse_structure'])]
-                    Adata[i] = sqrt(Idata[i]**2 + Qdata[i]**2)
-                    Pdata[i] = arctan2(Qdata[i], Idata[i]) # -pi < phase < pi    
+            else:
+                # Ground level Pulse shape response (the whole x-sweep at once):
+                cslice = tuple(slice(len(isweep)) if s == 'x' else int(s) for s in selected_caddress)
+                # Extracting I & Q:
+                IQdata = ma.filled(M_sqepulse[session['user_name']].asarray(session['c_sqepulse_structure'])[cslice], 0)
+                Idata, Qdata = IQdata[:,0], IQdata[:,1]
+                Adata = sqrt(Idata**2 + Qdata**2)
+                Pdata = arctan2(Qdata, Idata) # -pi < phase < pi    
     
     # Improvisation before pending vectorization on the sampler:
 
@@ -1219,9 +1252,10 @@ def char_sqepulse_1ddata():
     x, yI, yQ, yA, yUFNP = selected_progress, list(Idata), list(Qdata), list(Adata), list(Pdata)
     sqepulse_1Ddata[session['user_name']] = {xtitle: x, 'I': yI, 'Q': yQ, 'A(V)': yA, 'UFNP(rad/x)': yUFNP, "exported by": session['user_name']}
     
-    return jsonify(x=x, yI=yI, yQ=yQ, yA=yA, yUFNP=yUFNP, xtitle=xtitle)
+    return dict(x=x, yI=yI, yQ=yQ, yA=yA, yUFNP=yUFNP, xtitle=xtitle)
 
 @bp.route('/char/sqepulse/2ddata', methods=['GET'])
+@plotpayload('M_sqepulse', 'sqepulse_2Ddata', dimension=2)
 def char_sqepulse_2ddata():
     print(Fore.GREEN + "User %s is plotting SQEPULSE 2D-Data using vectorization" %session['user_name'])
     M_sqepulse[session['user_name']].loadata()
@@ -1261,13 +1295,13 @@ def char_sqepulse_2ddata():
     print(Back.WHITE + Fore.BLACK + "Sweeping %s x-points" %len(xsweep))
     print(Back.WHITE + Fore.BLACK + "Sweeping %s y-points" %len(ysweep))
 
-    Idata = zeros([len(ysweep), len(xsweep)])
-    Qdata = zeros([len(ysweep), len(xsweep)])
-    for j in ysweep:
-        selected_caddress[CParameters['SQE_Pulse'].index(selected_y)] = j # register y-th position
-        for i in xsweep:
-            selected_caddress[CParameters['SQE_Pulse'].index(selected_x)] = i # register x-th position
-            if [c for c in cselect.values()][-1] == "s": # sampling mode currently limited to time-range (last 'basic' parameter) only
+    if [c for c in cselect.values()][-1] == "s": # sampling mode currently limited to time-range (last 'basic' parameter) only
+        Idata = zeros([len(ysweep), len(xsweep)])
+        Qdata = zeros([len(ysweep), len(xsweep)])
+        for j in ysweep:
+            selected_caddress[CParameters['SQE_Pulse'].index(selected_y)] = j # register y-th position
+            for i in xsweep:
+                selected_caddress[CParameters['SQE_Pulse'].index(selected_x)] = i # register x-th position
                 srange = request.args.get('srange').split(",") # sample range
 
                 if [int(srange[1]) , int(srange[0])] > [session['c_sqepulse_structure'][-1]//M_sqepulse[session['user_name']].datadensity] * 2:
@@ -1283,7 +1317,6 @@ def char_sqepulse_2ddata():
                     selected_caddress_I[:,-1] = 2 * array(range(int(srange[0]),int(srange[1])+1))
                     selected_caddress_Q[:,-1] = 2 * array(range(int(srange[0]),int(srange[1])+1)) + ones(active_len)
                     # Compressing I & Q of this sample range:
-                    selectedata = array(selectedata)
                     Idata_active = mean(selectedata[gotocdata(selected_caddress_I, session['c_sqepulse_structure'])])
                     Qdata_active = mean(selectedata[gotocdata(selected_caddress_Q, session['c_sqepulse_structure'])]) 
 
@@ -1298,21 +1331,18 @@ def char_sqepulse_2ddata():
                         selected_caddress_I[:,-1] = 2 * array(range(int(srange[2]),int(srange[3])+1))
                         selected_caddress_Q[:,-1] = 2 * array(range(int(srange[2]),int(srange[3])+1)) + ones(relax_len)
                         # Compressing I & Q of this sample range:
-                        selectedata = array(selectedata)
                         Idata_relax = mean(selectedata[gotocdata(selected_caddress_I, session['c_sqepulse_structure'])])
                         Qdata_relax = mean(selectedata[gotocdata(selected_caddress_Q, session['c_sqepulse_structure'])]) 
                     except(IndexError): Idata_relax, Qdata_relax = 0, 0
 
                     Idata[j,i] = Idata_active - Idata_relax
                     Qdata[j,i] = Qdata_active - Qdata_relax
-
-            else:
-                # Ground level Pulse shape response:
-                selected_caddress = [int(s) for s in selected_caddress]
-                Basic = selected_caddress[-1]
-                # Extracting I & Q:
-                Idata[j,i] = selectedata[gotocdata(selected_caddress[:-1]+[2*Basic], session['c_sqepulse_structure'])]
-                Qdata[j,i] = selectedata[gotocdata(selected_caddress[:-1]+[2*Basic+1], session['c_sqepulse_structure'])]  
+    else:
+        # Ground level Pulse shape response (plain indexing on the C-Structure view of the data):
+        cslice = tuple(slice(len(xsweep)) if s == 'x' else slice(len(ysweep)) if s == 'y' else int(s) for s in selected_caddress)
+        IQdata = ma.filled(M_sqepulse[session['user_name']].asarray(session['c_sqepulse_structure'])[cslice], 0)
+        if x_loc < y_loc: IQdata = IQdata.swapaxes(0,1) # into (y, x, IQ)
+        Idata, Qdata = IQdata[:,:,0], IQdata[:,:,1]
 
     print("Mapping complete. Structure: %s" %session['c_sqepulse_structure'])
     
@@ -1335,7 +1365,7 @@ def char_sqepulse_2ddata():
 
     sqepulse_2Ddata[session['user_name']] = dict(x=x, y=y, ZZI=ZZI, ZZQ=ZZQ, ZZA=ZZA, ZZUP=ZZUP, xtitle=xtitle, ytitle=ytitle)
 
-    return jsonify(x=x, y=y, ZZI=ZZI, ZZQ=ZZQ, ZZA=ZZA, ZZUP=ZZUP, xtitle=xtitle, ytitle=ytitle)
+    return dict(x=x, y=y, ZZI=ZZI, ZZQ=ZZQ, ZZA=ZZA, ZZUP=ZZUP, xtitle=xtitle, ytitle=ytitle)
 # endregion
 
 # region: MANI:
@@ -1568,7 +1598,6 @@ def mani_singleqb_resetdata():
 
     db = get_db()
     people = db.execute('SELECT password FROM user WHERE username = ?', (session['people'],)).fetchone()
-    close_db()
 
     if check_password_hash(people['password'], ownerpassword): message = M_singleqb[session['user_name']].resetdata(truncateafter)
     else: message = 'PASSWORD NOT VALID'
@@ -1578,6 +1607,7 @@ def mani_singleqb_resetdata():
 # DATA PRESENTATION:
 # Chart is supposedly shared by all measurements (under construction for multi-purpose)
 @bp.route('/mani/singleqb/1ddata', methods=['GET'])
+@plotpayload('M_singleqb', 'singleqb_1Ddata')
 def mani_singleqb_1ddata():
     print(Fore.GREEN + "User %s is plotting SINGLEQB 1D-Data" %session['user_name'])
     M_singleqb[session['user_name']].loadata()
@@ -1609,27 +1639,26 @@ def mani_singleqb_1ddata():
                 isweep = range(sweepables) # flexible access until progress resume-point
             print(Back.WHITE + Fore.BLACK + "Sweeping %s points" %len(isweep))
 
-            Idata = zeros(len(isweep))
-            Qdata = zeros(len(isweep))
-            Adata = zeros(len(isweep))
-            Pdata = zeros(len(isweep))
-            for i in isweep:
-                # PENDING: VECTORIZATION OR MULTI-PROCESS
-                selected_caddress[SQ_CParameters[session['user_name']].index(k)] = i # register x-th position
-                if [c for c in cselect.values()][-1] == "s": # sampling mode currently limited to time-range (last 'basic' parameter) only
+            if [c for c in cselect.values()][-1] == "s": # sampling mode currently limited to time-range (last 'basic' parameter) only
+                Idata = zeros(len(isweep))
+                Qdata = zeros(len(isweep))
+                Adata = zeros(len(isweep))
+                Pdata = zeros(len(isweep))
+                for i in isweep:
+                    # PENDING: VECTORIZATION OR MULTI-PROCESS
+                    selected_caddress[SQ_CParameters[session['user_name']].index(k)] = i # register x-th position
                     srange = request.args.get('srange').split(",") # sample range
                     smode = request.args.get('smode') # sampling mode
                     Idata[i], Qdata[i], Adata[i], Pdata[i] = \
                         pulseresp_sampler(srange, selected_caddress, selectedata, c_singleqb_structure[session['user_name']], M_singleqb[session['user_name']].datadensity, mode=smode)
-                else:
-                    # Ground level Pulse shape response:
-                    selected_caddress = [int(s) for s in selected_caddress]
-                    Basic = selected_caddress[-1]
-                    # Extracting I & Q:
-                    Idata[i] = selectedata[gotocdata(selected_caddress[:-1]+[2*Basic], c_singleqb_structure[session['user_name']])]
-                    Qdata[i] = selectedata[gotocdata(selected_caddress[:-1]+[2*Basic+1], c_singleqb_structure[session['user_name']])]
-                    Adata[i] = sqrt(Idata[i]**2 + Qdata[i]**2)
-                    Pdata[i] = arctan2(Qdata[i], Idata[i]) # -pi < phase < pi    
+            else:
+                # Ground level Pulse shape response (the whole x-sweep at once):
+                cslice = tuple(slice(len(isweep)) if s == 'x' else int(s) for s in selected_caddress)
+                # Extracting I & Q:
+                IQdata = ma.filled(M_singleqb[session['user_name']].asarray(c_singleqb_structure[session['user_name']])[cslice], 0)
+                Idata, Qdata = IQdata[:,0], IQdata[:,1]
+                Adata = sqrt(Idata**2 + Qdata**2)
+                Pdata = arctan2(Qdata, Idata) # -pi < phase < pi    
 
     print("Structure: %s" %c_singleqb_structure[session['user_name']])
 
@@ -1645,9 +1674,10 @@ def mani_singleqb_1ddata():
     x, yI, yQ, yA, yUFNP = selected_progress, list(Idata), list(Qdata), list(Adata), list(Pdata)
     singleqb_1Ddata[session['user_name']] = {xtitle: x, 'I': yI, 'Q': yQ, 'A(V)': yA, 'UFNP(rad/x)': yUFNP, "exported by": session['user_name']}
     
-    return jsonify(x=x, yI=yI, yQ=yQ, yA=yA, yUFNP=yUFNP, xtitle=xtitle)
+    return dict(x=x, yI=yI, yQ=yQ, yA=yA, yUFNP=yUFNP, xtitle=xtitle)
 
 @bp.route('/mani/singleqb/2ddata', methods=['GET'])
+@plotpayload('M_singleqb', 'singleqb_2Ddata', dimension=2)
 def mani_singleqb_2ddata():
     print(Fore.GREEN + "User %s is plotting SINGLEQB 2D-Data using vectorization" %session['user_name'])
     M_singleqb[session['user_name']].loadata()
@@ -1687,28 +1717,26 @@ def mani_singleqb_2ddata():
     print(Back.WHITE + Fore.BLACK + "Sweeping %s x-points" %len(xsweep))
     print(Back.WHITE + Fore.BLACK + "Sweeping %s y-points" %len(ysweep))
 
-    Idata = zeros([len(ysweep), len(xsweep)])
-    Qdata = zeros([len(ysweep), len(xsweep)])
-    Adata = zeros([len(ysweep), len(xsweep)])
-    Pdata = zeros([len(ysweep), len(xsweep)])
-    for j in ysweep:
-        if not (j+1)%600: print(Fore.CYAN + "Assembling 2D-DATA, x: %s/%s, y: %s/%s" %(i+1,len(xsweep),j+1,len(ysweep)))
-        selected_caddress[SQ_CParameters[session['user_name']].index(selected_y)] = j # register y-th position
-        for i in xsweep:
-            selected_caddress[SQ_CParameters[session['user_name']].index(selected_x)] = i # register x-th position
-            if [c for c in cselect.values()][-1] == "s": # sampling mode currently limited to time-range (last 'basic' parameter) only
+    if [c for c in cselect.values()][-1] == "s": # sampling mode currently limited to time-range (last 'basic' parameter) only
+        Idata = zeros([len(ysweep), len(xsweep)])
+        Qdata = zeros([len(ysweep), len(xsweep)])
+        Adata = zeros([len(ysweep), len(xsweep)])
+        Pdata = zeros([len(ysweep), len(xsweep)])
+        for j in ysweep:
+            if not (j+1)%600: print(Fore.CYAN + "Assembling 2D-DATA, x: %s/%s, y: %s/%s" %(i+1,len(xsweep),j+1,len(ysweep)))
+            selected_caddress[SQ_CParameters[session['user_name']].index(selected_y)] = j # register y-th position
+            for i in xsweep:
+                selected_caddress[SQ_CParameters[session['user_name']].index(selected_x)] = i # register x-th position
                 srange = request.args.get('srange').split(",") # sample range
                 smode = request.args.get('smode') # sampling mode
                 Idata[j,i], Qdata[j,i], Adata[j,i], Pdata[j,i] = \
                     pulseresp_sampler(srange, selected_caddress, selectedata, c_singleqb_structure[session['user_name']], M_singleqb[session['user_name']].datadensity, mode=smode)
-
-            else:
-                # Ground level Pulse shape response:
-                selected_caddress = [int(s) for s in selected_caddress]
-                Basic = selected_caddress[-1]
-                # Extracting I & Q:
-                Idata[j,i] = selectedata[gotocdata(selected_caddress[:-1]+[2*Basic], c_singleqb_structure[session['user_name']])]
-                Qdata[j,i] = selectedata[gotocdata(selected_caddress[:-1]+[2*Basic+1], c_singleqb_structure[session['user_name']])]  
+    else:
+        # Ground level Pulse shape response (plain indexing on the C-Structure view of the data):
+        cslice = tuple(slice(len(xsweep)) if s == 'x' else slice(len(ysweep)) if s == 'y' else int(s) for s in selected_caddress)
+        IQdata = ma.filled(M_singleqb[session['user_name']].asarray(c_singleqb_structure[session['user_name']])[cslice], 0)
+        if x_loc < y_loc: IQdata = IQdata.swapaxes(0,1) # into (y, x, IQ)
+        Idata, Qdata = IQdata[:,:,0], IQdata[:,:,1]
 
     print("Mapping complete. Structure: %s" %c_singleqb_structure[session['user_name']])
     
@@ -1730,7 +1758,7 @@ def mani_singleqb_2ddata():
 
     # executor.submit(fn, args).add_done_callback(handler)
 
-    return jsonify(x=x, y=y, ZZI=ZZI, ZZQ=ZZQ, ZZA=ZZA, ZZUP=ZZUP, xtitle=xtitle, ytitle=ytitle)
+    return dict(x=x, y=y, ZZI=ZZI, ZZQ=ZZQ, ZZA=ZZA, ZZUP=ZZUP, xtitle=xtitle, ytitle=ytitle)
 
 
 
@@ -208,3 +208,36 @@ $(document).on('click', 'button.plusButton-1', function() {
     console.log("Going FORWARD");
 });
 
+
+// Binary plot-data (opt-in via binary=1, packed by toolbox.packbinary): float32 typed-arrays instead of JSON lists
+function unpackbinary(buffer) {
+    var headerlength = new DataView(buffer).getUint32(0, true);
+    var header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerlength)));
+    var data = header.meta, start = 4 + headerlength;
+    $.each(header.arrays, function(i, item) {
+        var path = item[0], offset = item[1], shape = item[2];
+        var flat = new Float32Array(buffer, start + offset, shape.reduce(function(a, b) { return a * b; }, 1));
+        var value = flat;
+        if (shape.length == 2) { value = []; for (var r = 0; r < shape[0]; r++) { value.push(flat.subarray(r*shape[1], (r+1)*shape[1])); }; };
+        var branch = data;
+        for (var k = 0; k < path.length - 1; k++) { branch = branch[path[k]] = branch[path[k]] || {}; };
+        branch[path[path.length-1]] = value;
+    });
+    return data;
+};
+// Drop-in for $.getJSON(url, params, success) returning the same done/fail promise:
+function getBinary(url, params, success) {
+    var deferred = $.Deferred();
+    var xhr = new XMLHttpRequest();
+    xhr.open('GET', url + '?' + $.param($.extend({}, params, { binary: 1 })));
+    xhr.responseType = 'arraybuffer';
+    xhr.onload = function() {
+        if (xhr.status != 200) { deferred.reject(xhr, 'error', xhr.statusText); return; };
+        var data = unpackbinary(xhr.response);
+        if (success) { success(data); };
+        deferred.resolve(data);
+    };
+    xhr.onerror = function() { deferred.reject(xhr, 'error', xhr.statusText); };
+    xhr.send();
+    return deferred.promise();
+};
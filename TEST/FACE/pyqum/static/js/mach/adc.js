@@ -55,7 +55,7 @@ function acquire_play(callback) {
 function playsamples(tracenum, type, average=0, signal_processing='original') {
     $( "i.adc" ).remove(); //clear previous
     $('button.adc.adcname#'+adcname).prepend("<i class='adc fa fa-cog fa-spin fa-3x fa-fw' style='font-size:15px;color:purple;'></i> ");
-    $.getJSON('/mach/adc/playdata', {
+    getBinary('/mach/adc/playdata', {
         adcname: adcname, 
         tracenum: tracenum,
         average: average, // mean along y-axis (records)
@@ -564,6 +564,7 @@ $(function () {
         var noise = $('input.char.cwsweep.bottomost-data-block#c-noise-data').is(':checked')?1:0;
         console.log("Picked: " + isparam + ", Noise-data: " + noise);
         $.getJSON(mssnencrpytonian() + '/mssn/char/cwsweep/1ddata', {
+            resolution: screen.width, // server-side level-of-detail
             irepeat: irepeat, ifluxbias: ifluxbias, ixyfreq: ixyfreq, ixypowa: ixypowa, isparam: isparam, iifb: iifb, ifreq: ifreq, ipowa: ipowa, noise: noise,
         }, function (data) {
             window.x1 = data.x1;
@@ -609,6 +610,7 @@ $(function () {
         var noise = $('input.char.cwsweep.bottomost-data-block#c-noise-data').is(':checked')?1:0;
         console.log("Picked: " + isparam + ", Noise-data: " + noise);
         $.getJSON(mssnencrpytonian() + '/mssn/char/cwsweep/1ddata', {
+            resolution: screen.width, // server-side level-of-detail
             irepeat: irepeat, ifluxbias: ifluxbias, ixyfreq: ixyfreq, ixypowa: ixypowa, isparam: isparam, iifb: iifb, ifreq: ifreq, ipowa: ipowa, noise: noise,
         }, function (data) {
             window.x1C = data.x1;
@@ -668,6 +670,7 @@ $(function () {
         var ipowa = $('select.char.cwsweep.parameter#c-powa').val();
         console.log("Picked: " + isparam);
         $.getJSON(mssnencrpytonian() + '/mssn/char/cwsweep/2ddata', {
+            resolution: screen.width, // server-side level-of-detail
             irepeat: irepeat, ifluxbias: ifluxbias, ixyfreq: ixyfreq, ixypowa: ixypowa, isparam: isparam, iifb: iifb, ifreq: ifreq, ipowa: ipowa
         }, function (data) {
             window.x = data.x;
@@ -417,6 +417,7 @@ $(function () {
         var ifreq = $('select.char.fresp.parameter[name="c-freq"]').val();
         console.log("Picked: " + isparam);
         $.getJSON(mssnencrpytonian() + '/mssn/char/' + frespcryption + '/1ddata', {
+            resolution: screen.width, // server-side level-of-detail
             ifluxbias: ifluxbias, isparam: isparam, iifb: iifb, ipowa: ipowa, ifreq: ifreq
         }, function (data) {
             window.x1 = data.x1;
@@ -506,6 +507,7 @@ $(function () {
         var ifreq = $('select.char.fresp.parameter[name="c-freq"]').val();
         console.log("Picked: " + isparam);
         $.getJSON(mssnencrpytonian() + '/mssn/char/' + frespcryption + '/1ddata', {
+            resolution: screen.width, // server-side level-of-detail
             ifluxbias: ifluxbias, isparam: isparam, iifb: iifb, ipowa: ipowa, ifreq: ifreq
         }, function (data) {
             window.x1C = data.x1;
@@ -557,6 +559,7 @@ $(function () {
         var ifreq = $('select.char.fresp.parameter[name="c-freq"]').val();
         console.log("Picked: " + isparam);
         $.getJSON(mssnencrpytonian() + '/mssn/char/' + frespcryption + '/2ddata', {
+            resolution: screen.width, // server-side level-of-detail
             ifluxbias: ifluxbias, isparam: isparam, iifb: iifb, ipowa: ipowa, ifreq: ifreq
         }, function (data) {
             window.x = data.x;
@@ -617,6 +617,7 @@ $(function () {
         var srange = $('input.char.data.sqepulse#sample-range').val();
         var smode = $('select.char.data.sqepulse#sample-mode').val();
         $.getJSON(mssnencrpytonian() + '/mssn/char/sqepulse/1ddata', {
+            resolution: screen.width, // server-side level-of-detail
             cselect: JSON.stringify(cselect), srange: srange, smode: smode,
         }, function (data) {
             window.x = data.x;
@@ -653,6 +654,7 @@ $(function () {
         var srange = $('input.char.data.sqepulse#sample-range').val();
         var smode = $('select.char.data.sqepulse#sample-mode').val();
         $.getJSON(mssnencrpytonian() + '/mssn/char/sqepulse/1ddata', {
+            resolution: screen.width, // server-side level-of-detail
             cselect: JSON.stringify(cselect), srange: srange, smode: smode,
         }, function (data) {
             window.x2 = data.x;
@@ -705,6 +707,7 @@ $(function () {
         console.log("Picked Flux: " + cselect['Flux-Bias']);
         var srange = $('input.char.data.sqepulse#sample-range').val();
         $.getJSON(mssnencrpytonian() + '/mssn/char/sqepulse/2ddata', {
+            resolution: screen.width, // server-side level-of-detail
             cselect: JSON.stringify(cselect), srange: srange
         }, function (data) {
             window.x = data.x;
@@ -837,6 +837,7 @@ $(function () {
         var srange = $('input.mani.data.singleqb#singleqb-sample-range').val();
         var smode = $('select.mani.data.singleqb#singleqb-sample-mode').val();
         $.getJSON(mssnencrpytonian() + '/mssn/mani/singleqb/1ddata', {
+            resolution: screen.width, // server-side level-of-detail
             cselect: JSON.stringify(cselect), srange: srange, smode: smode,
         }, function (data) {
             window.x = data.x;
@@ -875,6 +876,7 @@ $(function () {
         var srange = $('input.mani.data.singleqb#singleqb-sample-range').val();
         var smode = $('select.mani.data.singleqb#singleqb-sample-mode').val();
         $.getJSON(mssnencrpytonian() + '/mssn/mani/singleqb/1ddata', {
+            resolution: screen.width, // server-side level-of-detail
             cselect: JSON.stringify(cselect), srange: srange, smode: smode,
         }, function (data) {
             window.xC = data.x;
@@ -940,6 +942,7 @@ $(function () {
         var srange = $('input.mani.data.singleqb#singleqb-sample-range').val();
         var smode = $('select.mani.data.singleqb#singleqb-sample-mode').val();
         $.getJSON(mssnencrpytonian() + '/mssn/mani/singleqb/2ddata', {
+            resolution: screen.width, // server-side level-of-detail
             cselect: JSON.stringify(cselect), srange: srange, smode: smode
         }, function (data) {
             window.X = data.x;